@@ -1,20 +1,38 @@
+import os
+import tempfile
 from typing import Optional
 from app.repositories.movie_repository import MovieRepository
-from app.schemas.enums import MovieStatus
-from app.schemas.movie import MovieResponse, get_genre_names
-from fastapi import APIRouter, Depends, HTTPException, Query
+from app.schemas.enums import CollectionSort, ExportFormat, MovieStatus
+from app.schemas.movie import genre_names, get_genre_ids, get_genre_names
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db import get_db
 from app.services.user_movie_service import UserMovieService
 from app.services.movie_service import MovieService
 from app.services.custom_movie_service import CustomMovieService
+from app.core.config import settings
 from app.core.security import get_current_user
+from app.schemas.job import JobResponse
+from app.services.export_service import MEDIA_TYPES, stream_collection_export
+from app.services.import_service import run_kinopoisk_import
+from app.services.job_service import job_registry
 from app.schemas.user import User
-from app.schemas.collection import AddToCollectionRequest, CollectionMovieResponse
+from app.schemas.collection import (
+    AddToCollectionRequest,
+    BulkCollectionRequest,
+    BulkOperationResult,
+    CollectionChangesResponse,
+    CollectionMovieResponse,
+)
 import uuid
 
 router = APIRouter(prefix="/api/collection", tags=["collection"])
 
+IMPORT_JOB_KIND = "kinopoisk_import"
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 # Service dependencies
 async def get_user_movie_service(db: AsyncSession = Depends(get_db)):
     return UserMovieService(db)
@@ -26,69 +44,160 @@ async def get_movie_service(db: AsyncSession = Depends(get_db)):
 async def get_custom_movie_service(db: AsyncSession = Depends(get_db)):
     return CustomMovieService(db)
 
+def parse_genres(genres: Optional[str]) -> list[str]:
+    """Split, normalize and validate a comma-separated genres query parameter."""
+    # Process genres into a list
+    genre_list = genres.split(',') if genres else []
+
+    # Normalize & validate genres
+    genre_list = [genre.strip().lower() for genre in genre_list]
+    for genre in genre_list:
+        if genre not in genre_names:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid genre: {genre} (valid genres: {', '.join(genre_names)})"
+            )
+    return genre_list
+
+def entry_response(entry) -> CollectionMovieResponse:
+    """Response for a collection entry returned by a mutation, joined to its movie columns."""
+    return CollectionMovieResponse(
+        id=entry.id,
+        title=entry.title,
+        description=entry.description,
+        status=entry.status,
+        added_at=entry.added_at,
+        rating=entry.rating,
+        poster_path=entry.poster_path,
+        genres=get_genre_names(entry.genre_ids) if entry.movie_id else [],
+        backdrop_path=entry.backdrop_path,
+        release_date=entry.release_date,
+    )
+
+def collection_item(row) -> dict:
+    """CollectionMovieResponse fields of a COLLECTION_ITEM_COLUMNS row, ready for serialization."""
+    item = row._asdict()
+    item.pop("entry_id", None)
+    item.pop("sort_value", None)
+    genre_ids = item.pop("genre_ids")
+    item["genres"] = get_genre_names(genre_ids) if genre_ids is not None else None
+    return item
+
+def ensure_no_running_import(user_id: uuid.UUID) -> None:
+    if job_registry.get_running(IMPORT_JOB_KIND, owner_id=user_id):
+        raise HTTPException(
+            status_code=409,
+            detail="An import is already running"
+        )
+
+def export_response(format: ExportFormat, user_id: Optional[uuid.UUID], status: Optional[MovieStatus], name: str):
+    # The request's session is closed before the body is sent: the export opens its own
+    return StreamingResponse(
+        stream_collection_export(format, user_id, status),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{format.value}"'},
+    )
+
 @router.post("/add", response_model=CollectionMovieResponse)
 async def add_to_collection(
     request_data: AddToCollectionRequest,
     user_movie_service: UserMovieService = Depends(get_user_movie_service),
-    movie_service: MovieService = Depends(get_movie_service),
     custom_movie_service: CustomMovieService = Depends(get_custom_movie_service),
     current_user: User = Depends(get_current_user),
 ):
     """
     Add a movie or custom movie to the user's collection.
     """
+    if request_data.movie_id:
+        # Add a TMDB movie to the collection; a missing movie is reported by the insert itself
+        entry = await user_movie_service.add_movie(
+            user_id=current_user.id,
+            movie_id=request_data.movie_id,
+            status=request_data.status if request_data.status else MovieStatus.WILL_WATCH,
+        )
+    else:
+        # Add a custom movie to the collection
+        if not request_data.title:
+            raise HTTPException(status_code=400, detail="Title is required for custom movies")
+
+        custom_movie = await custom_movie_service.create_custom_movie(
+            user_id=current_user.id,
+            title=request_data.title,
+            description=request_data.description,
+            poster_path=request_data.poster_path,
+        )
+        entry = await user_movie_service.add_movie(
+            user_id=current_user.id,
+            custom_movie_id=custom_movie.id,
+            status=request_data.status if request_data.status else MovieStatus.WILL_WATCH,
+        )
+    return entry_response(entry)
+
+@router.post("/bulk", response_model=list[BulkOperationResult])
+async def bulk_update_collection(
+    request_data: BulkCollectionRequest,
+    user_movie_service: UserMovieService = Depends(get_user_movie_service),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Apply many add / status / delete operations in order, in one transaction,
+    e.g. changes made offline. Returns the outcome of every operation in request order.
+    """
+    return await user_movie_service.apply_bulk(current_user.id, request_data.operations)
+
+@router.post("/import/kinopoisk", response_model=JobResponse, status_code=202)
+async def import_kinopoisk(
+    file: UploadFile = File(..., description="Kinopoisk ratings export (CSV)"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Import a Kinopoisk ratings export into the collection in a background job.
+    Rated movies are added as watched, the rest as will watch; movies that are not
+    in the catalog become custom movies. Poll GET /import/{job_id} for progress.
+    """
+    ensure_no_running_import(current_user.id)
+
+    # The upload is gone once the request ends: copy it to a file the job reads as a stream
+    size = 0
+    with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as f:
+        try:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.IMPORT_MAX_FILE_SIZE:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File is larger than {settings.IMPORT_MAX_FILE_SIZE} bytes"
+                    )
+                f.write(chunk)
+        except BaseException:
+            os.remove(f.name)
+            raise
+
+    # Another upload may have started an import while this one was read: check again.
+    # Nothing is awaited between this check and start, so no other request can get in between.
     try:
-        if request_data.movie_id:
-            # Add a TMDB movie to the collection
-            movie = await movie_service.get_movie_by_id(request_data.movie_id)
-            if not movie:
-                raise HTTPException(status_code=404, detail="Movie not found")
-
-            user_movie = await user_movie_service.add_movie(
-                user_id=current_user.id,
-                movie_id=request_data.movie_id,
-                status=request_data.status if request_data.status else MovieStatus.WILL_WATCH,
-            )
-            return CollectionMovieResponse(
-                id=user_movie.id,
-                title=movie.title,
-                description=movie.overview,
-                status=user_movie.status,
-                added_at=user_movie.added_at,
-                rating=user_movie.rating,
-                poster_path=movie.poster_path,
-                genres=get_genre_names(movie.genre_ids),
-                backdrop_path=movie.backdrop_path,
-                release_date=movie.release_date,
-            )
-        else:
-            # Add a custom movie to the collection
-            if not request_data.title:
-                raise HTTPException(status_code=400, detail="Title is required for custom movies")
-
-            custom_movie = await custom_movie_service.create_custom_movie(
-                user_id=current_user.id,
-                title=request_data.title,
-                description=request_data.description,
-                poster_path=request_data.poster_path,
-            )
-            user_movie = await user_movie_service.add_movie(
-                user_id=current_user.id,
-                custom_movie_id=custom_movie.id,
-                status=request_data.status if request_data.status else MovieStatus.WILL_WATCH,
-            )
-            return CollectionMovieResponse(
-                id=user_movie.id,
-                title=custom_movie.title,
-                description=custom_movie.description,
-                status=user_movie.status,
-                added_at=user_movie.added_at,
-                rating=user_movie.rating,
-                poster_path=custom_movie.poster_path
-            )
+        ensure_no_running_import(current_user.id)
+    except HTTPException:
+        os.remove(f.name)
+        raise
+    return job_registry.start(
+        IMPORT_JOB_KIND,
+        lambda job: run_kinopoisk_import(job, current_user.id, f.name),
+        owner_id=current_user.id,
+    )
 
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+@router.get("/import/{job_id}", response_model=JobResponse)
+async def get_import_status(
+    job_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Progress of an import job: rows imported, matched and custom movies, repeated lines and invalid rows.
+    """
+    job = job_registry.get(job_id)
+    if not job or job.kind != IMPORT_JOB_KIND or job.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 @router.post("/{movie_identifier}/{status}", response_model=CollectionMovieResponse)
 async def update_status(
@@ -98,109 +207,92 @@ async def update_status(
     current_user: User = Depends(get_current_user),
 ):
     """
-    Update the status of a movie in the user's collection using its UUID (Movie.id or CustomMovie.id).
+    Update the status of a movie in the user's collection using its UUID
+    (Movie.id, CustomMovie.id or the collection entry id returned by /add).
     """
-    # Find the UserMovie entry by user_id and movie_identifier
-    user_movie = await user_movie_service.user_movie_repo.get_by_user_and_movie_identifier(
+    entry = await user_movie_service.update_status(
         user_id=current_user.id,
-        movie_identifier=movie_identifier
+        movie_identifier=movie_identifier,
+        status=status,
     )
-    if not user_movie:
-        raise HTTPException(status_code=404, detail="Movie not found in your collection")
-
-    # Update the status
-    try:
-        updated_user_movie = await user_movie_service.update_status(
-            user_id=current_user.id,
-            user_movie_id=user_movie.id,
-            status=status,
-        )
-
-        # Determine the title and description based on whether it's a TMDB movie or a custom movie
-        if updated_user_movie.movie:
-            title = updated_user_movie.movie.title
-            description = updated_user_movie.movie.overview
-            poster_path = updated_user_movie.movie.poster_path
-            genres = get_genre_names(updated_user_movie.movie.genre_ids)
-            backdrop_path = updated_user_movie.movie.backdrop_path
-            release_date = updated_user_movie.movie.release_date
-        elif updated_user_movie.custom_movie:
-            title = updated_user_movie.custom_movie.title
-            description = updated_user_movie.custom_movie.description
-            poster_path = updated_user_movie.custom_movie.poster_path
-            genres = []  # Custom movies may not have genres
-            backdrop_path = None
-            release_date = None
-        else:
-            raise HTTPException(status_code=500, detail="Invalid user movie data")
-
-        return CollectionMovieResponse(
-            id=updated_user_movie.id,
-            title=title,
-            description=description,
-            status=updated_user_movie.status,
-            added_at=updated_user_movie.added_at,
-            rating=updated_user_movie.rating,
-            poster_path=poster_path,
-            genres=genres,
-            backdrop_path=backdrop_path,
-            release_date=release_date,
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    return entry_response(entry)
 
 @router.get("/", response_model=list[CollectionMovieResponse])
 async def get_collection(
     status: Optional[MovieStatus] = None,
+    genres: Optional[str] = Query(None, description="Comma-separated list of genres to filter by"),
+    sort: CollectionSort = Query(CollectionSort.ADDED_AT, description="Sort order"),
+    limit: int = Query(100, ge=1, le=500, description="Number of movies per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
     user_movie_service: UserMovieService = Depends(get_user_movie_service),
     current_user: User = Depends(get_current_user),
 ):
+    """
+    Return one page of the user's collection, filtered by status and genres.
+    The cursor of the next page is returned in the X-Next-Cursor header.
+    """
     try:
-        user_movies = await user_movie_service.get_all(user_id=current_user.id, status=status)
-        movies = []
-        for user_movie in user_movies:
-            if user_movie.movie:
-                movie = user_movie.movie
-                movie_response = MovieResponse(
-                    id=movie.id,
-                    tmdb_id=movie.tmdb_id,
-                    adult=movie.adult,
-                    backdrop_path=movie.backdrop_path,
-                    original_language=movie.original_language,
-                    original_title=movie.original_title,
-                    overview=movie.overview,
-                    popularity=movie.popularity,
-                    poster_path=movie.poster_path,
-                    release_date=movie.release_date,
-                    title=movie.title,
-                    video=movie.video,
-                    vote_average=movie.vote_average,
-                    vote_count=movie.vote_count,
-                    genres=get_genre_names(movie.genre_ids),
-                    status=user_movie.status
-                )
-            elif user_movie.custom_movie:
-                custom_movie = user_movie.custom_movie
-                movie_response = MovieResponse(
-                    id=custom_movie.id,
-                    title=custom_movie.title,
-                    overview=custom_movie.description,
-                    status=user_movie.status,
-                    poster_path=custom_movie.poster_path,
-                )
-            else:
-                continue
-
-            collection_movie = CollectionMovieResponse(
-                **movie_response.model_dump(),
-                added_at=user_movie.added_at,
-                rating=user_movie.rating
-            )
-            movies.append(collection_movie)
-        return movies
+        rows, next_cursor = await user_movie_service.get_page(
+            user_id=current_user.id,
+            status=status,
+            genre_ids=get_genre_ids(parse_genres(genres)),
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    # The query already returns exactly the response fields: serialize them without model validation
+    items = [collection_item(row) for row in rows]
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(content=to_json(items), media_type="application/json", headers=headers)
+
+@router.get("/changes", response_model=CollectionChangesResponse)
+async def get_collection_changes(
+    since: Optional[str] = Query(None, description="Cursor returned by the previous sync; omit for a full sync"),
+    user_movie_service: UserMovieService = Depends(get_user_movie_service),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Delta sync: movies added or updated and movies removed since the previous sync,
+    and the cursor to pass as since next time. Without since, the whole collection is returned.
+    An expired cursor (410) means the collection has to be reloaded with a full sync.
+    """
+    changed, deleted, cursor = await user_movie_service.get_changes(current_user.id, since)
+    content = {
+        "deleted": [row._asdict() for row in deleted],
+        "changed": [collection_item(row) for row in changed],
+        "cursor": cursor,
+    }
+    return Response(content=to_json(content), media_type="application/json")
+
+@router.get("/export")
+async def export_collection(
+    format: ExportFormat = Query(ExportFormat.CSV, description="File format"),
+    status: Optional[MovieStatus] = None,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Download the user's collection as CSV or NDJSON. Rows are streamed as they are
+    read from the database, so collections of any size are exported in constant memory.
+    """
+    return export_response(format, current_user.id, status, "collection")
+
+@router.get("/export/all")
+async def export_all_collections(
+    format: ExportFormat = Query(ExportFormat.CSV, description="File format"),
+    status: Optional[MovieStatus] = None,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Download every user's collection entries, with a user_id column, for analytics.
+    Restricted to admin users.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Only admin users can export all collections")
+    return export_response(format, None, status, "user_movies")
+
 @router.delete("/{movie_identifier}", status_code=204)
 async def delete_from_collection(
     movie_identifier: uuid.UUID,
@@ -208,22 +300,11 @@ async def delete_from_collection(
     current_user: User = Depends(get_current_user),
 ):
     """
-    Remove a movie from the user's collection using its UUID (Movie.id or CustomMovie.id).
+    Remove a movie from the user's collection using its UUID
+    (Movie.id, CustomMovie.id or the collection entry id returned by /add).
     """
-    # Find the UserMovie entry by user_id and movie_identifier
-    user_movie = await user_movie_service.user_movie_repo.get_by_user_and_movie_identifier(
+    await user_movie_service.delete_from_collection(
         user_id=current_user.id,
-        movie_identifier=movie_identifier
+        movie_identifier=movie_identifier,
     )
-    if not user_movie:
-        raise HTTPException(status_code=404, detail="Movie not found in your collection")
-
-    # Delete the entry
-    try:
-        await user_movie_service.delete_from_collection(
-            user_id=current_user.id,
-            user_movie_id=user_movie.id,
-        )
-        return None  # No content for DELETE
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
\ No newline at end of file
+    return None  # No content for DELETE
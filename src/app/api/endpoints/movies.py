@@ -1,98 +1,147 @@
 from typing import Optional
-from app.api.endpoints.collection import get_movie_service, get_user_movie_service
+from app.api.endpoints.collection import get_user_movie_service, parse_genres
 from app.api.endpoints.images import fetch_image_with_proxy, upload_from_url
 from app.services.user_movie_service import UserMovieService
 from elasticsearch import AsyncElasticsearch
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from httpx import AsyncClient
 from pydantic import HttpUrl
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.security import get_current_user
+from app.core.config import settings
+from app.core.security import get_current_user, read_group_invite
 from app.core.elasticsearch import get_es
 from app.db import get_db
 from app.models.user import User
 from app.repositories.movie_repository import MovieRepository
-from app.schemas.movie import MetadataResponse, MovieResponse, get_genre_names, genre_names
+from app.schemas.job import JobResponse
+from app.schemas.enums import BrowseSort, MovieStatus
+from app.schemas.movie import (
+    BecauseYouWatchedResponse,
+    GroupRecommendationRequest,
+    MetadataResponse,
+    MovieBrowseResponse,
+    MovieResponse,
+    MovieSuggestion,
+    get_genre_names,
+)
 from app.services.movie_service import MovieService
+from app.services.job_service import job_registry
+from app.services.movie_index_service import run_reindex_job
+from app.services.recommendation_service import RecommendationService
+from app.services.search_service import SearchBackendUnavailable, SearchService
+from app.services.elasticsearch_search_backend import ElasticsearchSearchBackend
+from app.services.postgres_search_backend import PostgresSearchBackend
 from bs4 import BeautifulSoup
 import uuid
 
 router = APIRouter(prefix="/api/movies", tags=["movies"])
 
+# Service dependencies
+async def get_search_service(
+    db: AsyncSession = Depends(get_db),
+    es: AsyncElasticsearch = Depends(get_es),
+):
+    available = {
+        ElasticsearchSearchBackend.name: lambda: ElasticsearchSearchBackend(es),
+        PostgresSearchBackend.name: lambda: PostgresSearchBackend(db),
+    }
+    names = dict.fromkeys(
+        name for name in (settings.SEARCH_BACKEND, settings.SEARCH_FALLBACK_BACKEND) if name in available
+    )
+    return SearchService([available[name]() for name in names])
+
+async def get_recommendation_service(db: AsyncSession = Depends(get_db)):
+    return RecommendationService(db)
+
 @router.get("/search", response_model=list[MovieResponse])
 async def search_movies_fts(
+    response: Response,
     title: Optional[str] = Query(None, description="Title to search for"),
     genres: Optional[str] = Query(None, description="Comma-separated list of genres to filter by"),
     min_rating: Optional[float] = Query(None, ge=0, le=10, description="Minimum rating to filter by"),
-    db: AsyncSession = Depends(get_db),
-    es: AsyncElasticsearch = Depends(get_es),
+    page_size: int = Query(20, ge=1, le=100, description="Number of movies per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    search_service: SearchService = Depends(get_search_service),
     current_user: User = Depends(get_current_user),
     user_movie_service: UserMovieService = Depends(get_user_movie_service),
 ):
     if (title is None or title == "") and (genres is None or genres == "") and min_rating is None:
         return []
 
-    # Process genres into a list
-    genre_list = genres.split(',') if genres else []
-
-    # Normalize & validate genres
-    genre_list = [genre.strip().lower() for genre in genre_list]
-    for genre in genre_list:
-        if genre not in genre_names:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid genre: {genre} (valid genres: {', '.join(genre_names)})"
-            )
+    genre_list = parse_genres(genres)
 
-    # Build filter clauses
-    filter_clauses = []
-    if genre_list:
-        filter_clauses.append({"terms": {"genres": genre_list}})
-    if min_rating is not None:
-        filter_clauses.append({"range": {"vote_average": {"gte": min_rating}}})
-
-    # Construct Elasticsearch query with filters
-    search_body = {
-        "query": {
-            "bool": {
-                "must": [
-                    {
-                        "multi_match": {
-                            "query": title,
-                            "fields": ["title", "overview", "genres"],
-                            "fuzziness": "AUTO"
-                        }
-                    }
-                ],
-                "filter": filter_clauses
-            }
-        }
-    }
+    try:
+        movies, next_cursor = await search_service.search_movies(
+            title, genre_list, min_rating, page_size=page_size, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except SearchBackendUnavailable:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Search is temporarily unavailable")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    movie_ids = [uuid.UUID(mov["id"]) for mov in movies]
+    statuses = await user_movie_service.get_statuses_for_movies(current_user.id, movie_ids)
 
-    # Execute the search
-    response = await es.search(index="movies", body=search_body)
-    hits = response['hits']['hits']
+    return [
+        MovieResponse(**mov, status=statuses.get(movie_id, None))
+        for movie_id, mov in zip(movie_ids, movies)
+    ]
 
-    # Fetch movie details from the database
-    movie_ids = [uuid.UUID(hit['_id']) for hit in hits]
-    movie_repository = MovieRepository(db)
-    movies = await movie_repository.get_movies_by_ids(movie_ids)
+@router.get("/browse", response_model=MovieBrowseResponse)
+async def browse_movies(
+    genres: Optional[str] = Query(None, description="Comma-separated list of genres to filter by"),
+    min_rating: Optional[float] = Query(None, ge=0, le=10, description="Minimum rating to filter by"),
+    sort: BrowseSort = Query(BrowseSort.RATING, description="Sort by rating or popularity"),
+    page_size: int = Query(20, ge=1, le=100, description="Number of movies per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    search_service: SearchService = Depends(get_search_service),
+    current_user: User = Depends(get_current_user),
+    user_movie_service: UserMovieService = Depends(get_user_movie_service),
+):
+    """
+    Filter-only catalog browsing. The first page (no cursor) also returns facet counts
+    per genre, release decade and rating bucket for the filter sidebar.
+    """
+    genre_list = parse_genres(genres)
 
-    # Preserve order and format response
-    movies_dict = {movie.id: movie for movie in movies}
-    ordered_movies = [movies_dict[movie_id] for movie_id in movie_ids if movie_id in movies_dict]
+    try:
+        movies, next_cursor, facets = await search_service.browse_movies(
+            genre_list, min_rating, sort=sort, page_size=page_size, cursor=cursor, with_facets=True
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except SearchBackendUnavailable:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Search is temporarily unavailable")
 
-    movie_ids = [mov.id for mov in ordered_movies]
+    movie_ids = [uuid.UUID(mov["id"]) for mov in movies]
     statuses = await user_movie_service.get_statuses_for_movies(current_user.id, movie_ids)
 
-    return [
-        MovieResponse(
-            **mov.__dict__,
-            genres=get_genre_names(mov.genre_ids),
-            status=statuses.get(mov.id, None)
-        )
-        for mov in ordered_movies
-    ]
+    return MovieBrowseResponse(
+        items=[
+            MovieResponse(**mov, status=statuses.get(movie_id, None))
+            for movie_id, mov in zip(movie_ids, movies)
+        ],
+        next_cursor=next_cursor,
+        facets=facets,
+    )
+
+@router.get("/suggest", response_model=list[MovieSuggestion])
+async def suggest_movies(
+    prefix: str = Query(..., min_length=1, max_length=100, description="Beginning of the movie title"),
+    limit: int = Query(10, ge=1, le=20, description="Maximum number of suggestions"),
+    search_service: SearchService = Depends(get_search_service),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Title typeahead. Served by the search backend without collection status lookups
+    (the Elasticsearch completion suggester by default), so it is cheap enough to call on every keystroke.
+    """
+    try:
+        return await search_service.suggest_titles(prefix.strip(), limit)
+    except SearchBackendUnavailable:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Search is temporarily unavailable")
 
 @router.get("/top", response_model=list[MovieResponse])
 async def get_top_movies(
@@ -118,37 +167,89 @@ async def get_top_movies(
 
 @router.get("/recommended", response_model=list[MovieResponse])
 async def get_recommended_movies(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    limit: int = Query(100, ge=1, le=100, description="Number of movies per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
     current_user: User = Depends(get_current_user),
-    user_movie_service: UserMovieService = Depends(get_user_movie_service),
-    movie_service: MovieService = Depends(get_movie_service),
+    recommendation_service: RecommendationService = Depends(get_recommendation_service),
 ):
-    """Return personalized movies sorted by relevancy and vote average."""
-    # Compute genre relevancy scores
-    R_g = await user_movie_service.compute_genre_relevancy(current_user.id)
-    
-    # Get top 100 candidate movies by vote average
-    candidates = await movie_service.get_top_movies(limit=300)
-    
-    # Compute final scores: vote_average + relevancy_score
-    final_scores = [
-        (
-            candidate,
-            sum(R_g.get(g, 0) for g in candidate.genre_ids),  # Relevancy score
-            candidate.vote_average                            # Vote average
+    """
+    Return personalized movies sorted by relevancy and vote average.
+    Movies already in the collection are never returned, so every page is full.
+    Pages are cached until the collection or the catalog changes.
+    """
+    try:
+        movies, next_cursor = await recommendation_service.get_recommended_movies(
+            current_user.id, limit=limit, cursor=cursor, collection_version=current_user.collection_version
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return movies
+
+@router.post("/recommended/group", response_model=list[MovieResponse])
+async def get_group_recommendations(
+    request: GroupRecommendationRequest,
+    limit: int = Query(20, ge=1, le=100, description="Number of movies"),
+    current_user: User = Depends(get_current_user),
+    recommendation_service: RecommendationService = Depends(get_recommendation_service),
+):
+    """
+    Movies for the current user and the invited members to watch together. Every member
+    takes part through an invite they issued, since the ranking reveals their tastes.
+    Movies any member has already watched are never returned.
+    """
+    try:
+        member_ids = [read_group_invite(invite) for invite in request.member_invites]
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    try:
+        return await recommendation_service.get_group_recommendations(
+            [current_user.id, *member_ids], strategy=request.strategy, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+@router.get("/because-you-watched", response_model=list[BecauseYouWatchedResponse])
+async def get_because_you_watched(
+    current_user: User = Depends(get_current_user),
+    recommendation_service: RecommendationService = Depends(get_recommendation_service),
+):
+    """
+    "Because you watched X" rows for the most recently watched movies, from the
+    item-to-item neighbour table. Empty until the table has been built.
+    """
+    rows = await recommendation_service.get_because_you_watched(current_user.id)
+    return [
+        BecauseYouWatchedResponse(
+            movie=MovieResponse(**seed.__dict__, genres=get_genre_names(seed.genre_ids), status=MovieStatus.WATCHED),
+            recommendations=[
+                MovieResponse(**mov.__dict__, genres=get_genre_names(mov.genre_ids))
+                for mov in movies
+            ],
         )
-        for candidate in candidates
+        for seed, movies in rows
     ]
-    
-    # Sort by combined score (vote_average + relevancy_score) and take top 100
-    sorted_candidates = sorted(final_scores, key=lambda x: x[2] + x[1], reverse=True)[:100]
-    movies = [x[0] for x in sorted_candidates]
-    
-    # Fetch statuses for the returned movies
-    movie_ids = [mov.id for mov in movies]
-    statuses = await user_movie_service.get_statuses_for_movies(current_user.id, movie_ids)
-    
-    # Construct response
+
+@router.get("/{movie_id}/similar", response_model=list[MovieResponse])
+async def get_similar_movies(
+    movie_id: uuid.UUID,
+    limit: int = Query(20, ge=1, le=50, description="Maximum number of similar movies"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    user_movie_service: UserMovieService = Depends(get_user_movie_service),
+    recommendation_service: RecommendationService = Depends(get_recommendation_service),
+):
+    """
+    Movies whose overview and genres are closest to the given movie, most similar first.
+    A lookup in the precomputed neighbour table: no text processing per request.
+    """
+    if not await MovieRepository(db).get_movie_by_id(movie_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Movie not found")
+
+    movies = await recommendation_service.get_similar_movies(movie_id, limit)
+    statuses = await user_movie_service.get_statuses_for_movies(current_user.id, [mov.id for mov in movies])
     return [
         MovieResponse(
             **mov.__dict__,
@@ -156,18 +257,17 @@ async def get_recommended_movies(
             status=statuses.get(mov.id, None)
         )
         for mov in movies
-        if statuses.get(mov.id, None) is None
     ]
 
-@router.post("/reindex", status_code=status.HTTP_200_OK)
+@router.post("/reindex", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def reindex_movies(
-    db: AsyncSession = Depends(get_db),
     es: AsyncElasticsearch = Depends(get_es),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Reset Elasticsearch index and reindex all movies from the database.
-    Restricted to admin users.
+    Start a background job that streams all movies from the database into a new
+    index version and switches the movies alias to it without search downtime.
+    Poll GET /reindex/{job_id} for progress. Restricted to admin users.
     """
 
     if not current_user.is_admin:
@@ -176,68 +276,34 @@ async def reindex_movies(
             detail="Only admin users can reindex movies"
         )
 
-    try:
-        # Delete existing index if it exists
-        if await es.indices.exists(index="movies"):
-            await es.indices.delete(index="movies")
-
-        # Create new index with mappings
-        await es.indices.create(index="movies", body={
-            "mappings": {
-                "properties": {
-                    "title": {"type": "text"},
-                    "overview": {"type": "text"},
-                    "release_date": {"type": "date"},
-                    "genres": {"type": "keyword"},
-                    "vote_average": {"type": "float"}
-                }
-            }
-        })
-
-        # Fetch all movies from the database
-        movie_repository = MovieRepository(db)
-        movies = await movie_repository.get_all_movies()
-
-        if not movies:
-            return {"message": "No movies found in the database to index"}
-
-        # Prepare bulk indexing actions
-        actions = [
-            {
-                "_index": "movies",
-                "_id": str(movie.id),
-                "_source": {
-                    "title": movie.title,
-                    "overview": movie.overview,
-                    "release_date": movie.release_date.isoformat() if movie.release_date else None,
-                    "genres": get_genre_names(movie.genre_ids),
-                    "vote_average": movie.vote_average
-                }
-            }
-            for movie in movies
-        ]
-
-        # Perform bulk indexing
-        from elasticsearch.helpers import async_bulk
-        successes, errors = await async_bulk(es, actions)
-
-        if errors:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to index some movies: {errors}"
-            )
+    if job_registry.get_running("reindex"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Reindex is already running"
+        )
 
-        return {
-            "message": f"Successfully reindexed {successes} movies",
-            "total_movies": len(movies)
-        }
+    return job_registry.start("reindex", lambda job: run_reindex_job(job, es), owner_id=current_user.id)
 
-    except Exception as e:
+@router.get("/reindex/{job_id}", response_model=JobResponse)
+async def get_reindex_status(
+    job_id: uuid.UUID,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Progress of a reindex job: documents indexed, throughput and errors.
+    Restricted to admin users.
+    """
+    if not current_user.is_admin:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error reindexing movies: {str(e)}"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admin users can reindex movies"
         )
 
+    job = job_registry.get(job_id)
+    if not job or job.kind != "reindex":
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @router.get("/extract-metadata", response_model=MetadataResponse)
 async def extract_metadata(
     url: HttpUrl = Query(..., description="The URL to extract metadata from")
@@ -1,11 +1,33 @@
 from fastapi import Depends
 from fastapi.routing import APIRouter
 
-from app.core.security import get_current_user
-from app.schemas.user import User
+from app.api.endpoints.collection import get_user_movie_service
+from app.core.security import create_group_invite, get_current_user
+from app.schemas.user import GroupInvite, User, UserStats
+from app.services.user_movie_service import UserMovieService
 
 router = APIRouter(prefix="/api/user", tags=["users"])
 
 @router.get("/me", response_model=User)
 async def get_user_info(current_user: User = Depends(get_current_user)):
-    return current_user
\ No newline at end of file
+    return current_user
+
+@router.get("/me/stats", response_model=UserStats)
+async def get_user_stats(
+    current_user: User = Depends(get_current_user),
+    user_movie_service: UserMovieService = Depends(get_user_movie_service),
+):
+    """
+    Collection statistics: movies per status and genre, average rating and additions per month.
+    Computed with aggregate queries and cached until the collection changes.
+    """
+    return await user_movie_service.get_stats(current_user.id, current_user.collection_version)
+
+@router.post("/me/group-invite", response_model=GroupInvite)
+async def get_group_invite(current_user: User = Depends(get_current_user)):
+    """
+    Invite for group recommendations. Sharing it lets the holder rank movies for a group
+    with the current user, which takes the user's genre preferences and watched movies into account.
+    """
+    token, expires_at = create_group_invite(current_user.id)
+    return GroupInvite(token=token, expires_at=expires_at)
@@ -0,0 +1,49 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+from app.core.config import settings
+
+class TTLCache:
+    """
+    Small in-process LRU cache whose entries expire ttl seconds after being stored.
+    Not shared between workers: each worker warms its own copy.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+# User-independent search results; cleared whenever the search index changes
+search_cache = TTLCache(settings.SEARCH_CACHE_SIZE, settings.SEARCH_CACHE_TTL)
+
+# Recommendation pages; keys carry the collection and catalog versions, so changes never hit stale entries
+recommendation_cache = TTLCache(settings.RECOMMENDATION_CACHE_SIZE, settings.RECOMMENDATION_CACHE_TTL)
+
+# Collection statistics; keys carry the collection version, so a change is visible immediately
+stats_cache = TTLCache(settings.STATS_CACHE_SIZE, settings.STATS_CACHE_TTL)
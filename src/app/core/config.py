@@ -11,4 +11,66 @@ class Settings:
     PROXY = os.getenv("PROXY", "'REDACTED'")
     PUBLIC_URL = os.getenv("PUBLIC_URL", "https://prod-team-3-uad8jq68.REDACTED")
 
-settings = Settings()
\ No newline at end of file
+    ELASTICSEARCH_URL = os.getenv("ELASTICSEARCH_URL", "http://elasticsearch:9200")
+    ES_CONNECTIONS_PER_NODE = int(os.getenv("ES_CONNECTIONS_PER_NODE", "10"))
+    ES_REQUEST_TIMEOUT = float(os.getenv("ES_REQUEST_TIMEOUT", "10"))
+    ES_MAX_RETRIES = int(os.getenv("ES_MAX_RETRIES", "3"))
+    ES_RETRY_ON_TIMEOUT = os.getenv("ES_RETRY_ON_TIMEOUT", "True").lower() == "true"
+    ES_SNIFF = os.getenv("ES_SNIFF", "False").lower() == "true"
+    ES_SNIFF_TIMEOUT = float(os.getenv("ES_SNIFF_TIMEOUT", "1"))
+    ES_MIN_DELAY_BETWEEN_SNIFFING = float(os.getenv("ES_MIN_DELAY_BETWEEN_SNIFFING", "60"))
+    ES_MOVIES_REPLICAS = int(os.getenv("ES_MOVIES_REPLICAS", "0"))
+    ES_MOVIES_REFRESH_INTERVAL = os.getenv("ES_MOVIES_REFRESH_INTERVAL", "1s")
+    ES_KEEP_INDEX_VERSIONS = int(os.getenv("ES_KEEP_INDEX_VERSIONS", "2"))
+
+    REINDEX_FETCH_SIZE = int(os.getenv("REINDEX_FETCH_SIZE", "1000"))
+    REINDEX_CHUNK_SIZE = int(os.getenv("REINDEX_CHUNK_SIZE", "500"))
+    REINDEX_CONCURRENCY = int(os.getenv("REINDEX_CONCURRENCY", "2"))
+
+    SEARCH_SYNC_ENABLED = os.getenv("SEARCH_SYNC_ENABLED", "True").lower() == "true"
+    SEARCH_SYNC_INTERVAL = float(os.getenv("SEARCH_SYNC_INTERVAL", "5"))
+    SEARCH_SYNC_BATCH_SIZE = int(os.getenv("SEARCH_SYNC_BATCH_SIZE", "500"))
+    SEARCH_SYNC_LAG_SECONDS = float(os.getenv("SEARCH_SYNC_LAG_SECONDS", "2"))
+
+    SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
+    SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "60"))
+
+    # "elasticsearch" or "postgres"; the fallback serves search while the primary is unhealthy
+    SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "elasticsearch").lower()
+    SEARCH_FALLBACK_BACKEND = os.getenv("SEARCH_FALLBACK_BACKEND", "postgres").lower()
+    SEARCH_HEALTHCHECK_INTERVAL = float(os.getenv("SEARCH_HEALTHCHECK_INTERVAL", "10"))
+    SEARCH_HEALTHCHECK_TIMEOUT = float(os.getenv("SEARCH_HEALTHCHECK_TIMEOUT", "1"))
+
+    # In-memory catalog used to rank recommendations; reloaded by each worker every interval
+    RECOMMENDATION_REFRESH_INTERVAL = float(os.getenv("RECOMMENDATION_REFRESH_INTERVAL", "300"))
+    RECOMMENDATION_MIN_VOTE_COUNT = int(os.getenv("RECOMMENDATION_MIN_VOTE_COUNT", "500"))
+    # Ranked pages per user, keyed by collection and catalog versions; the TTL only bounds memory
+    RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "4096"))
+    RECOMMENDATION_CACHE_TTL = float(os.getenv("RECOMMENDATION_CACHE_TTL", "3600"))
+
+    # Collection statistics per user, keyed by collection version like recommendation pages
+    STATS_CACHE_SIZE = int(os.getenv("STATS_CACHE_SIZE", "4096"))
+    STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "3600"))
+
+    # Item-to-item collaborative filtering: neighbour table built offline by src/tools/build-item-neighbors.py
+    ITEM_NEIGHBORS_PATH = os.getenv("ITEM_NEIGHBORS_PATH", "data/item_neighbors.npy")
+    ITEM_NEIGHBORS_K = int(os.getenv("ITEM_NEIGHBORS_K", "50"))
+    # Share of the collaborative filtering score in the blended recommendation score
+    RECOMMENDATION_CF_WEIGHT = float(os.getenv("RECOMMENDATION_CF_WEIGHT", "0.3"))
+    # Number of most recently watched movies whose neighbours are considered
+    RECOMMENDATION_CF_SEEDS = int(os.getenv("RECOMMENDATION_CF_SEEDS", "20"))
+
+    # Kinopoisk CSV import: rows matched and inserted per transaction, upload size limit,
+    # and the minimum title similarity (0..1) of a fuzzy match
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+    IMPORT_MAX_FILE_SIZE = int(os.getenv("IMPORT_MAX_FILE_SIZE", str(20 * 1024 * 1024)))
+    IMPORT_TITLE_SIMILARITY = float(os.getenv("IMPORT_TITLE_SIMILARITY", "0.5"))
+
+    # Collection export: rows fetched per round trip of the server-side cursor
+    EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "1000"))
+
+    # Content-based similar movies: neighbour table built offline by src/tools/build-similar-movies.py
+    SIMILAR_MOVIES_PATH = os.getenv("SIMILAR_MOVIES_PATH", "data/similar_movies.npy")
+    SIMILAR_MOVIES_K = int(os.getenv("SIMILAR_MOVIES_K", "20"))
+
+settings = Settings()
@@ -1,9 +1,32 @@
 from elasticsearch import AsyncElasticsearch
-from fastapi import Depends
-
-async def get_es():
-    es = AsyncElasticsearch("http://elasticsearch:9200")
-    try:
-        yield es
-    finally:
-        await es.close()
+from app.core.config import settings
+
+# One client (and therefore one connection pool) per worker process.
+# Created in the app lifespan and shared by every request.
+es_client: AsyncElasticsearch | None = None
+
+def init_es() -> AsyncElasticsearch:
+    global es_client
+    if es_client is None:
+        es_client = AsyncElasticsearch(
+            settings.ELASTICSEARCH_URL,
+            connections_per_node=settings.ES_CONNECTIONS_PER_NODE,
+            request_timeout=settings.ES_REQUEST_TIMEOUT,
+            max_retries=settings.ES_MAX_RETRIES,
+            retry_on_timeout=settings.ES_RETRY_ON_TIMEOUT,
+            sniff_on_start=settings.ES_SNIFF,
+            sniff_on_node_failure=settings.ES_SNIFF,
+            sniff_timeout=settings.ES_SNIFF_TIMEOUT,
+            min_delay_between_sniffing=settings.ES_MIN_DELAY_BETWEEN_SNIFFING,
+        )
+    return es_client
+
+async def close_es():
+    global es_client
+    if es_client is not None:
+        await es_client.close()
+        es_client = None
+
+async def get_es() -> AsyncElasticsearch:
+    # Falls back to lazy creation when the lifespan did not run (e.g. in tests)
+    return init_es()
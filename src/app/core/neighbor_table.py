@@ -0,0 +1,101 @@
+import os
+import uuid
+from typing import Optional
+
+import numpy as np
+
+def neighbor_dtype(k: int) -> np.dtype:
+    """One row per movie: its id and the table rows of its k nearest neighbours with their scores."""
+    return np.dtype([("id", "S16"), ("neighbors", "<i4", (k,)), ("scores", "<f4", (k,))])
+
+def write_neighbor_table(path: str, ids: list[uuid.UUID], neighbors: np.ndarray, scores: np.ndarray) -> None:
+    """
+    Write a top-K neighbour table as a single .npy file, rows sorted by movie id.
+    neighbors holds row numbers into ids (-1 for empty slots). The file is replaced
+    atomically, so readers see either the old or the new table.
+    """
+    order = np.argsort(np.array([movie_id.bytes for movie_id in ids], dtype="S16"), kind="stable")
+    # Renumber neighbours to their rows after sorting
+    new_row = np.empty(len(ids), dtype=np.int32)
+    new_row[order] = np.arange(len(ids), dtype=np.int32)
+    neighbors = np.where(neighbors >= 0, new_row[np.maximum(neighbors, 0)], -1)
+
+    table = np.zeros(len(ids), dtype=neighbor_dtype(neighbors.shape[1]))
+    table["id"] = [ids[i].bytes for i in order]
+    table["neighbors"] = neighbors[order]
+    table["scores"] = scores[order]
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, table)
+    os.replace(tmp_path, path)
+
+class NeighborTable:
+    """
+    Read-only view of a neighbour table file. The file is memory-mapped, so every
+    worker process shares the same pages instead of holding its own copy.
+    """
+
+    def __init__(self, table: np.ndarray):
+        self.table = table
+
+    @classmethod
+    def load(cls, path: str) -> "NeighborTable":
+        return cls(np.load(path, mmap_mode="r"))
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def find_rows(self, movie_ids: list[uuid.UUID]) -> np.ndarray:
+        """Table rows of the given movies, -1 for movies that are not in the table."""
+        if not movie_ids or not len(self.table):
+            return np.full(len(movie_ids), -1, dtype=np.int64)
+        keys = np.array([movie_id.bytes for movie_id in movie_ids], dtype="S16")
+        ids = self.table["id"]
+        rows = np.minimum(np.searchsorted(ids, keys), len(ids) - 1)
+        return np.where(ids[rows] == keys, rows, -1)
+
+    def movie_id(self, row: int) -> uuid.UUID:
+        # S16 values come back without trailing zero bytes
+        return uuid.UUID(bytes=bytes(self.table["id"][row]).ljust(16, b"\0"))
+
+    def neighbors(self, movie_id: uuid.UUID, limit: Optional[int] = None) -> list[tuple[uuid.UUID, float]]:
+        """Nearest neighbours of a movie with their scores, best first."""
+        row = self.find_rows([movie_id])[0]
+        if row < 0:
+            return []
+        neighbors, scores = self.table["neighbors"][row], self.table["scores"][row]
+        return [
+            (self.movie_id(neighbor), float(score))
+            for neighbor, score in zip(neighbors[:limit], scores[:limit])
+            if neighbor >= 0
+        ]
+
+class NeighborTableFile:
+    """
+    Lazily loaded neighbour table that is reloaded when the file is replaced
+    by a new build. A missing file means the table has not been built yet.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._table: Optional[NeighborTable] = None
+        self._version: Optional[tuple[str, float]] = None
+
+    def version(self) -> Optional[tuple[str, float]]:
+        """Identity of the file currently on disk, None if there is none."""
+        try:
+            return self.path, os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def get(self) -> Optional[NeighborTable]:
+        version = self.version()
+        if version is None:
+            self._table = self._version = None
+            return None
+        if version != self._version:
+            self._table = NeighborTable.load(self.path)
+            self._version = version
+        return self._table
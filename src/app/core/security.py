@@ -9,10 +9,12 @@ from sqlalchemy.future import select
 from app.models.user import User
 from app.db import get_db
 import os
+import uuid
 
 SECRET_KEY = os.getenv("SECRET_KEY", "test_secret")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440*1440 # TODO: should we even set it to expire?
+GROUP_INVITE_EXPIRE_MINUTES = 1440
 
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
@@ -21,7 +23,8 @@ def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
 async def get_user_by_email(db: AsyncSession, email: str):
-    result = await db.execute(select(User).where(User.email == email))
+    # Reload an already loaded user: collection_version, which cache keys use, is bumped in SQL
+    result = await db.execute(select(User).where(User.email == email).execution_options(populate_existing=True))
     return result.scalars().first()
 
 async def authenticate_user(db: AsyncSession, email: str, password: str):
@@ -53,6 +56,23 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_group_invite(user_id: uuid.UUID) -> tuple[str, datetime]:
+    """
+    Signed token with which a user agrees to be part of group recommendations, shared with
+    the organizer. Has no subject, so it cannot be used to authenticate.
+    """
+    expire = datetime.now(timezone.utc) + timedelta(minutes=GROUP_INVITE_EXPIRE_MINUTES)
+    token = jwt.encode({"group_invite": str(user_id), "exp": expire}, SECRET_KEY, algorithm=ALGORITHM)
+    return token, expire
+
+def read_group_invite(token: str) -> uuid.UUID:
+    """Id of the user who issued a group invite; ValueError if it is invalid or expired."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        return uuid.UUID(payload["group_invite"])
+    except (JWTError, KeyError, ValueError, TypeError, AttributeError):
+        raise ValueError("Invalid or expired group invite")
+
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     db: AsyncSession = Depends(get_db)
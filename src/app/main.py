@@ -1,11 +1,17 @@
 from app.core.minio_client import minio_client
+from app.core.elasticsearch import init_es, close_es
+from app.services.job_service import job_registry
+from app.services.recommendation_service import run_catalog_refresh_loop
+from app.services.search_sync_service import run_search_sync_loop
 from app.core.config import settings
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 import logging
 from app.api.endpoints import images, movies, auth, collection, users
 from app.db import engine
-from app.models.movie import Base
+from app.models.movie import Base, SEARCH_VECTOR_SQL
+from sqlalchemy import text
+import asyncio
 import json
 
 logging.basicConfig(level=logging.INFO)
@@ -15,7 +21,17 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     await init_db()
     await init_minio()
+    es = init_es()
+    # Keep the index in sync only when Elasticsearch serves search at all
+    uses_es = "elasticsearch" in (settings.SEARCH_BACKEND, settings.SEARCH_FALLBACK_BACKEND)
+    sync_task = asyncio.create_task(run_search_sync_loop(es)) if settings.SEARCH_SYNC_ENABLED and uses_es else None
+    catalog_task = asyncio.create_task(run_catalog_refresh_loop())
     yield
+    catalog_task.cancel()
+    if sync_task:
+        sync_task.cancel()
+    await job_registry.shutdown()
+    await close_es()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -40,10 +56,30 @@ async def init_minio():
         }
         minio_client.set_bucket_policy(settings.MINIO_BUCKET_NAME, json.dumps(policy))
 
+# create_all only creates missing tables; columns and indexes added to existing tables go here
+SCHEMA_UPGRADES = [
+    "ALTER TABLE movies ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL",
+    "CREATE INDEX IF NOT EXISTS ix_movies_updated_at_id ON movies (updated_at, id)",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"ALTER TABLE movies ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_movies_search_vector ON movies USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_movies_title_trgm ON movies USING gin (title gin_trgm_ops)",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS collection_version INTEGER DEFAULT 0 NOT NULL",
+    "CREATE INDEX IF NOT EXISTS ix_user_movies_user_status_added_at_id ON user_movies (user_id, status, added_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_movies_title_lower ON movies (lower(title))",
+    "CREATE INDEX IF NOT EXISTS ix_movies_original_title_lower ON movies (lower(original_title))",
+    "ALTER TABLE user_movies ADD COLUMN IF NOT EXISTS change_version INTEGER DEFAULT 0 NOT NULL",
+    "CREATE INDEX IF NOT EXISTS ix_user_movies_user_change_version ON user_movies (user_id, change_version)",
+    "ALTER TABLE collection_deletions ADD COLUMN IF NOT EXISTS version INTEGER DEFAULT 0 NOT NULL",
+    "CREATE INDEX IF NOT EXISTS ix_collection_deletions_user_version ON collection_deletions (user_id, version)",
+]
+
 async def init_db():
     try:
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            for statement in SCHEMA_UPGRADES:
+                await conn.execute(text(statement))
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
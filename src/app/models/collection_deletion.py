@@ -0,0 +1,23 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.models.movie import Base
+
+class CollectionDeletion(Base):
+    """
+    Tombstone of a deleted collection entry, so that delta syncs can report deletions.
+    Tombstones older than the retention period are pruned when the user deletes again.
+    """
+    __tablename__ = "collection_deletions"
+
+    entry_id = Column(UUID(as_uuid=True), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    movie_id = Column(UUID(as_uuid=True), nullable=True)
+    custom_movie_id = Column(UUID(as_uuid=True), nullable=True)
+    # users.collection_version taken by the deletion
+    version = Column(Integer, server_default="0", nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('ix_collection_deletions_user_version', 'user_id', 'version'),
+    )
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, DateTime, Float, ForeignKey
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.sql import func
+from app.models.movie import Base
+
+class UserGenrePreference(Base):
+    """
+    Per-user genre score vector, kept up to date by collection changes.
+    scores[i] is the score of the genre GENRE_IDS[i].
+    """
+    __tablename__ = "user_genre_preferences"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    scores = Column(ARRAY(Float, zero_indexes=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
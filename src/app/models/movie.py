@@ -1,16 +1,30 @@
-from sqlalchemy import Column, String, Boolean, Float, Integer, ARRAY, Date, UniqueConstraint
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Boolean, Float, Integer, ARRAY, Computed, Date, DateTime, DDL, Index, UniqueConstraint, event
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
+from sqlalchemy.sql import func
 import uuid
 
 Base = declarative_base()
 
+# Trigram indexes and similarity() for fuzzy title search
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+# Full-text document for the Postgres search backend: title ranks above overview
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(overview, '')), 'B')"
+)
+
 
 class Movie(Base):
     __tablename__ = "movies"
     __table_args__ = (
         UniqueConstraint('tmdb_id', name='unique_tmdb_id'),
+        # Keyset scan for the incremental search sync
+        Index('ix_movies_updated_at_id', 'updated_at', 'id'),
+        Index('ix_movies_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('ix_movies_title_trgm', 'title', postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}),
     )
 
     id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
@@ -29,5 +43,12 @@ class Movie(Base):
     video = Column(Boolean, nullable=False)
     vote_average = Column(Float, nullable=False)
     vote_count = Column(Integer, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    # Maintained by Postgres; deferred so regular movie queries do not load it
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True)))
+
+    user_movies = relationship("UserMovie", back_populates="movie")
 
-    user_movies = relationship("UserMovie", back_populates="movie")
\ No newline at end of file
+# Case-insensitive exact title lookups when matching imported lists to the catalog
+Index('ix_movies_title_lower', func.lower(Movie.title))
+Index('ix_movies_original_title_lower', func.lower(Movie.original_title))
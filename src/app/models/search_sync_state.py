@@ -0,0 +1,11 @@
+from sqlalchemy import Column, DateTime, String
+from sqlalchemy.dialects.postgresql import UUID
+from app.models.movie import Base
+
+class SearchSyncState(Base):
+    """Checkpoint of the Postgres -> Elasticsearch sync: last synced (updated_at, id)."""
+    __tablename__ = "search_sync_state"
+
+    name = Column(String(50), primary_key=True)
+    last_updated_at = Column(DateTime(timezone=True), nullable=True)
+    last_id = Column(UUID(as_uuid=True), nullable=True)
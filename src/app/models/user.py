@@ -20,4 +20,6 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.now(timezone.utc))
     profile_picture = Column(String(255), nullable=True)
     jwt_token = Column(String(255), nullable=True)
-    is_admin = Column(Boolean, nullable=False, default=False)
\ No newline at end of file
+    is_admin = Column(Boolean, nullable=False, default=False)
+    # Bumped by every collection change; cached per-user results are keyed by it
+    collection_version = Column(Integer, nullable=False, default=0, server_default="0")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Enum, ForeignKey, Float, DateTime, UniqueConstraint, CheckConstraint
+from sqlalchemy import Column, Enum, ForeignKey, Float, DateTime, Index, Integer, UniqueConstraint, CheckConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -15,6 +15,8 @@ class UserMovie(Base):
     rating = Column(Float, nullable=True)
     added_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
+    # users.collection_version taken by the last write of the entry; delta syncs continue from it
+    change_version = Column(Integer, server_default="0", nullable=False)
 
     movie = relationship("Movie", back_populates="user_movies", lazy="selectin")
     custom_movie = relationship("CustomMovie", back_populates="user_movies", lazy="selectin")
@@ -23,4 +25,8 @@ class UserMovie(Base):
         UniqueConstraint('user_id', 'movie_id', name='unique_user_movie'),
         UniqueConstraint('user_id', 'custom_movie_id', name='unique_user_custom_movie'),
         CheckConstraint('(movie_id IS NOT NULL AND custom_movie_id IS NULL) OR (movie_id IS NULL AND custom_movie_id IS NOT NULL)', name='check_movie_xor_custom'),
-    )
\ No newline at end of file
+        # Keyset pagination of a collection, optionally by status
+        Index('ix_user_movies_user_status_added_at_id', 'user_id', 'status', 'added_at', 'id'),
+        # Delta sync: entries of a user written after a collection version
+        Index('ix_user_movies_user_change_version', 'user_id', 'change_version'),
+    )
@@ -1,7 +1,9 @@
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.custom_movie import CustomMovie
 import uuid
+from typing import Optional
 
 class CustomMovieRepository:
     def __init__(self, session: AsyncSession):
@@ -32,4 +34,29 @@ class CustomMovieRepository:
         result = await self.session.execute(
             select(CustomMovie).where(CustomMovie.id == custom_movie_id)
         )
-        return result.scalars().first()
\ No newline at end of file
+        return result.scalars().first()
+
+    async def get_or_create_many(
+        self,
+        user_id: uuid.UUID,
+        movies: list[tuple[str, Optional[str]]],
+    ) -> dict[str, uuid.UUID]:
+        """
+        Ids of the user's custom movies with the given (title, description), creating the
+        missing ones with a single INSERT ... ON CONFLICT ... RETURNING, in the caller's transaction.
+        Existing movies keep their description.
+        """
+        movies = dict(movies)  # one row per title: a statement cannot upsert the same row twice
+        if not movies:
+            return {}
+        statement = insert(CustomMovie).values([
+            {"id": uuid.uuid4(), "user_id": user_id, "title": title, "description": description}
+            for title, description in movies.items()
+        ])
+        # The no-op update makes RETURNING include the movies that already exist
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id", "title"],
+            set_={"title": statement.excluded.title},
+        ).returning(CustomMovie.title, CustomMovie.id)
+        result = await self.session.execute(statement)
+        return dict(result.all())
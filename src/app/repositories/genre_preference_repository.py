@@ -0,0 +1,126 @@
+import uuid
+from typing import Optional
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.genre_preference import UserGenrePreference
+from app.models.movie import Movie
+from app.models.user_movie import UserMovie
+from app.schemas.enums import MovieStatus
+from app.schemas.movie import GENRE_IDS
+
+GENRE_INDEX = {genre_id: i for i, genre_id in enumerate(GENRE_IDS)}
+
+# Score of an unrated collection entry, added to every genre of its movie
+DEFAULT_STATUS_RATINGS = {
+    MovieStatus.WATCHED: 7.0,    # Positive preference
+    MovieStatus.WILL_WATCH: 5.0, # Neutral preference
+    MovieStatus.DROPPED: 3.0,    # Negative preference
+}
+
+def collection_score(status: str, rating: Optional[float]) -> float:
+    """Contribution of a collection entry to the scores of its movie's genres."""
+    return rating if rating is not None else DEFAULT_STATUS_RATINGS[MovieStatus(status)]
+
+class GenrePreferenceRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_scores(self, user_id: uuid.UUID) -> dict[int, float]:
+        """
+        Non-zero genre scores of the user. The vector is built from the collection
+        the first time it is requested and maintained by apply_delta afterwards.
+        A vector built here is stored in the caller's transaction, which the caller commits.
+        """
+        scores = await self.session.scalar(
+            select(UserGenrePreference.scores).where(UserGenrePreference.user_id == user_id)
+        )
+        if scores is None:
+            scores = await self.rebuild(user_id, overwrite=False)
+        return {genre_id: score for genre_id, score in zip(GENRE_IDS, scores) if score}
+
+    async def get_scores_for_users(self, user_ids: list[uuid.UUID]) -> dict[uuid.UUID, list[float]]:
+        """
+        Full genre score vectors (ordered as GENRE_IDS) of several users, read with one query.
+        Vectors of users who have none yet are computed from their collections without being
+        stored: this read does not write rows of other users.
+        """
+        result = await self.session.execute(
+            select(UserGenrePreference.user_id, UserGenrePreference.scores)
+            .where(UserGenrePreference.user_id.in_(user_ids))
+        )
+        vectors = dict(result.all())
+        for user_id in user_ids:
+            if user_id not in vectors:
+                vectors[user_id] = await self.compute_scores(user_id)
+        # Vectors stored before a genre was added are shorter or hold NULLs for it
+        return {
+            user_id: [score or 0.0 for score in scores] + [0.0] * (len(GENRE_IDS) - len(scores))
+            for user_id, scores in vectors.items()
+        }
+
+    async def apply_delta(self, user_id: uuid.UUID, genre_ids: list[int], delta: float) -> None:
+        """
+        Add delta to the scores of the given genres, in the caller's transaction.
+        The update is done in SQL, so concurrent changes of the same collection do not lose deltas.
+        """
+        await self.apply_deltas(user_id, {genre_id: delta for genre_id in genre_ids})
+
+    async def apply_deltas(self, user_id: uuid.UUID, deltas: dict[int, float]) -> None:
+        """Add a delta per genre with a single UPDATE, in the caller's transaction."""
+        deltas = {
+            GENRE_INDEX[genre_id]: delta for genre_id, delta in deltas.items()
+            if genre_id in GENRE_INDEX and delta
+        }
+        if not deltas:
+            return
+        scores = UserGenrePreference.scores
+        result = await self.session.execute(
+            update(UserGenrePreference)
+            .where(UserGenrePreference.user_id == user_id)
+            .values({scores[i]: func.coalesce(scores[i], 0.0) + delta for i, delta in sorted(deltas.items())})
+        )
+        if result.rowcount == 0:
+            # No vector yet: build it from the collection, which already includes this change
+            await self.rebuild(user_id)
+
+    async def compute_scores(self, user_id: uuid.UUID) -> list[float]:
+        """The vector of the user's whole collection (ordered as GENRE_IDS), with one aggregate query."""
+        entries = (
+            select(
+                UserMovie.status,
+                UserMovie.rating,
+                func.unnest(Movie.genre_ids).label("genre_id"),
+            )
+            .join(Movie, Movie.id == UserMovie.movie_id)
+            .where(UserMovie.user_id == user_id)
+            .subquery()
+        )
+        default_rating = case(*[
+            (entries.c.status == status.value, rating)
+            for status, rating in DEFAULT_STATUS_RATINGS.items()
+        ])
+        result = await self.session.execute(
+            select(entries.c.genre_id, func.sum(func.coalesce(entries.c.rating, default_rating)))
+            .group_by(entries.c.genre_id)
+        )
+        totals = dict(result.all())
+        return [float(totals.get(genre_id, 0.0)) for genre_id in GENRE_IDS]
+
+    async def rebuild(self, user_id: uuid.UUID, overwrite: bool = True) -> list[float]:
+        """
+        Recompute the vector from the whole collection and store it.
+        Without overwrite, a vector stored concurrently by another transaction is kept.
+        """
+        scores = await self.compute_scores(user_id)
+        statement = insert(UserGenrePreference).values(user_id=user_id, scores=scores)
+        if overwrite:
+            statement = statement.on_conflict_do_update(
+                index_elements=["user_id"],
+                set_={"scores": statement.excluded.scores, "updated_at": func.now()},
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=["user_id"])
+        await self.session.execute(statement)
+        return scores
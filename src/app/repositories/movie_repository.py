@@ -1,11 +1,24 @@
-from typing import Any, Coroutine, Sequence
+from typing import Any, AsyncIterator, Coroutine, Optional, Sequence
 
-from sqlalchemy import func
+from sqlalchemy import (
+    ColumnElement, Float, Integer, String, Values, and_, case, cast, column, extract, func, literal_column, or_, true,
+    tuple_, values,
+)
+from sqlalchemy.dialects.postgresql import array
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.models.movie import Movie
+from app.schemas.enums import BrowseSort
 import uuid
 
+# Must match the text search configuration of Movie.search_vector
+SEARCH_CONFIG = literal_column("'russian'::regconfig")
+
+BROWSE_SORT_COLUMNS = {
+    BrowseSort.RATING: [Movie.vote_average, Movie.vote_count],
+    BrowseSort.POPULARITY: [Movie.popularity],
+}
+
 class MovieRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -44,4 +57,228 @@ class MovieRepository:
         Fetch all movies from the database.
         """
         result = await self.session.execute(select(Movie))
-        return result.scalars().all()
\ No newline at end of file
+        return result.scalars().all()
+
+    async def stream_all_movies(self, batch_size: int = 1000) -> AsyncIterator[Movie]:
+        """
+        Stream all movies through a server-side cursor, fetching batch_size rows at a time.
+        """
+        result = await self.session.stream(
+            select(Movie).execution_options(yield_per=batch_size)
+        )
+        async for movie in result.scalars():
+            yield movie
+
+    async def stream_catalog_rows(self, batch_size: int = 10000) -> AsyncIterator[Any]:
+        """
+        Stream the columns used to rank recommendations, without loading Movie objects.
+        """
+        result = await self.session.stream(
+            select(Movie.id, Movie.genre_ids, Movie.vote_average, Movie.vote_count, Movie.popularity)
+            .execution_options(yield_per=batch_size)
+        )
+        async for row in result:
+            yield row
+
+    async def stream_movie_texts(self, batch_size: int = 10000) -> AsyncIterator[Any]:
+        """Stream (id, overview, genre_ids) of every movie for offline text models."""
+        result = await self.session.stream(
+            select(Movie.id, Movie.overview, Movie.genre_ids).execution_options(yield_per=batch_size)
+        )
+        async for row in result:
+            yield row
+
+    async def search_movies(
+        self,
+        title: str,
+        genre_ids: list[int],
+        min_rating: Optional[float],
+        limit: int,
+        after: Optional[tuple[float, uuid.UUID]] = None,
+    ) -> list[tuple[Movie, float]]:
+        """
+        Full-text search over the search_vector GIN index, with trigram similarity
+        on the title for typos. Returns (movie, score) ordered by score, then id.
+        """
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, title)
+        score = cast(func.ts_rank(Movie.search_vector, query) + func.similarity(Movie.title, title), Float)
+        statement = (
+            select(Movie, score)
+            .where(
+                or_(Movie.search_vector.op("@@")(query), Movie.title.op("%", is_comparison=True)(title)),
+                *self._filter_clauses(genre_ids, min_rating),
+            )
+            .order_by(score.desc(), Movie.id)
+            .limit(limit)
+        )
+        if after:
+            after_score, after_id = after
+            statement = statement.where(or_(score < after_score, and_(score == after_score, Movie.id > after_id)))
+        result = await self.session.execute(statement)
+        return [(movie, score) for movie, score in result.all()]
+
+    async def browse_movies(
+        self,
+        genre_ids: list[int],
+        min_rating: Optional[float],
+        sort: BrowseSort,
+        limit: int,
+        after: Optional[list] = None,
+    ) -> list[Movie]:
+        """
+        Filter-only listing ordered by the sort columns (descending), then id.
+        after holds the sort values and id of the last movie of the previous page.
+        """
+        columns = BROWSE_SORT_COLUMNS[sort]
+        statement = (
+            select(Movie)
+            .where(*self._filter_clauses(genre_ids, min_rating))
+            .order_by(*(column.desc() for column in columns), Movie.id)
+            .limit(limit)
+        )
+        if after:
+            *values, after_id = after
+            statement = statement.where(or_(
+                tuple_(*columns) < tuple_(*values),
+                and_(tuple_(*columns) == tuple_(*values), Movie.id > after_id),
+            ))
+        result = await self.session.execute(statement)
+        return result.scalars().all()
+
+    async def get_facet_counts(
+        self,
+        genre_ids: list[int],
+        min_rating: Optional[float],
+        rating_buckets: list[tuple[str, Optional[float], Optional[float]]],
+    ) -> dict[str, list[tuple[Any, int]]]:
+        """
+        Movie counts per genre id, release decade and rating bucket for the given filters.
+        rating_buckets are (key, from inclusive, to exclusive) ranges.
+        """
+        filters = self._filter_clauses(genre_ids, min_rating)
+
+        genres = select(func.unnest(Movie.genre_ids).label("genre_id")).where(*filters).subquery()
+        genre_counts = await self.session.execute(
+            select(genres.c.genre_id, func.count()).group_by(genres.c.genre_id).order_by(func.count().desc())
+        )
+
+        decade = cast(func.extract("year", Movie.release_date), Integer) // 10 * 10
+        decade_counts = await self.session.execute(
+            select(decade, func.count())
+            .where(Movie.release_date.isnot(None), *filters)
+            .group_by(decade)
+            .order_by(decade)
+        )
+
+        bucket = case(*[
+            (and_(
+                Movie.vote_average >= low if low is not None else True,
+                Movie.vote_average < high if high is not None else True,
+            ), key)
+            for key, low, high in rating_buckets
+        ])
+        rating_counts = dict((await self.session.execute(
+            select(bucket, func.count()).where(*filters).group_by(bucket)
+        )).all())
+
+        return {
+            "genres": genre_counts.all(),
+            "decades": decade_counts.all(),
+            "ratings": [(key, rating_counts[key]) for key, _, _ in rating_buckets if key in rating_counts],
+        }
+
+    async def suggest_titles(self, prefix: str, limit: int) -> Sequence[Any]:
+        """Most popular movies whose title starts with prefix (case-insensitive, trigram index)."""
+        pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        result = await self.session.execute(
+            select(Movie.id, Movie.title, Movie.release_date, Movie.poster_path)
+            .where(Movie.title.ilike(pattern, escape="\\"))
+            .order_by(Movie.popularity.desc(), Movie.id)
+            .limit(limit)
+        )
+        return result.all()
+
+    async def match_by_tmdb_ids(self, tmdb_ids: list[int]) -> dict[int, uuid.UUID]:
+        if not tmdb_ids:
+            return {}
+        result = await self.session.execute(select(Movie.tmdb_id, Movie.id).where(Movie.tmdb_id.in_(tmdb_ids)))
+        return dict(result.all())
+
+    async def match_by_titles(
+        self,
+        rows: list[tuple[int, str, Optional[str], Optional[int]]],
+    ) -> dict[int, uuid.UUID]:
+        """
+        Match (key, title, original_title, year) rows to movies with the same title or original
+        title (case-insensitive), released within a year of the given one. The most voted movie
+        wins. Returns key -> movie id for the matched rows, with one query for all rows.
+        """
+        if not rows:
+            return {}
+        wanted = self._wanted_titles(rows)
+        same_title = or_(
+            func.lower(Movie.title) == func.lower(wanted.c.title),
+            func.lower(Movie.original_title) == func.lower(wanted.c.original_title),
+        )
+        result = await self.session.execute(
+            select(wanted.c.key, Movie.id)
+            .join(Movie, and_(same_title, self._released_near(wanted.c.year)))
+            .distinct(wanted.c.key)
+            .order_by(wanted.c.key, Movie.vote_count.desc())
+        )
+        return dict(result.all())
+
+    async def match_by_similar_titles(
+        self,
+        rows: list[tuple[int, str, Optional[str], Optional[int]]],
+        min_similarity: float,
+    ) -> dict[int, uuid.UUID]:
+        """
+        Fuzzy version of match_by_titles: the movie with the most similar title (trigram index),
+        if the similarity reaches min_similarity. One query with a lateral lookup per row.
+        """
+        if not rows:
+            return {}
+        wanted = self._wanted_titles(rows)
+        similarity = func.similarity(Movie.title, wanted.c.title)
+        candidate = (
+            select(Movie.id)
+            .where(
+                Movie.title.op("%")(wanted.c.title),
+                similarity >= min_similarity,
+                self._released_near(wanted.c.year),
+            )
+            .order_by(similarity.desc(), Movie.vote_count.desc())
+            .limit(1)
+            .lateral("candidate")
+        )
+        result = await self.session.execute(
+            select(wanted.c.key, candidate.c.id).select_from(wanted.join(candidate, true()))
+        )
+        return dict(result.all())
+
+    @staticmethod
+    def _wanted_titles(rows: list[tuple[int, str, Optional[str], Optional[int]]]) -> Values:
+        return values(
+            column("key", Integer),
+            column("title", String),
+            column("original_title", String),
+            column("year", Integer),
+            name="wanted",
+        ).data(rows)
+
+    @staticmethod
+    def _released_near(year: ColumnElement) -> ColumnElement:
+        """Release year within one of the given year (festival and local release years differ); any year if unknown."""
+        # VALUES columns holding only NULLs are typed text
+        year = cast(year, Integer)
+        return or_(year.is_(None), func.abs(extract("year", Movie.release_date) - year) <= 1)
+
+    @staticmethod
+    def _filter_clauses(genre_ids: list[int], min_rating: Optional[float]) -> list:
+        clauses = []
+        if genre_ids:
+            clauses.append(Movie.genre_ids.op("&&")(array(genre_ids)))
+        if min_rating is not None:
+            clauses.append(Movie.vote_average >= min_rating)
+        return clauses
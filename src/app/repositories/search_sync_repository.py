@@ -0,0 +1,67 @@
+from datetime import datetime
+from typing import Sequence
+import uuid
+
+from sqlalchemy import literal, select, tuple_, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.movie import Movie
+from app.models.search_sync_state import SearchSyncState
+
+class SearchSyncRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def lock_state(self, name: str) -> SearchSyncState | None:
+        """
+        Lock the sync checkpoint for the current transaction.
+        Returns None when another worker holds the lock, so only one worker syncs at a time.
+        """
+        await self.session.execute(
+            insert(SearchSyncState).values(name=name).on_conflict_do_nothing(index_elements=["name"])
+        )
+        result = await self.session.execute(
+            select(SearchSyncState)
+            .where(SearchSyncState.name == name)
+            .with_for_update(skip_locked=True)
+        )
+        return result.scalars().first()
+
+    async def get_changed_movies(
+        self,
+        state: SearchSyncState,
+        limit: int,
+        lag_seconds: float = 0,
+    ) -> Sequence[Movie]:
+        """
+        Movies changed after the checkpoint, in (updated_at, id) order.
+        Rows newer than lag_seconds are left for the next run so that
+        transactions still committing are not skipped.
+        """
+        query = select(Movie).where(
+            Movie.updated_at <= func.now() - func.make_interval(0, 0, 0, 0, 0, 0, lag_seconds)
+        )
+        if state.last_updated_at is not None:
+            query = query.where(
+                tuple_(Movie.updated_at, Movie.id) > tuple_(
+                    literal(state.last_updated_at, Movie.updated_at.type),
+                    literal(state.last_id, Movie.id.type),
+                )
+            )
+        result = await self.session.execute(
+            query.order_by(Movie.updated_at, Movie.id).limit(limit)
+        )
+        return result.scalars().all()
+
+    async def rewind(self, name: str, updated_at: datetime) -> None:
+        """Move the checkpoint back to updated_at (if it is ahead), so changes after it are synced again."""
+        await self.session.execute(
+            insert(SearchSyncState)
+            .values(name=name, last_updated_at=updated_at, last_id=uuid.UUID(int=0))
+            .on_conflict_do_update(
+                index_elements=["name"],
+                set_={"last_updated_at": updated_at, "last_id": uuid.UUID(int=0)},
+                where=(SearchSyncState.last_updated_at.is_(None)) | (SearchSyncState.last_updated_at > updated_at),
+            )
+        )
+        await self.session.commit()
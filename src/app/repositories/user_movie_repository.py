@@ -1,17 +1,78 @@
 import uuid
-from datetime import datetime, timezone
-from typing import List, Optional, Tuple
+from collections import defaultdict
+from typing import Any, AsyncIterator, Iterator, List, Optional
 
-from sqlalchemy import or_, select, and_, func
+from sqlalchemy import (
+    CTE, ColumnElement, Row, Select, and_, cast, column, delete, exists, func, literal, literal_column, or_,
+    select, tuple_, update, values,
+)
+from sqlalchemy.dialects.postgresql import array, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models.collection_deletion import CollectionDeletion
+from app.models.custom_movie import CustomMovie
+from app.models.movie import Movie
+from app.models.user import User
 from app.models.user_movie import UserMovie
-from app.schemas.enums import MovieStatus
+from app.repositories.genre_preference_repository import GenrePreferenceRepository, collection_score
+from app.schemas.enums import BulkOperation, CollectionSort, MovieStatus
+
+
+def collection_sort_column(sort: CollectionSort) -> tuple[ColumnElement, bool]:
+    """Sort expression of a collection listing and whether it is descending."""
+    if sort == CollectionSort.RATING:
+        # Unrated entries last
+        return func.coalesce(UserMovie.rating, -1.0), True
+    if sort == CollectionSort.TITLE:
+        return func.coalesce(Movie.title, CustomMovie.title), False
+    return UserMovie.added_at, True
+
+# Fields of CollectionMovieResponse for both movie kinds; genre_ids are turned into names by the caller
+COLLECTION_ITEM_COLUMNS = [
+    func.coalesce(Movie.id, CustomMovie.id).label("id"),
+    Movie.tmdb_id,
+    Movie.adult,
+    Movie.backdrop_path,
+    Movie.original_language,
+    Movie.original_title,
+    func.coalesce(Movie.overview, CustomMovie.description).label("overview"),
+    Movie.popularity,
+    func.coalesce(Movie.poster_path, CustomMovie.poster_path).label("poster_path"),
+    Movie.release_date,
+    func.coalesce(Movie.title, CustomMovie.title).label("title"),
+    Movie.video,
+    Movie.vote_average,
+    Movie.vote_count,
+    Movie.genre_ids,
+    UserMovie.status,
+    UserMovie.added_at,
+    UserMovie.rating,
+]
+
+# Flat export of a collection entry with the identifying columns of its movie
+EXPORT_COLUMNS = [
+    UserMovie.id,
+    UserMovie.movie_id,
+    UserMovie.custom_movie_id,
+    Movie.tmdb_id,
+    func.coalesce(Movie.title, CustomMovie.title).label("title"),
+    Movie.original_title,
+    Movie.release_date,
+    Movie.genre_ids,
+    UserMovie.status,
+    UserMovie.rating,
+    UserMovie.added_at,
+    UserMovie.updated_at,
+]
+
+# Tombstones of deleted entries are kept this long; older delta sync cursors need a full reload
+TOMBSTONE_RETENTION_DAYS = 30
 
 
 class UserMovieRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
+        self.genre_preference_repo = GenrePreferenceRepository(session)
 
     async def add_to_collection(
         self,
@@ -20,138 +81,401 @@ class UserMovieRepository:
         custom_movie_id: uuid.UUID = None,
         status: MovieStatus = MovieStatus.WILL_WATCH,
         rating: float = None
-    ) -> UserMovie:
+    ) -> Row:
         """
-        Add a movie or custom movie to the user's collection.
+        Add a movie or one of the user's custom movies to the collection with a single
+        INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING, joined to the movie columns.
         """
-        if not (movie_id or custom_movie_id):
+        if movie_id:
+            source, source_filter = Movie, Movie.id == movie_id
+        elif custom_movie_id:
+            source, source_filter = CustomMovie, and_(CustomMovie.id == custom_movie_id, CustomMovie.user_id == user_id)
+        else:
             raise ValueError("Either movie_id or custom_movie_id must be provided")
-        
-        # Check for existing entry using proper NULL handling
-        existing_query = select(UserMovie).where(
-            and_(
-                UserMovie.user_id == user_id,
-                or_(
-                    and_(UserMovie.movie_id == movie_id, movie_id is not None),
-                    and_(UserMovie.custom_movie_id == custom_movie_id, custom_movie_id is not None)
-                )
+
+        version = await self._next_version(user_id)
+        columns = UserMovie.__table__.c
+        entry = select(
+            literal(uuid.uuid4(), columns.id.type),
+            literal(user_id, columns.user_id.type),
+            source.id,
+            literal(MovieStatus(status).value, columns.status.type),
+            literal(rating, columns.rating.type),
+            literal(version, columns.change_version.type),
+        ).where(source_filter)
+        changed = (
+            insert(UserMovie)
+            .from_select(
+                ["id", "user_id", "movie_id" if movie_id else "custom_movie_id", "status", "rating", "change_version"],
+                entry,
             )
+            .on_conflict_do_nothing()
+            .returning(*columns)
+            .cte("changed")
         )
-
-        existing = await self.session.execute(existing_query)
-        first = existing.scalars().first()
-        if first:
+        row = (await self.session.execute(self._select_entries(changed))).first()
+        if row is None:
+            # Nothing inserted: find out why, only on this error path
+            if not await self.session.scalar(select(exists().where(source_filter))):
+                raise LookupError("Movie not found" if movie_id else "Custom movie not found")
             raise ValueError("Movie already in collection")
 
-        user_movie = UserMovie(
-            user_id=user_id,
-            movie_id=movie_id,
-            custom_movie_id=custom_movie_id,
-            status=status,
-            rating=rating
-        )
-        self.session.add(user_movie)
-        
-        try:
-            await self.session.commit()
-        except Exception as e:
-            await self.session.rollback()
-            if "unique_user_movie" in str(e).lower() or "unique_user_custom_movie" in str(e).lower():
-                raise ValueError("Movie already in collection")
-            raise
-        
-        await self.session.refresh(user_movie)
-        return user_movie
+        await self.genre_preference_repo.apply_delta(user_id, row.genre_ids or [], collection_score(status, rating))
+        await self.session.commit()
+        return row
 
     async def update_status(
         self,
         user_id: uuid.UUID,
-        user_movie_id: uuid.UUID,
+        movie_identifier: uuid.UUID,
         status: MovieStatus,
-    ) -> UserMovie:
+    ) -> Row:
         """
-        Update the status and rating of a movie in the user's collection.
+        Update the status of a movie in the user's collection with a single UPDATE ... RETURNING,
+        joined to the movie columns. The previous status comes back from the locked row,
+        so the genre preference delta is exact under concurrent updates.
         """
-        result = await self.session.execute(
-            select(UserMovie).where(
-                and_(
-                    UserMovie.user_id == user_id,
-                    UserMovie.id == user_movie_id
-                )
-            )
+        version = await self._next_version(user_id)
+        old = (
+            select(UserMovie.id, UserMovie.status.label("old_status"))
+            .where(self._identifier_filter(user_id, movie_identifier))
+            .with_for_update()
+            .subquery("old")
         )
-        user_movie = result.scalars().first()
-        if not user_movie:
-            raise ValueError("Movie not found in collection")
+        changed = (
+            update(UserMovie)
+            .where(UserMovie.id == old.c.id)
+            .values(status=MovieStatus(status).value, updated_at=func.now(), change_version=version)
+            .returning(*UserMovie.__table__.c, old.c.old_status)
+            .cte("changed")
+        )
+        row = (await self.session.execute(self._select_entries(changed, changed.c.old_status))).first()
+        if row is None:
+            raise LookupError("Movie not found in collection")
 
-        user_movie.status = status
-        user_movie.updated_at = datetime.now(timezone.utc)
+        delta = collection_score(status, row.rating) - collection_score(row.old_status, row.rating)
+        await self.genre_preference_repo.apply_delta(user_id, row.genre_ids or [], delta)
         await self.session.commit()
-        await self.session.refresh(user_movie)
-        return user_movie
+        return row
+
+    async def apply_bulk(
+        self,
+        user_id: uuid.UUID,
+        operations: list[tuple[BulkOperation, uuid.UUID, Optional[MovieStatus]]],
+    ) -> list[Optional[str]]:
+        """
+        Apply (operation, movie identifier, status) changes in order, in one transaction.
+        Consecutive operations of the same kind run as one multi-row statement; a run is
+        split when it touches a movie twice, so the outcome is the same as applying them
+        one by one. Returns the error of every operation, None for the ones that succeeded.
+        """
+        errors: list[Optional[str]] = [None] * len(operations)
+        deltas: dict[int, float] = defaultdict(float)
+        version = await self._next_version(user_id)
+        for run in self._bulk_runs(operations):
+            kind = run[0][1]
+            if kind == BulkOperation.ADD:
+                await self._bulk_add(user_id, version, run, errors, deltas)
+            elif kind == BulkOperation.STATUS:
+                await self._bulk_update_status(user_id, version, run, errors, deltas)
+            else:
+                await self._bulk_delete(user_id, version, run, errors, deltas)
+        await self.genre_preference_repo.apply_deltas(user_id, deltas)
+        await self.session.commit()
+        return errors
 
-    async def get_collection_paginated(
+    async def import_entries(
         self,
         user_id: uuid.UUID,
-        page: int,
-        page_size: int
-    ) -> Tuple[List[UserMovie], int]:
+        entries: list[tuple[Optional[uuid.UUID], Optional[uuid.UUID], MovieStatus, Optional[float]]],
+    ) -> int:
         """
-        Retrieve a paginated list of movies in the user's collection (will_watch + watched + dropped).
+        Insert (movie_id, custom_movie_id, status, rating) entries with one multi-row
+        INSERT ... ON CONFLICT DO NOTHING and commit. Movies already in the collection
+        keep their entry. Returns the number of entries added.
         """
-        offset = (page - 1) * page_size
+        if not entries:
+            await self.session.commit()
+            return 0
+        version = await self._next_version(user_id)
+        rows = values(
+            column("movie_id", UserMovie.movie_id.type),
+            column("custom_movie_id", UserMovie.custom_movie_id.type),
+            column("status", UserMovie.status.type),
+            column("rating", UserMovie.rating.type),
+            name="rows",
+        ).data([
+            (movie_id, custom_movie_id, MovieStatus(status).value, rating)
+            for movie_id, custom_movie_id, status, rating in entries
+        ])
+        changed = (
+            insert(UserMovie)
+            .from_select(
+                ["id", "user_id", "movie_id", "custom_movie_id", "status", "rating", "change_version"],
+                select(
+                    func.gen_random_uuid(),
+                    literal(user_id, UserMovie.user_id.type),
+                    # VALUES columns holding only NULLs are typed text
+                    cast(rows.c.movie_id, UserMovie.movie_id.type),
+                    cast(rows.c.custom_movie_id, UserMovie.custom_movie_id.type),
+                    rows.c.status,
+                    cast(rows.c.rating, UserMovie.rating.type),
+                    literal(version, UserMovie.change_version.type),
+                ),
+            )
+            .on_conflict_do_nothing()
+            .returning(*UserMovie.__table__.c)
+            .cte("changed")
+        )
+        result = await self.session.execute(self._select_entries(changed))
+        deltas: dict[int, float] = defaultdict(float)
+        added = 0
+        for row in result.all():
+            self._add_deltas(deltas, row.genre_ids, collection_score(row.status, row.rating))
+            added += 1
+        await self.genre_preference_repo.apply_deltas(user_id, deltas)
+        await self.session.commit()
+        return added
+
+    @staticmethod
+    def _bulk_runs(operations: list[tuple]) -> Iterator[list[tuple]]:
+        """Group operations into runs of (index, kind, identifier, status) of one kind and distinct movies."""
+        run, seen = [], set()
+        for index, (kind, identifier, status) in enumerate(operations):
+            if run and (kind != run[0][1] or identifier in seen):
+                yield run
+                run, seen = [], set()
+            run.append((index, kind, identifier, status))
+            seen.add(identifier)
+        if run:
+            yield run
+
+    async def _bulk_add(self, user_id: uuid.UUID, version: int, run: list[tuple], errors: list, deltas: dict) -> None:
+        entries = values(
+            column("movie_id", UserMovie.movie_id.type),
+            column("status", UserMovie.status.type),
+            name="entries",
+        ).data([(identifier, MovieStatus(status or MovieStatus.WILL_WATCH).value) for _, _, identifier, status in run])
+        changed = (
+            insert(UserMovie)
+            .from_select(
+                ["id", "user_id", "movie_id", "status", "change_version"],
+                select(
+                    func.gen_random_uuid(),
+                    literal(user_id, UserMovie.user_id.type),
+                    Movie.id,
+                    entries.c.status,
+                    literal(version, UserMovie.change_version.type),
+                )
+                .join(entries, entries.c.movie_id == Movie.id),
+            )
+            .on_conflict_do_nothing()
+            .returning(*UserMovie.__table__.c)
+            .cte("changed")
+        )
+        result = await self.session.execute(self._select_entries(changed))
+        added = {row.movie_id: row for row in result.all()}
+
+        missing = [identifier for _, _, identifier, _ in run if identifier not in added]
+        existing = set()
+        if missing:
+            existing = set((await self.session.execute(select(Movie.id).where(Movie.id.in_(missing)))).scalars())
+        for index, _, identifier, _ in run:
+            row = added.get(identifier)
+            if row is None:
+                errors[index] = "Movie already in collection" if identifier in existing else "Movie not found"
+            else:
+                self._add_deltas(deltas, row.genre_ids, collection_score(row.status, row.rating))
+
+    async def _bulk_update_status(
+        self, user_id: uuid.UUID, version: int, run: list[tuple], errors: list, deltas: dict
+    ) -> None:
+        changes = values(
+            column("identifier", UserMovie.id.type),
+            column("status", UserMovie.status.type),
+            name="changes",
+        ).data([(identifier, MovieStatus(status).value) for _, _, identifier, status in run])
+        old = (
+            select(
+                UserMovie.id,
+                UserMovie.status.label("old_status"),
+                changes.c.identifier,
+                changes.c.status.label("new_status"),
+            )
+            .join(changes, self._identifier_filter(user_id, changes.c.identifier))
+            .with_for_update(of=UserMovie)
+            .subquery("old")
+        )
+        changed = (
+            update(UserMovie)
+            .where(UserMovie.id == old.c.id)
+            .values(status=old.c.new_status, updated_at=func.now(), change_version=version)
+            .returning(*UserMovie.__table__.c, old.c.old_status, old.c.identifier)
+            .cte("changed")
+        )
         result = await self.session.execute(
-            select(UserMovie)
-            .where(UserMovie.user_id == user_id)
-            .offset(offset)
-            .limit(page_size)
+            self._select_entries(changed, changed.c.old_status, changed.c.identifier)
         )
-        movies = result.scalars().all()
+        updated = {row.identifier: row for row in result.all()}
+        for index, _, identifier, _ in run:
+            row = updated.get(identifier)
+            if row is None:
+                errors[index] = "Movie not found in collection"
+            else:
+                delta = collection_score(row.status, row.rating) - collection_score(row.old_status, row.rating)
+                self._add_deltas(deltas, row.genre_ids, delta)
 
-        total = await self.session.execute(
-            select(func.count(UserMovie.id))
-            .where(UserMovie.user_id == user_id)
+    async def _bulk_delete(self, user_id: uuid.UUID, version: int, run: list[tuple], errors: list, deltas: dict) -> None:
+        targets = values(
+            column("identifier", UserMovie.id.type),
+            name="targets",
+        ).data([(identifier,) for _, _, identifier, _ in run])
+        changed = (
+            delete(UserMovie)
+            .where(self._identifier_filter(user_id, targets.c.identifier))
+            .returning(*UserMovie.__table__.c, targets.c.identifier)
+            .cte("changed")
         )
-        total_count = total.scalar()
+        statement = (
+            self._select_entries(changed, changed.c.identifier)
+            .add_cte(*self._record_deletions(user_id, version, changed))
+        )
+        result = await self.session.execute(statement)
+        deleted = {row.identifier: row for row in result.all()}
+        for index, _, identifier, _ in run:
+            row = deleted.get(identifier)
+            if row is None:
+                errors[index] = "Movie not found in collection"
+            else:
+                self._add_deltas(deltas, row.genre_ids, -collection_score(row.status, row.rating))
 
-        return movies, total_count
+    @staticmethod
+    def _add_deltas(deltas: dict[int, float], genre_ids: Optional[list[int]], delta: float) -> None:
+        for genre_id in genre_ids or []:
+            deltas[genre_id] += delta
 
-    async def get_movies_by_status(
-        self,
-        user_id: uuid.UUID,
-        status: MovieStatus,
-        page: int,
-        page_size: int
-    ) -> Tuple[List[UserMovie], int]:
+    @staticmethod
+    def _identifier_filter(user_id: uuid.UUID, movie_identifier: uuid.UUID):
+        """Entry of the user matched by its own id, its movie id or its custom movie id."""
+        return and_(
+            UserMovie.user_id == user_id,
+            or_(
+                UserMovie.id == movie_identifier,
+                UserMovie.movie_id == movie_identifier,
+                UserMovie.custom_movie_id == movie_identifier,
+            ),
+        )
+
+    @staticmethod
+    def _record_deletions(user_id: uuid.UUID, version: int, changed: CTE) -> tuple[CTE, CTE]:
         """
-        Retrieve a paginated list of movies in the user's collection by status.
+        CTEs that write a tombstone of the given version for every entry deleted by the
+        changed CTE and prune the user's tombstones older than TOMBSTONE_RETENTION_DAYS.
         """
-        offset = (page - 1) * page_size
-        result = await self.session.execute(
-            select(UserMovie)
+        tombstones = (
+            insert(CollectionDeletion)
+            .from_select(
+                ["entry_id", "user_id", "movie_id", "custom_movie_id", "version"],
+                select(
+                    changed.c.id,
+                    changed.c.user_id,
+                    changed.c.movie_id,
+                    changed.c.custom_movie_id,
+                    literal(version, CollectionDeletion.version.type),
+                ),
+            )
+            .cte("tombstones")
+        )
+        prune = (
+            delete(CollectionDeletion)
             .where(
-                and_(
-                    UserMovie.user_id == user_id,
-                    UserMovie.status == status
-                )
+                CollectionDeletion.user_id == user_id,
+                CollectionDeletion.deleted_at < func.now() - func.make_interval(0, 0, 0, TOMBSTONE_RETENTION_DAYS),
             )
-            .offset(offset)
-            .limit(page_size)
+            .cte("prune")
         )
-        movies = result.scalars().all()
+        return tombstones, prune
 
-        total = await self.session.execute(
-            select(func.count(UserMovie.id))
-            .where(
-                and_(
-                    UserMovie.user_id == user_id,
-                    UserMovie.status == status
-                )
+    async def _next_version(self, user_id: uuid.UUID) -> int:
+        """
+        Bump the user's collection version and return it, as the first statement of every
+        collection write. The UPDATE holds the user row lock until commit, so the writes of
+        a collection take their versions in commit order: once a version is visible, every
+        lower one is committed. Locks are always taken in the same order, user row first.
+        """
+        return await self.session.scalar(
+            update(User)
+            .where(User.id == user_id)
+            .values(collection_version=User.collection_version + 1)
+            .returning(User.collection_version)
+        )
+
+    @staticmethod
+    def _select_entries(changed: CTE, *extra_columns) -> Select:
+        """
+        Select the rows returned by a data-modifying CTE with the response columns
+        of their movie or custom movie.
+        """
+        return (
+            select(
+                changed.c.id,
+                changed.c.movie_id,
+                changed.c.custom_movie_id,
+                changed.c.status,
+                changed.c.rating,
+                changed.c.added_at,
+                changed.c.updated_at,
+                func.coalesce(Movie.title, CustomMovie.title).label("title"),
+                func.coalesce(Movie.overview, CustomMovie.description).label("description"),
+                func.coalesce(Movie.poster_path, CustomMovie.poster_path).label("poster_path"),
+                Movie.backdrop_path,
+                Movie.release_date,
+                Movie.genre_ids,
+                *extra_columns,
             )
+            .select_from(changed)
+            .outerjoin(Movie, Movie.id == changed.c.movie_id)
+            .outerjoin(CustomMovie, CustomMovie.id == changed.c.custom_movie_id)
         )
-        total_count = total.scalar()
 
-        return movies, total_count
+    async def get_collection_page(
+        self,
+        user_id: uuid.UUID,
+        status: Optional[MovieStatus],
+        genre_ids: list[int],
+        sort: CollectionSort,
+        limit: int,
+        after: Optional[tuple[Any, uuid.UUID]] = None,
+    ) -> list[Row]:
+        """
+        One page of the collection with one LEFT JOIN query, as rows of COLLECTION_ITEM_COLUMNS
+        plus entry_id and sort_value, ordered by the sort column, then entry id. after holds
+        the sort value and entry id of the last row of the previous page.
+        Filtering by genres leaves out custom movies, which have none.
+        """
+        value, descending = collection_sort_column(sort)
+        statement = (
+            select(*COLLECTION_ITEM_COLUMNS, UserMovie.id.label("entry_id"), value.label("sort_value"))
+            .outerjoin(Movie, Movie.id == UserMovie.movie_id)
+            .outerjoin(CustomMovie, CustomMovie.id == UserMovie.custom_movie_id)
+            .where(UserMovie.user_id == user_id)
+            .limit(limit)
+        )
+        if status:
+            statement = statement.where(UserMovie.status == status)
+        if genre_ids:
+            statement = statement.where(Movie.genre_ids.op("&&")(array(genre_ids)))
+        if descending:
+            statement = statement.order_by(value.desc(), UserMovie.id.desc())
+        else:
+            statement = statement.order_by(value, UserMovie.id)
+        if after:
+            after_value, after_id = after
+            keyset = tuple_(value, UserMovie.id)
+            last = tuple_(literal(after_value, value.type), literal(after_id, UserMovie.id.type))
+            statement = statement.where(keyset < last if descending else keyset > last)
+        result = await self.session.execute(statement)
+        return result.all()
 
     async def get_movie_details(
         self,
@@ -178,25 +502,24 @@ class UserMovieRepository:
     async def delete_from_collection(
         self,
         user_id: uuid.UUID,
-        user_movie_id: uuid.UUID
+        movie_identifier: uuid.UUID
     ) -> None:
         """
-        Remove a movie from the user's collection.
+        Remove a movie from the user's collection with a single DELETE ... RETURNING.
         """
-        result = await self.session.execute(
-            select(UserMovie)
-            .where(
-                and_(
-                    UserMovie.user_id == user_id,
-                    UserMovie.id == user_movie_id
-                )
-            )
+        version = await self._next_version(user_id)
+        changed = (
+            delete(UserMovie)
+            .where(self._identifier_filter(user_id, movie_identifier))
+            .returning(*UserMovie.__table__.c)
+            .cte("changed")
         )
-        user_movie = result.scalars().first()
-        if not user_movie:
-            raise ValueError("Movie not found in collection")
+        statement = self._select_entries(changed).add_cte(*self._record_deletions(user_id, version, changed))
+        row = (await self.session.execute(statement)).first()
+        if row is None:
+            raise LookupError("Movie not found in collection")
 
-        await self.session.delete(user_movie)
+        await self.genre_preference_repo.apply_delta(user_id, row.genre_ids or [], -collection_score(row.status, row.rating))
         await self.session.commit()
     
     async def get_statuses_for_movies(self, user_id: uuid.UUID, movie_ids: list[uuid.UUID]) -> dict[uuid.UUID, str]:
@@ -222,6 +545,161 @@ class UserMovieRepository:
         result = await self.session.execute(query)
         return result.scalars().all()
     
+    async def get_changes(
+        self,
+        user_id: uuid.UUID,
+        since: Optional[int],
+    ) -> tuple[int, list[Row], list[Row]]:
+        """
+        Collection changes with a version in (since, until], where until is the user's
+        current collection version: every version up to it is committed (see _next_version),
+        so a write is never skipped however long its transaction ran. Returns until, the
+        entries added or updated as rows of COLLECTION_ITEM_COLUMNS, and the (id, deleted_at)
+        tombstones of deleted entries. Without since, every entry is returned.
+        """
+        until = await self.session.scalar(select(User.collection_version).where(User.id == user_id))
+        statement = (
+            select(*COLLECTION_ITEM_COLUMNS)
+            .outerjoin(Movie, Movie.id == UserMovie.movie_id)
+            .outerjoin(CustomMovie, CustomMovie.id == UserMovie.custom_movie_id)
+            .where(UserMovie.user_id == user_id, UserMovie.change_version <= until)
+            .order_by(UserMovie.change_version, UserMovie.id)
+        )
+        if since is None:
+            return until, (await self.session.execute(statement)).all(), []
+
+        changed = await self.session.execute(statement.where(UserMovie.change_version > since))
+        deleted = await self.session.execute(
+            select(
+                func.coalesce(CollectionDeletion.movie_id, CollectionDeletion.custom_movie_id).label("id"),
+                CollectionDeletion.deleted_at,
+            )
+            .where(
+                CollectionDeletion.user_id == user_id,
+                CollectionDeletion.version > since,
+                CollectionDeletion.version <= until,
+            )
+            .order_by(CollectionDeletion.version)
+        )
+        return until, changed.all(), deleted.all()
+
+    async def get_collection_stats(self, user_id: uuid.UUID) -> tuple[Row, list[Row], list[Row]]:
+        """
+        Aggregates of the collection, each computed by one query: a row of entry counts
+        (total and per status) with the rating count and average, (genre_id, count) rows
+        of catalog movies, and (month, count) rows of additions.
+        """
+        totals = (await self.session.execute(
+            select(
+                func.count().label("total"),
+                *[func.count().filter(UserMovie.status == status.value).label(status.value) for status in MovieStatus],
+                func.count(UserMovie.rating).label("rated"),
+                func.avg(UserMovie.rating).label("average_rating"),
+            )
+            .where(UserMovie.user_id == user_id)
+        )).one()
+
+        genre_ids = (
+            select(func.unnest(Movie.genre_ids).label("genre_id"))
+            .join(UserMovie, UserMovie.movie_id == Movie.id)
+            .where(UserMovie.user_id == user_id)
+            .subquery()
+        )
+        genres = await self.session.execute(
+            select(genre_ids.c.genre_id, func.count())
+            .group_by(genre_ids.c.genre_id)
+            .order_by(func.count().desc(), genre_ids.c.genre_id)
+        )
+
+        # A literal unit, so that the grouped and selected expressions are the same
+        month = func.date_trunc(literal_column("'month'"), UserMovie.added_at)
+        months = await self.session.execute(
+            select(month, func.count())
+            .where(UserMovie.user_id == user_id)
+            .group_by(month)
+            .order_by(month)
+        )
+        return totals, genres.all(), months.all()
+
+    async def get_collection_movie_ids(self, user_id: uuid.UUID) -> list[uuid.UUID]:
+        """Ids of all catalog movies in the user's collection, whatever their status."""
+        result = await self.session.execute(
+            select(UserMovie.movie_id).where(UserMovie.user_id == user_id, UserMovie.movie_id.isnot(None))
+        )
+        return result.scalars().all()
+
+    async def get_movie_ids_with_status(self, user_ids: list[uuid.UUID], status: MovieStatus) -> list[uuid.UUID]:
+        """Catalog movies that any of the users has in the collection with the given status."""
+        result = await self.session.execute(
+            select(UserMovie.movie_id)
+            .where(
+                UserMovie.user_id.in_(user_ids),
+                UserMovie.status == status,
+                UserMovie.movie_id.isnot(None),
+            )
+            .distinct()
+        )
+        return result.scalars().all()
+
+    async def get_recent_movie_ids(
+        self,
+        user_id: uuid.UUID,
+        status: MovieStatus,
+        limit: int,
+    ) -> list[uuid.UUID]:
+        """Catalog movies with the given status, most recently added or updated first."""
+        result = await self.session.execute(
+            select(UserMovie.movie_id)
+            .where(
+                UserMovie.user_id == user_id,
+                UserMovie.status == status,
+                UserMovie.movie_id.isnot(None),
+            )
+            .order_by(func.coalesce(UserMovie.updated_at, UserMovie.added_at).desc())
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    async def stream_interactions(self, batch_size: int = 10000) -> AsyncIterator[Any]:
+        """
+        Stream (user_id, movie_id, status, rating) of every catalog movie in every collection
+        through a server-side cursor, for offline model builds.
+        """
+        result = await self.session.stream(
+            select(UserMovie.user_id, UserMovie.movie_id, UserMovie.status, UserMovie.rating)
+            .where(UserMovie.movie_id.isnot(None))
+            .execution_options(yield_per=batch_size)
+        )
+        async for row in result:
+            yield row
+
+    async def stream_export_rows(
+        self,
+        user_id: Optional[uuid.UUID] = None,
+        status: Optional[MovieStatus] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Row]:
+        """
+        Stream EXPORT_COLUMNS rows of the user's collection, oldest first, or of every
+        collection (with user_id, in no particular order) when no user is given.
+        Rows are fetched through a server-side cursor, batch_size at a time.
+        """
+        statement = (
+            select(*EXPORT_COLUMNS)
+            .outerjoin(Movie, Movie.id == UserMovie.movie_id)
+            .outerjoin(CustomMovie, CustomMovie.id == UserMovie.custom_movie_id)
+            .execution_options(yield_per=batch_size)
+        )
+        if user_id is not None:
+            statement = statement.where(UserMovie.user_id == user_id).order_by(UserMovie.added_at, UserMovie.id)
+        else:
+            statement = statement.add_columns(UserMovie.user_id)
+        if status:
+            statement = statement.where(UserMovie.status == status)
+        result = await self.session.stream(statement)
+        async for row in result:
+            yield row
+
     async def get_by_user_and_movie_identifier(
         self,
         user_id: uuid.UUID,
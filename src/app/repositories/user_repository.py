@@ -1,3 +1,5 @@
+import uuid
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.models.user import User
@@ -27,6 +29,10 @@ class UserRepository:
 
         return result.scalars().first()
 
+    async def get_existing_ids(self, user_ids: list[uuid.UUID]) -> set[uuid.UUID]:
+        result = await self.session.execute(select(User.id).where(User.id.in_(user_ids)))
+        return set(result.scalars().all())
+
     async def update_user(self, user: User) -> User:
         await self.session.commit()
         await self.session.refresh(user)
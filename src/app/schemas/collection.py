@@ -1,8 +1,8 @@
-from app.schemas.enums import MovieStatus
+from app.schemas.enums import BulkOperation, MovieStatus
 from app.schemas.movie import MovieResponse
 from pydantic import BaseModel, UUID4, Field, model_validator
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 
 class AddToCollectionRequest(BaseModel):
@@ -23,4 +23,38 @@ class AddToCollectionRequest(BaseModel):
 
 class CollectionMovieResponse(MovieResponse):
     added_at: datetime
-    rating: Optional[float] = None
\ No newline at end of file
+    rating: Optional[float] = None
+
+class CollectionTombstone(BaseModel):
+    # Movie.id or CustomMovie.id of the removed entry
+    id: UUID4
+    deleted_at: datetime
+
+class CollectionChangesResponse(BaseModel):
+    # Apply deleted before changed: a movie removed and added again is in both
+    deleted: List[CollectionTombstone]
+    changed: List[CollectionMovieResponse]
+    # since of the next sync
+    cursor: str
+
+class BulkCollectionOperation(BaseModel):
+    op: BulkOperation
+    # add: a TMDB movie id; status and delete: Movie.id, CustomMovie.id or the collection entry id
+    movie_id: UUID4
+    # Status to add with (will_watch by default) or to set
+    status: Optional[MovieStatus] = None
+
+    @model_validator(mode='after')
+    def check_status(self):
+        if self.op == BulkOperation.STATUS and not self.status:
+            raise ValueError("status is required for status operations")
+        return self
+
+class BulkCollectionRequest(BaseModel):
+    operations: List[BulkCollectionOperation] = Field(..., min_length=1, max_length=1000)
+
+class BulkOperationResult(BaseModel):
+    op: BulkOperation
+    movie_id: UUID4
+    ok: bool
+    error: Optional[str] = None
@@ -3,4 +3,38 @@ from enum import Enum
 class MovieStatus(str, Enum):
     WILL_WATCH = "will_watch"
     WATCHED = "watched"
-    DROPPED = "dropped"
\ No newline at end of file
+    DROPPED = "dropped"
+
+class BrowseSort(str, Enum):
+    RATING = "rating"
+    POPULARITY = "popularity"
+
+class BulkOperation(str, Enum):
+    ADD = "add"
+    STATUS = "status"
+    DELETE = "delete"
+
+class CollectionSort(str, Enum):
+    # Newest first
+    ADDED_AT = "added_at"
+    # Highest rated first
+    RATING = "rating"
+    # Alphabetical
+    TITLE = "title"
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    # One JSON object per line
+    NDJSON = "ndjson"
+
+class GroupStrategy(str, Enum):
+    # Mean of the members' scores
+    AVERAGE = "average"
+    # Score of the least satisfied member
+    LEAST_MISERY = "least_misery"
+
+class JobState(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import Any, Optional
+from app.schemas.enums import JobState
+from pydantic import BaseModel, UUID4
+
+class JobResponse(BaseModel):
+    id: UUID4
+    kind: str
+    state: JobState
+    processed: int
+    failed: int
+    errors: list[str]
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    throughput: float  # processed items per second
+    result: dict[str, Any]
+
+    class Config:
+        from_attributes = True
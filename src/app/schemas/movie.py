@@ -1,7 +1,7 @@
 from datetime import date
 from typing import List, Optional
-from app.schemas.enums import MovieStatus
-from pydantic import BaseModel, UUID4
+from app.schemas.enums import GroupStrategy, MovieStatus
+from pydantic import BaseModel, Field, UUID4
 
 genre_mapping = {
     28: "боевик",
@@ -27,9 +27,17 @@ genre_mapping = {
 
 genre_names = list(genre_mapping.values())
 
+genre_ids_by_name = {name: gid for gid, name in genre_mapping.items()}
+
+# Positions of genres in stored preference vectors: only ever append new genres
+GENRE_IDS = list(genre_mapping)
+
 def get_genre_names(genre_ids: list[int]) -> list[str]:
     return [genre_mapping[gid] for gid in genre_ids if gid in genre_mapping]
 
+def get_genre_ids(names: list[str]) -> list[int]:
+    return [genre_ids_by_name[name] for name in names if name in genre_ids_by_name]
+
 class MovieBase(BaseModel):
     tmdb_id: int
     adult: bool
@@ -79,6 +87,35 @@ class MovieResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class FacetBucket(BaseModel):
+    value: str
+    count: int
+
+class MovieFacets(BaseModel):
+    genres: List[FacetBucket]
+    decades: List[FacetBucket]
+    ratings: List[FacetBucket]
+
+class MovieBrowseResponse(BaseModel):
+    items: List[MovieResponse]
+    next_cursor: Optional[str] = None
+    facets: Optional[MovieFacets] = None
+
+class MovieSuggestion(BaseModel):
+    id: UUID4
+    title: str
+    release_date: Optional[date] = None
+    poster_path: Optional[str] = None
+
+class BecauseYouWatchedResponse(BaseModel):
+    movie: MovieResponse
+    recommendations: List[MovieResponse]
+
+class GroupRecommendationRequest(BaseModel):
+    # Group invites of the other members (POST /api/user/me/group-invite); the current user is always included
+    member_invites: List[str] = Field(..., min_length=1, max_length=50)
+    strategy: GroupStrategy = GroupStrategy.LEAST_MISERY
+
 class MetadataResponse(BaseModel):
     title: Optional[str]
     overview: Optional[str]
@@ -1,5 +1,5 @@
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
 from pydantic import BaseModel, EmailStr
@@ -21,6 +21,27 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+class MonthlyAdditions(BaseModel):
+    # First day of the month
+    month: date
+    count: int
+
+class UserStats(BaseModel):
+    total: int
+    # Number of movies per status, every status included
+    by_status: dict[str, int]
+    # Number of catalog movies per genre name, most frequent first
+    genres: dict[str, int]
+    rated: int
+    average_rating: Optional[float] = None
+    # Months without additions are left out
+    added_per_month: list[MonthlyAdditions]
+
+class GroupInvite(BaseModel):
+    # Given to the organizer of a group recommendation
+    token: str
+    expires_at: datetime
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
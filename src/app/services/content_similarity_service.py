@@ -0,0 +1,119 @@
+import logging
+import re
+import uuid
+import zlib
+from array import array
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.neighbor_table import write_neighbor_table
+from app.repositories.genre_preference_repository import GENRE_INDEX
+from app.repositories.movie_repository import MovieRepository
+from app.schemas.movie import GENRE_IDS
+
+logger = logging.getLogger(__name__)
+
+# Hashed vocabulary size: no vocabulary to build or store, collisions are rare at this size
+HASH_FEATURES = 2 ** 18
+# Words in more than this share of overviews carry no signal
+MAX_DOCUMENT_FREQUENCY = 0.5
+# Weight of the genre vector relative to the overview text vector
+GENRE_WEIGHT = 0.5
+# Rows of the similarity matrix computed at once (each block is block x movies float32)
+MAX_BLOCK_CELLS = 25_000_000
+
+TOKEN_PATTERN = re.compile(r"\w{3,}")
+
+def hash_tokens(text: str) -> list[int]:
+    """Feature columns of the words of a text (crc32 is stable across processes, unlike hash())."""
+    return [zlib.crc32(token.encode()) % HASH_FEATURES for token in TOKEN_PATTERN.findall(text.lower())]
+
+def l2_normalize(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    return sparse.diags(np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)) @ matrix
+
+def tfidf(counts: sparse.csr_matrix) -> sparse.csr_matrix:
+    """Sublinear tf * smoothed idf of a (documents x features) count matrix, rows L2-normalized."""
+    documents = counts.shape[0]
+    document_frequency = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log((1 + documents) / (1 + document_frequency)) + 1
+    idf[document_frequency > MAX_DOCUMENT_FREQUENCY * documents] = 0
+
+    weights = counts.copy().astype(np.float32)
+    weights.data = (1 + np.log(weights.data)) * idf[weights.indices]
+    weights.eliminate_zeros()
+    return l2_normalize(weights)
+
+def movie_vectors(overviews: list[str], genre_ids: list[list[int]]) -> sparse.csr_matrix:
+    """Concatenated overview TF-IDF and weighted genre one-hot vectors, rows L2-normalized."""
+    rows, cols = array("i"), array("i")
+    for row, overview in enumerate(overviews):
+        features = hash_tokens(overview or "")
+        rows.extend([row] * len(features))
+        cols.extend(features)
+    counts = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (np.frombuffer(rows, dtype=np.int32), np.frombuffer(cols, dtype=np.int32))),
+        shape=(len(overviews), HASH_FEATURES),
+    )
+    counts.sum_duplicates()
+
+    genre_rows = [i for i, genres in enumerate(genre_ids) for genre_id in genres if genre_id in GENRE_INDEX]
+    genre_cols = [GENRE_INDEX[genre_id] for genres in genre_ids for genre_id in genres if genre_id in GENRE_INDEX]
+    genres = sparse.csr_matrix(
+        (np.ones(len(genre_rows), dtype=np.float32), (genre_rows, genre_cols)),
+        shape=(len(genre_ids), len(GENRE_IDS)),
+    )
+    return l2_normalize(sparse.hstack([tfidf(counts), GENRE_WEIGHT * l2_normalize(genres)], format="csr"))
+
+def nearest_neighbors(vectors: sparse.csr_matrix, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k cosine neighbours of every row, computed in row blocks so memory stays bounded.
+    Returns (neighbors, scores) of shape (rows, k); empty slots are -1 / 0.
+    """
+    n = vectors.shape[0]
+    k = min(k, max(n - 1, 0))
+    neighbors = np.full((n, k), -1, dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+    if not k:
+        return neighbors, scores
+
+    transposed = vectors.T.tocsc()
+    block_size = max(MAX_BLOCK_CELLS // n, 1)
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+        similarity = (vectors[start:end] @ transposed).toarray()
+        # A movie is not similar to itself
+        similarity[np.arange(end - start), np.arange(start, end)] = -np.inf
+
+        top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(similarity, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        found = top_scores > 0
+        neighbors[start:end] = np.where(found, top, -1)
+        scores[start:end] = np.where(found, top_scores, 0)
+    return neighbors, scores
+
+async def build_similar_movies(
+    session: AsyncSession,
+    k: int,
+    batch_size: int = 10000,
+) -> tuple[list[uuid.UUID], np.ndarray, np.ndarray]:
+    ids, overviews, genre_ids = [], [], []
+    async for row in MovieRepository(session).stream_movie_texts(batch_size):
+        ids.append(row.id)
+        overviews.append(row.overview)
+        genre_ids.append(row.genre_ids)
+    logger.info(f"Vectorizing {len(ids)} movies")
+    neighbors, scores = nearest_neighbors(movie_vectors(overviews, genre_ids), k)
+    return ids, neighbors, scores
+
+async def run_similar_movies_build(session: AsyncSession, path: str | None = None, k: int | None = None) -> int:
+    """Build the similar movies table and publish it for the API workers. Returns the number of movies."""
+    ids, neighbors, scores = await build_similar_movies(session, k or settings.SIMILAR_MOVIES_K)
+    write_neighbor_table(path or settings.SIMILAR_MOVIES_PATH, ids, neighbors, scores)
+    return len(ids)
@@ -0,0 +1,245 @@
+import asyncio
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Optional
+from elasticsearch import ApiError, AsyncElasticsearch, NotFoundError, TransportError
+from app.core.config import settings
+from app.schemas.enums import BrowseSort
+from app.schemas.movie import genre_mapping
+from app.services.movie_index_service import MOVIES_ALIAS
+from app.services.search_service import RATING_BUCKETS, SearchBackend, SearchBackendUnavailable
+
+# Extended by every page request; an abandoned point-in-time expires soon after
+PIT_KEEP_ALIVE = "30s"
+
+BROWSE_SORTS = {
+    BrowseSort.RATING: [{"vote_average": "desc"}, {"vote_count": "desc"}],
+    BrowseSort.POPULARITY: [{"popularity": "desc"}],
+}
+
+FACET_AGGREGATIONS = {
+    "genres": {"terms": {"field": "genres", "size": len(genre_mapping)}},
+    "decades": {"histogram": {"field": "release_year", "interval": 10, "min_doc_count": 1}},
+    "ratings": {"range": {"field": "vote_average", "ranges": [
+        {"key": key, **({"from": low} if low is not None else {}), **({"to": high} if high is not None else {})}
+        for key, low, high in RATING_BUCKETS
+    ]}},
+}
+
+# Last health check result per client: (checked at, healthy)
+_health: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+# Held by the request that is pinging a client
+_health_locks: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+class ElasticsearchSearchBackend(SearchBackend):
+    name = "elasticsearch"
+
+    def __init__(self, es: AsyncElasticsearch):
+        self.es = es
+
+    async def is_healthy(self) -> bool:
+        """
+        Ping the cluster at most once per SEARCH_HEALTHCHECK_INTERVAL per worker, with a short
+        timeout and no retries, so a hung node is detected in about SEARCH_HEALTHCHECK_TIMEOUT.
+        Requests arriving while a ping is in flight use the previous result instead of pinging too.
+        """
+        checked_at, healthy = _health.get(self.es, (None, True))
+        if checked_at is not None and time.monotonic() - checked_at < settings.SEARCH_HEALTHCHECK_INTERVAL:
+            return healthy
+        lock = _health_locks.setdefault(self.es, asyncio.Lock())
+        if lock.locked():
+            return healthy
+        async with lock:
+            try:
+                es = self.es.options(request_timeout=settings.SEARCH_HEALTHCHECK_TIMEOUT, max_retries=0)
+                healthy = bool(await es.ping())
+            except Exception:
+                healthy = False
+            _health[self.es] = (time.monotonic(), healthy)
+        return healthy
+
+    async def search(
+        self,
+        title: str,
+        genres: list[str],
+        min_rating: Optional[float],
+        page_size: int,
+        cursor: Optional[str],
+    ) -> tuple[list[dict], Optional[str]]:
+        search_body = {
+            "query": {
+                "bool": {
+                    "must": [
+                        {
+                            "multi_match": {
+                                "query": title,
+                                "fields": ["title", "overview", "genres"],
+                                "fuzziness": "AUTO"
+                            }
+                        }
+                    ],
+                    "filter": self._filter_clauses(genres, min_rating)
+                }
+            },
+            # The unique id tiebreaker keeps the order stable across pages
+            "sort": [{"_score": "desc"}, {"id": "asc"}],
+        }
+        movies, next_cursor, _ = await self._search_page(search_body, page_size, cursor)
+        return movies, next_cursor
+
+    async def browse(
+        self,
+        genres: list[str],
+        min_rating: Optional[float],
+        sort: BrowseSort,
+        page_size: int,
+        cursor: Optional[str],
+        with_facets: bool,
+    ) -> tuple[list[dict], Optional[str], Optional[dict]]:
+        """
+        Filter context only (no scoring, cacheable filters); facets are computed
+        as aggregations in the same request.
+        """
+        search_body = {
+            "query": {"bool": {"filter": self._filter_clauses(genres, min_rating)}},
+            "sort": [*BROWSE_SORTS[sort], {"id": "asc"}],
+            "track_total_hits": False,
+        }
+        if with_facets:
+            search_body["aggs"] = FACET_AGGREGATIONS
+
+        movies, next_cursor, aggregations = await self._search_page(search_body, page_size, cursor)
+        facets = self._parse_facets(aggregations) if aggregations else None
+        return movies, next_cursor, facets
+
+    async def suggest(self, prefix: str, limit: int) -> list[dict]:
+        """
+        Served by the in-memory completion suggester on title / original title.
+        """
+        with self._unavailable_on_errors():
+            response = await self.es.search(index=MOVIES_ALIAS, body={
+                "size": 0,
+                "_source": ["id", "title", "release_date", "poster_path"],
+                "suggest": {
+                    "titles": {
+                        "prefix": prefix,
+                        "completion": {"field": "title_suggest", "size": limit},
+                    }
+                },
+            })
+        options = response["suggest"]["titles"][0]["options"]
+        return [{"id": option["_id"], **option["_source"]} for option in options]
+
+    @staticmethod
+    def _filter_clauses(genres: list[str], min_rating: Optional[float]) -> list[dict]:
+        filter_clauses = []
+        if genres:
+            filter_clauses.append({"terms": {"genres": genres}})
+        if min_rating is not None:
+            filter_clauses.append({"range": {"vote_average": {"gte": min_rating}}})
+        return filter_clauses
+
+    @staticmethod
+    def _parse_facets(aggregations: dict) -> dict:
+        return {
+            "genres": [
+                {"value": bucket["key"], "count": bucket["doc_count"]}
+                for bucket in aggregations["genres"]["buckets"]
+            ],
+            "decades": [
+                {"value": str(int(bucket["key"])), "count": bucket["doc_count"]}
+                for bucket in aggregations["decades"]["buckets"]
+            ],
+            "ratings": [
+                {"value": bucket["key"], "count": bucket["doc_count"]}
+                for bucket in aggregations["ratings"]["buckets"]
+            ],
+        }
+
+    async def _search_page(
+        self,
+        search_body: dict,
+        page_size: int,
+        cursor: Optional[str],
+    ) -> tuple[list[dict], Optional[str], dict]:
+        """
+        Fetch one page with search_after, so every page costs the same as the first one.
+        The first page opens a point-in-time and every following page reads the same snapshot;
+        it is closed right away when there is a single page, and on the last page otherwise.
+        First pages are cached with their cursor, so everybody paging the same query within
+        the cache TTL shares one point-in-time: open ones are bounded by the distinct queries
+        searched within PIT_KEEP_ALIVE, not by the users paging them.
+        Returns (movies, next cursor, aggregations).
+        """
+        with self._unavailable_on_errors():
+            if cursor:
+                state = self.decode_cursor(cursor)
+                pit_id, after = state.get("pit"), state["after"]
+            else:
+                pit = await self.es.open_point_in_time(index=MOVIES_ALIAS, keep_alive=PIT_KEEP_ALIVE)
+                pit_id, after = pit["id"], None
+
+            # Fetch one extra hit to know whether there is a next page
+            search_body = {**search_body, "size": page_size + 1}
+            response = None
+            if pit_id:
+                try:
+                    response = await self.es.search(body={
+                        **self._with_search_after(search_body, after, pit=True),
+                        "pit": {"id": pit_id, "keep_alive": PIT_KEEP_ALIVE},
+                    })
+                    pit_id = response.get("pit_id", pit_id)
+                except NotFoundError:
+                    # The point-in-time expired (or the last page of a shared cursor closed it);
+                    # continue on the live index with the same sort
+                    pit_id = None
+            if response is None:
+                response = await self.es.search(index=MOVIES_ALIAS, body=self._with_search_after(search_body, after))
+
+            hits = response["hits"]["hits"]
+            movies = [{"id": hit["_id"], **hit["_source"]} for hit in hits[:page_size]]
+            aggregations = response.get("aggregations", {})
+
+            if len(hits) <= page_size:
+                if pit_id:
+                    await self._close_pit(pit_id)
+                next_cursor = None
+            else:
+                # A cached cursor may outlive its point-in-time; paging then continues on the live index
+                next_cursor = self.encode_cursor({"pit": pit_id, "after": hits[page_size - 1]["sort"]})
+
+        return movies, next_cursor, aggregations
+
+    @staticmethod
+    def _with_search_after(search_body: dict, after: Optional[list], pit: bool = False) -> dict:
+        """
+        Add search_after to a search body. Point-in-time searches also sort by _shard_doc,
+        so cursor sort values are padded or cut to the sort they continue; the unique id
+        before it already fixes the order, whatever the _shard_doc value.
+        """
+        sort = search_body["sort"] + ([{"_shard_doc": "asc"}] if pit else [])
+        body = {**search_body, "sort": sort}
+        if after is not None:
+            body["search_after"] = (after + [0] * len(sort))[:len(sort)]
+        return body
+
+    async def _close_pit(self, pit_id: str) -> None:
+        try:
+            await self.es.close_point_in_time(id=pit_id)
+        except NotFoundError:
+            pass
+
+    @contextmanager
+    def _unavailable_on_errors(self):
+        """
+        Translate connection failures, server errors and a missing index into SearchBackendUnavailable
+        and mark the cluster unhealthy until the next health check.
+        """
+        try:
+            yield
+        except (TransportError, ApiError) as e:
+            if isinstance(e, ApiError) and e.meta.status not in (404, 429) and e.meta.status < 500:
+                raise
+            _health[self.es] = (time.monotonic(), False)
+            raise SearchBackendUnavailable(str(e)) from e
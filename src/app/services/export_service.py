@@ -0,0 +1,72 @@
+import csv
+import io
+import uuid
+from typing import AsyncIterator, Optional
+
+from pydantic_core import to_json
+
+from app.core.config import settings
+from app.db import async_session
+from app.repositories.user_movie_repository import UserMovieRepository
+from app.schemas.enums import ExportFormat, MovieStatus
+from app.schemas.movie import get_genre_names
+
+EXPORT_FIELDS = [
+    "id", "movie_id", "custom_movie_id", "tmdb_id", "title", "original_title",
+    "release_date", "genres", "status", "rating", "added_at", "updated_at",
+]
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+# Rows encoded into one chunk of the response body
+CHUNK_ROWS = 500
+
+def export_record(row) -> dict:
+    record = row._asdict()
+    record["genres"] = get_genre_names(record.pop("genre_ids") or [])
+    return record
+
+def _csv_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ", ".join(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+async def stream_collection_export(
+    format: ExportFormat,
+    user_id: Optional[uuid.UUID] = None,
+    status: Optional[MovieStatus] = None,
+    session_factory=async_session,
+) -> AsyncIterator[bytes]:
+    """
+    Encode a collection (or every collection when no user is given) as CSV or NDJSON
+    chunks while its rows are read from a server-side cursor, so memory use does not
+    depend on the collection size. The session lives as long as the response body.
+    """
+    fields = EXPORT_FIELDS if user_id is not None else ["user_id", *EXPORT_FIELDS]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if format == ExportFormat.CSV:
+        writer.writerow(fields)
+
+    async with session_factory() as session:
+        rows = UserMovieRepository(session).stream_export_rows(user_id, status, settings.EXPORT_FETCH_SIZE)
+        chunk, count = [], 0
+        async for row in rows:
+            record = export_record(row)
+            if format == ExportFormat.CSV:
+                writer.writerow([_csv_value(record[field]) for field in fields])
+            else:
+                chunk.append(to_json({field: record[field] for field in fields}))
+                chunk.append(b"\n")
+            count += 1
+            if count == CHUNK_ROWS:
+                yield buffer.getvalue().encode() + b"".join(chunk)
+                buffer.seek(0)
+                buffer.truncate()
+                chunk, count = [], 0
+        yield buffer.getvalue().encode() + b"".join(chunk)
@@ -0,0 +1,195 @@
+import csv
+import logging
+import os
+import re
+import uuid
+from dataclasses import dataclass
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+from app.core.config import settings
+from app.db import async_session
+from app.repositories.custom_movie_repository import CustomMovieRepository
+from app.repositories.movie_repository import MovieRepository
+from app.repositories.user_movie_repository import UserMovieRepository
+from app.schemas.enums import MovieStatus
+from app.services.job_service import Job
+
+logger = logging.getLogger(__name__)
+
+# Kinopoisk exports and their converters name the same columns differently
+KINOPOISK_COLUMNS = {
+    "title": ("название", "русское название", "name_ru", "title"),
+    "original_title": ("оригинальное название", "название (ориг)", "name_en", "original_title"),
+    "year": ("год", "year"),
+    "rating": ("моя оценка", "оценка", "rating"),
+    "tmdb_id": ("tmdb_id",),
+}
+CUSTOM_MOVIE_DESCRIPTION = "Imported from Kinopoisk"
+
+YEAR_PATTERN = re.compile(r"\d{4}")
+
+@dataclass
+class ImportRow:
+    line: int
+    title: str
+    original_title: Optional[str] = None
+    year: Optional[int] = None
+    rating: Optional[float] = None
+    tmdb_id: Optional[int] = None
+
+    @property
+    def status(self) -> MovieStatus:
+        """Rated movies were watched, the rest are on the watch list."""
+        return MovieStatus.WATCHED if self.rating is not None else MovieStatus.WILL_WATCH
+
+class ImportRowError(ValueError):
+    def __init__(self, line: int, message: str):
+        super().__init__(f"Line {line}: {message}")
+
+def _header_columns(header: list[str]) -> dict[str, int]:
+    names = [name.strip().lower() for name in header]
+    columns = {}
+    for field, aliases in KINOPOISK_COLUMNS.items():
+        for alias in aliases:
+            if alias in names:
+                columns[field] = names.index(alias)
+                break
+    if "title" not in columns:
+        raise ValueError("CSV header has no title column")
+    return columns
+
+def _parse_row(line: int, values: list[str], columns: dict[str, int]) -> ImportRow:
+    def value(field: str) -> Optional[str]:
+        i = columns.get(field)
+        text = values[i].strip() if i is not None and i < len(values) else ""
+        return text or None
+
+    title = value("title") or value("original_title")
+    if not title:
+        raise ImportRowError(line, "missing title")
+
+    year = value("year")
+    year_match = YEAR_PATTERN.search(year) if year else None
+
+    rating = value("rating")
+    if rating is not None:
+        try:
+            rating = float(rating.replace(",", "."))
+        except ValueError:
+            raise ImportRowError(line, f"invalid rating {rating!r}")
+        if not 0 <= rating <= 10:
+            raise ImportRowError(line, f"rating {rating} is out of range 0-10")
+
+    tmdb_id = value("tmdb_id")
+    if tmdb_id is not None:
+        if not tmdb_id.isdigit():
+            raise ImportRowError(line, f"invalid tmdb_id {tmdb_id!r}")
+        tmdb_id = int(tmdb_id)
+
+    return ImportRow(
+        line=line,
+        title=title[:255],
+        original_title=value("original_title"),
+        year=int(year_match.group()) if year_match else None,
+        rating=rating,
+        tmdb_id=tmdb_id,
+    )
+
+def read_kinopoisk_csv(lines: Iterable[str]) -> Iterator[ImportRow | ImportRowError]:
+    """
+    Parse a Kinopoisk ratings export line by line. Yields a row, or the error of an invalid
+    row, per CSV record; raises ValueError if the header is not recognized.
+    The delimiter (comma, semicolon or tab) is taken from the header.
+    """
+    lines = iter(lines)
+    header_line = next(lines, "")
+    delimiter = max(",;\t", key=header_line.count)
+    columns = _header_columns(next(csv.reader([header_line], delimiter=delimiter), []))
+
+    reader = csv.reader(lines, delimiter=delimiter)
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        # Line numbers of the file, counting the header
+        line = reader.line_num + 1
+        try:
+            yield _parse_row(line, values, columns)
+        except ImportRowError as e:
+            yield e
+
+async def import_batch(
+    session,
+    user_id: uuid.UUID,
+    rows: list[ImportRow],
+    seen: Optional[set] = None,
+) -> tuple[int, int, int, int]:
+    """
+    Match a batch of rows to movies and add them to the collection with one insert.
+    Unmatched rows are added as custom movies. Rows of a movie already listed earlier in
+    the file (in this batch or in the entries of seen, which is updated) are skipped.
+    Returns (matched, custom, added, duplicates) counts.
+    """
+    seen = set() if seen is None else seen
+    movie_repo = MovieRepository(session)
+    matches: dict[int, uuid.UUID] = {}
+
+    tmdb_ids = await movie_repo.match_by_tmdb_ids([row.tmdb_id for row in rows if row.tmdb_id is not None])
+    for i, row in enumerate(rows):
+        if row.tmdb_id in tmdb_ids:
+            matches[i] = tmdb_ids[row.tmdb_id]
+
+    # Exact titles first, then the trigram index for the rows that are still unmatched
+    for match in (
+        movie_repo.match_by_titles,
+        lambda wanted: movie_repo.match_by_similar_titles(wanted, settings.IMPORT_TITLE_SIMILARITY),
+    ):
+        wanted = [(i, row.title, row.original_title, row.year) for i, row in enumerate(rows) if i not in matches]
+        if wanted:
+            matches.update(await match(wanted))
+
+    unmatched = [row for i, row in enumerate(rows) if i not in matches]
+    custom_ids = await CustomMovieRepository(session).get_or_create_many(
+        user_id, [(row.title, CUSTOM_MOVIE_DESCRIPTION) for row in unmatched]
+    )
+
+    entries = []
+    for i, row in enumerate(rows):
+        movie_id, custom_movie_id = matches.get(i), None if i in matches else custom_ids[row.title]
+        if (movie_id, custom_movie_id) not in seen:
+            seen.add((movie_id, custom_movie_id))
+            entries.append((movie_id, custom_movie_id, row.status, row.rating))
+    added = await UserMovieRepository(session).import_entries(user_id, entries)
+    return len(matches), len(unmatched), added, len(rows) - len(entries)
+
+async def run_kinopoisk_import(job: Job, user_id: uuid.UUID, path: str, session_factory=async_session) -> None:
+    """
+    Background import of an uploaded Kinopoisk CSV. The file is read as a stream and
+    imported in batches of IMPORT_BATCH_SIZE rows, one transaction each; it is deleted afterwards.
+    """
+    totals = {"matched": 0, "custom": 0, "added": 0, "already_in_collection": 0, "duplicates": 0}
+    # Collection entries listed so far, to tell repeated lines from movies already in the collection
+    seen = set()
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            records = read_kinopoisk_csv(f)
+            async with session_factory() as session:
+                while batch := list(islice(records, settings.IMPORT_BATCH_SIZE)):
+                    rows = []
+                    for record in batch:
+                        if isinstance(record, ImportRowError):
+                            job.add_error(str(record))
+                        else:
+                            rows.append(record)
+                    if rows:
+                        matched, custom, added, duplicates = await import_batch(session, user_id, rows, seen)
+                        totals["matched"] += matched
+                        totals["custom"] += custom
+                        totals["added"] += added
+                        totals["duplicates"] += duplicates
+                        totals["already_in_collection"] += len(rows) - duplicates - added
+                    job.processed += len(rows)
+                    job.result = dict(totals)
+    finally:
+        os.remove(path)
+    logger.info(f"Kinopoisk import for user {user_id}: {totals}")
@@ -0,0 +1,101 @@
+import logging
+import uuid
+from array import array
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.neighbor_table import write_neighbor_table
+from app.repositories.user_movie_repository import UserMovieRepository
+from app.schemas.enums import MovieStatus
+
+logger = logging.getLogger(__name__)
+
+# Implicit feedback of a collection entry; dropped movies say nothing about what the user likes
+INTERACTION_WEIGHTS = {
+    MovieStatus.WATCHED: 1.0,
+    MovieStatus.WILL_WATCH: 0.5,
+}
+# Ratings below this mean the user did not like the movie
+MIN_POSITIVE_RATING = 6.0
+# Pairs seen together by fewer users are noise
+MIN_COOCCURRENCE = 2
+
+def interaction_weight(status: str, rating: float | None) -> float:
+    if rating is not None and rating < MIN_POSITIVE_RATING:
+        return 0.0
+    return INTERACTION_WEIGHTS.get(MovieStatus(status), 0.0)
+
+def top_k_neighbors(similarity: sparse.csr_matrix, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Best k columns of every row of a sparse similarity matrix.
+    Returns (neighbors, scores) arrays of shape (rows, k); empty slots are -1 / 0.
+    """
+    n = similarity.shape[0]
+    neighbors = np.full((n, k), -1, dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+    indptr, indices, data = similarity.indptr, similarity.indices, similarity.data
+    for row in range(n):
+        start, end = indptr[row], indptr[row + 1]
+        if start == end:
+            continue
+        row_scores = data[start:end]
+        top = np.argpartition(-row_scores, k - 1)[:k] if end - start > k else np.arange(end - start)
+        top = top[np.argsort(-row_scores[top], kind="stable")]
+        neighbors[row, :len(top)] = indices[start:end][top]
+        scores[row, :len(top)] = row_scores[top]
+    return neighbors, scores
+
+def item_cosine_neighbors(
+    interactions: sparse.csr_matrix,
+    k: int,
+    min_cooccurrence: int = MIN_COOCCURRENCE,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k item-item cosine neighbours of a (users x items) weighted interaction matrix.
+    """
+    norms = np.sqrt(np.asarray(interactions.multiply(interactions).sum(axis=0)).ravel())
+    normalized = interactions @ sparse.diags(np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0))
+    similarity = (normalized.T @ normalized).tocsr()
+
+    seen = (interactions > 0).astype(np.float32)
+    cooccurrence = (seen.T @ seen).tocsr()
+    similarity = similarity.multiply(cooccurrence >= min_cooccurrence).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+    return top_k_neighbors(similarity, k)
+
+async def build_item_neighbors(
+    session: AsyncSession,
+    k: int,
+    batch_size: int = 10000,
+) -> tuple[list[uuid.UUID], np.ndarray, np.ndarray]:
+    """
+    Read every collection in streaming batches into a sparse users x movies matrix
+    and compute the top-k similar movies of every movie that has interactions.
+    """
+    user_index: dict[uuid.UUID, int] = {}
+    movie_index: dict[uuid.UUID, int] = {}
+    rows, cols, weights = array("i"), array("i"), array("f")
+    async for row in UserMovieRepository(session).stream_interactions(batch_size):
+        weight = interaction_weight(row.status, row.rating)
+        if not weight:
+            continue
+        rows.append(user_index.setdefault(row.user_id, len(user_index)))
+        cols.append(movie_index.setdefault(row.movie_id, len(movie_index)))
+        weights.append(weight)
+
+    interactions = sparse.csr_matrix(
+        (np.frombuffer(weights, dtype=np.float32), (np.frombuffer(rows, dtype=np.int32), np.frombuffer(cols, dtype=np.int32))),
+        shape=(len(user_index), len(movie_index)),
+    )
+    logger.info(f"Loaded {interactions.nnz} interactions of {len(user_index)} users with {len(movie_index)} movies")
+    neighbors, scores = item_cosine_neighbors(interactions, k)
+    return list(movie_index), neighbors, scores
+
+async def run_item_neighbors_build(session: AsyncSession, path: str | None = None, k: int | None = None) -> int:
+    """Build the item-to-item neighbour table and publish it for the API workers. Returns the number of movies."""
+    ids, neighbors, scores = await build_item_neighbors(session, k or settings.ITEM_NEIGHBORS_K)
+    write_neighbor_table(path or settings.ITEM_NEIGHBORS_PATH, ids, neighbors, scores)
+    return len(ids)
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+from app.schemas.enums import JobState
+
+logger = logging.getLogger(__name__)
+
+MAX_JOB_ERRORS = 20
+
+class Job:
+    """State of a background job, updated by the job itself while it runs."""
+
+    def __init__(self, kind: str, owner_id: Optional[uuid.UUID] = None):
+        self.id = uuid.uuid4()
+        self.kind = kind
+        self.owner_id = owner_id
+        self.state = JobState.PENDING
+        self.processed = 0
+        self.failed = 0
+        self.errors: list[str] = []
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.result: dict = {}
+
+    @property
+    def throughput(self) -> float:
+        if not self.started_at:
+            return 0.0
+        end = self.finished_at or datetime.now(timezone.utc)
+        elapsed = (end - self.started_at).total_seconds()
+        return round(self.processed / elapsed, 2) if elapsed > 0 else 0.0
+
+    def add_error(self, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_JOB_ERRORS:
+            self.errors.append(error)
+
+class JobRegistry:
+    """
+    In-process registry of background jobs. Jobs run as asyncio tasks on the worker
+    that accepted the request, so their status is served by that worker.
+    """
+
+    def __init__(self, max_finished: int = 100):
+        self.max_finished = max_finished
+        self._jobs: dict[uuid.UUID, Job] = {}
+        self._tasks: dict[uuid.UUID, asyncio.Task] = {}
+
+    def start(
+        self,
+        kind: str,
+        run: Callable[[Job], Awaitable[None]],
+        owner_id: Optional[uuid.UUID] = None,
+    ) -> Job:
+        self._evict_finished()
+        job = Job(kind, owner_id)
+        self._jobs[job.id] = job
+        self._tasks[job.id] = asyncio.create_task(self._run(job, run))
+        return job
+
+    def get(self, job_id: uuid.UUID) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def get_running(self, kind: str, owner_id: Optional[uuid.UUID] = None) -> Job | None:
+        """A pending or running job of the given kind, started by owner_id if given."""
+        for job in self._jobs.values():
+            if owner_id is not None and job.owner_id != owner_id:
+                continue
+            if job.kind == kind and job.state in (JobState.PENDING, JobState.RUNNING):
+                return job
+        return None
+
+    async def shutdown(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job: Job, run: Callable[[Job], Awaitable[None]]) -> None:
+        job.state = JobState.RUNNING
+        job.started_at = datetime.now(timezone.utc)
+        try:
+            await run(job)
+            job.state = JobState.COMPLETED
+        except asyncio.CancelledError:
+            job.state = JobState.FAILED
+            job.errors.append("Job was cancelled")
+            raise
+        except Exception as e:
+            logger.exception(f"Job {job.kind} {job.id} failed")
+            job.state = JobState.FAILED
+            job.errors.append(str(e))
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+            self._tasks.pop(job.id, None)
+
+    def _evict_finished(self) -> None:
+        finished = [job for job in self._jobs.values() if job.finished_at]
+        finished.sort(key=lambda job: job.finished_at)
+        for job in finished[:max(len(finished) - self.max_finished + 1, 0)]:
+            del self._jobs[job.id]
+
+job_registry = JobRegistry()
@@ -0,0 +1,223 @@
+import asyncio
+from typing import AsyncIterable, Optional
+from elasticsearch import AsyncElasticsearch, helpers
+from sqlalchemy import func, select
+from app.core.cache import search_cache
+from app.core.config import settings
+from app.db import async_session
+from app.models.movie import Movie
+from app.repositories.movie_repository import MovieRepository
+from app.repositories.search_sync_repository import SearchSyncRepository
+from app.services.job_service import Job
+from app.schemas.movie import get_genre_names
+
+# Search always reads through the alias; each reindex builds a new movies_v{n} index behind it
+MOVIES_ALIAS = "movies"
+MOVIES_INDEX_PREFIX = f"{MOVIES_ALIAS}_v"
+# Name of the incremental sync checkpoint for this index
+SYNC_NAME = "movies"
+
+# Search reads MovieResponse fields straight from _source, so the document carries
+# every display field. Fields that are never queried are stored but not indexed.
+MOVIES_MAPPINGS = {
+    "properties": {
+        "id": {"type": "keyword"},
+        "title": {"type": "text"},
+        "title_suggest": {"type": "completion"},
+        "overview": {"type": "text"},
+        "release_date": {"type": "date"},
+        "release_year": {"type": "integer"},
+        "genres": {"type": "keyword"},
+        "genre_ids": {"type": "integer"},
+        "vote_average": {"type": "float"},
+        "vote_count": {"type": "integer"},
+        "popularity": {"type": "float"},
+        "tmdb_id": {"type": "integer", "index": False},
+        "adult": {"type": "boolean", "index": False},
+        "video": {"type": "boolean", "index": False},
+        "original_language": {"type": "keyword", "index": False},
+        "original_title": {"type": "text", "index": False},
+        "backdrop_path": {"type": "keyword", "index": False},
+        "poster_path": {"type": "keyword", "index": False},
+    }
+}
+
+def movie_to_document(movie: Movie) -> dict:
+    """Build the denormalized Elasticsearch document for a movie."""
+    return {
+        "id": str(movie.id),
+        "tmdb_id": movie.tmdb_id,
+        "adult": movie.adult,
+        "backdrop_path": movie.backdrop_path,
+        "original_language": movie.original_language,
+        "original_title": movie.original_title,
+        "overview": movie.overview,
+        "popularity": movie.popularity,
+        "poster_path": movie.poster_path,
+        "release_date": movie.release_date.isoformat() if movie.release_date else None,
+        "release_year": movie.release_date.year if movie.release_date else None,
+        "title": movie.title,
+        "video": movie.video,
+        "vote_average": movie.vote_average,
+        "vote_count": movie.vote_count,
+        "genre_ids": movie.genre_ids,
+        "genres": get_genre_names(movie.genre_ids),
+        "title_suggest": {
+            "input": list(dict.fromkeys(t for t in (movie.title, movie.original_title) if t)),
+            # Popular movies win ties between equally good prefix matches
+            "weight": max(int(movie.popularity or 0), 0),
+        },
+    }
+
+class MovieIndexService:
+    def __init__(self, es: AsyncElasticsearch):
+        self.es = es
+
+    async def reindex(self, movies: AsyncIterable[Movie], job: Optional[Job] = None) -> tuple[str, int]:
+        """
+        Blue/green reindex: stream movies into a new versioned index, verify it,
+        atomically point the alias at it and drop old versions.
+        Search keeps reading the previous version until the switch.
+        Returns (index name, number of indexed movies).
+        """
+        job = job or Job("reindex")
+        index = await self.create_index_version()
+        try:
+            await self.bulk_index(movies, job, index=index)
+            if job.failed:
+                raise RuntimeError(f"Failed to index {job.failed} movies")
+            if job.processed == 0:
+                # Never replace a populated index with an empty one
+                raise RuntimeError("No movies found")
+            await self.finalize_index(index, expected_count=job.processed)
+        except BaseException:
+            await self.es.indices.delete(index=index)
+            raise
+
+        await self.switch_alias(index)
+        search_cache.clear()
+        await self.delete_old_versions()
+        return index, job.processed
+
+    async def get_versions(self) -> list[int]:
+        """Existing movies_v{n} index versions in ascending order."""
+        indices = await self.es.indices.get(index=f"{MOVIES_INDEX_PREFIX}*")
+        suffixes = [name[len(MOVIES_INDEX_PREFIX):] for name in indices]
+        return sorted(int(suffix) for suffix in suffixes if suffix.isdigit())
+
+    async def create_index_version(self) -> str:
+        """Create the next movies_v{n} index with bulk-load friendly settings."""
+        versions = await self.get_versions()
+        index = f"{MOVIES_INDEX_PREFIX}{(versions[-1] if versions else 0) + 1}"
+        await self.es.indices.create(index=index, body={
+            "settings": {
+                "number_of_replicas": 0,
+                "refresh_interval": "-1",
+            },
+            "mappings": MOVIES_MAPPINGS,
+        })
+        return index
+
+    async def finalize_index(self, index: str, expected_count: int) -> None:
+        """Restore serving settings on a freshly loaded index and check it holds every document."""
+        await self.es.indices.put_settings(index=index, body={
+            "index": {
+                "number_of_replicas": settings.ES_MOVIES_REPLICAS,
+                "refresh_interval": settings.ES_MOVIES_REFRESH_INTERVAL,
+            }
+        })
+        await self.es.indices.refresh(index=index)
+        count = (await self.es.count(index=index))["count"]
+        if count != expected_count:
+            raise RuntimeError(f"Index {index} has {count} documents, expected {expected_count}")
+
+    async def get_alias_targets(self) -> list[str]:
+        if not await self.es.indices.exists_alias(name=MOVIES_ALIAS):
+            return []
+        return list((await self.es.indices.get_alias(name=MOVIES_ALIAS)).keys())
+
+    async def switch_alias(self, index: str) -> None:
+        """Atomically move the movies alias to the given index."""
+        actions = [{"remove": {"index": target, "alias": MOVIES_ALIAS}} for target in await self.get_alias_targets()]
+        if not actions and await self.es.indices.exists(index=MOVIES_ALIAS):
+            # Legacy concrete index occupying the alias name
+            actions.append({"remove_index": {"index": MOVIES_ALIAS}})
+        actions.append({"add": {"index": index, "alias": MOVIES_ALIAS}})
+        await self.es.indices.update_aliases(body={"actions": actions})
+
+    async def delete_old_versions(self) -> list[str]:
+        """Drop all but the newest ES_KEEP_INDEX_VERSIONS versions (never the live one)."""
+        live = set(await self.get_alias_targets())
+        versions = await self.get_versions()
+        keep = max(settings.ES_KEEP_INDEX_VERSIONS, 1)
+        stale = [
+            f"{MOVIES_INDEX_PREFIX}{version}"
+            for version in versions[:-keep]
+            if f"{MOVIES_INDEX_PREFIX}{version}" not in live
+        ]
+        if stale:
+            await self.es.indices.delete(index=",".join(stale))
+        return stale
+
+    async def bulk_index(
+        self,
+        movies: AsyncIterable[Movie],
+        job: Job,
+        index: str = MOVIES_ALIAS,
+        chunk_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ) -> None:
+        """
+        Stream movies into Elasticsearch with several bulk requests in flight.
+        Progress (indexed documents and errors) is recorded on the job as chunks complete.
+        """
+        chunk_size = chunk_size or settings.REINDEX_CHUNK_SIZE
+        concurrency = max(concurrency or settings.REINDEX_CONCURRENCY, 1)
+        # Bounded so that reading from the database never runs far ahead of indexing
+        queue: asyncio.Queue = asyncio.Queue(maxsize=chunk_size * concurrency * 2)
+
+        async def produce():
+            async for movie in movies:
+                await queue.put({
+                    "_index": index,
+                    "_id": str(movie.id),
+                    "_source": movie_to_document(movie),
+                })
+            for _ in range(concurrency):
+                await queue.put(None)
+
+        async def queued_actions():
+            while (action := await queue.get()) is not None:
+                yield action
+
+        async def consume():
+            async for ok, item in helpers.async_streaming_bulk(
+                self.es,
+                queued_actions(),
+                chunk_size=chunk_size,
+                max_retries=3,
+                raise_on_error=False,
+            ):
+                if ok:
+                    job.processed += 1
+                else:
+                    job.add_error(str(item))
+
+        try:
+            async with asyncio.TaskGroup() as tasks:
+                tasks.create_task(produce())
+                for _ in range(concurrency):
+                    tasks.create_task(consume())
+        except ExceptionGroup as e:
+            raise e.exceptions[0]
+
+async def run_reindex_job(job: Job, es: AsyncElasticsearch, session_factory=async_session) -> None:
+    """Background reindex: stream every movie from Postgres into a new index version."""
+    async with session_factory() as session:
+        started_at = await session.scalar(select(func.now()))
+        movies = MovieRepository(session).stream_all_movies(batch_size=settings.REINDEX_FETCH_SIZE)
+        index, indexed = await MovieIndexService(es).reindex(movies, job)
+        # Changes made while the snapshot was loading went to the old index:
+        # replay them into the new one through the incremental sync
+        await SearchSyncRepository(session).rewind(SYNC_NAME, started_at)
+    job.result = {"index": index, "total_movies": indexed}
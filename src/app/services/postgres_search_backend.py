@@ -0,0 +1,99 @@
+import uuid
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repositories.movie_repository import MovieRepository, BROWSE_SORT_COLUMNS
+from app.schemas.enums import BrowseSort
+from app.schemas.movie import genre_mapping, get_genre_ids
+from app.services.movie_index_service import movie_to_document
+from app.services.search_service import RATING_BUCKETS, SearchBackend
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Search on the primary database: a Russian tsvector column with a GIN index for
+    full-text matching and pg_trgm similarity on titles for typos and prefixes.
+    Needs no extra infrastructure, so it also serves small deployments without Elasticsearch.
+    """
+
+    name = "postgres"
+
+    def __init__(self, session: AsyncSession):
+        self.movie_repository = MovieRepository(session)
+
+    async def search(
+        self,
+        title: str,
+        genres: list[str],
+        min_rating: Optional[float],
+        page_size: int,
+        cursor: Optional[str],
+    ) -> tuple[list[dict], Optional[str]]:
+        after = None
+        if cursor:
+            after_score, after_id = self._decode_after(cursor, size=2)
+            if not isinstance(after_score, (int, float)):
+                raise ValueError("Invalid cursor")
+            after = (float(after_score), after_id)
+
+        # Fetch one extra row to know whether there is a next page
+        rows = await self.movie_repository.search_movies(
+            title, get_genre_ids(genres), min_rating, limit=page_size + 1, after=after
+        )
+        next_cursor = None
+        if len(rows) > page_size:
+            last, score = rows[page_size - 1]
+            next_cursor = self.encode_cursor({"after": [score, str(last.id)]})
+        return [movie_to_document(movie) for movie, _ in rows[:page_size]], next_cursor
+
+    async def browse(
+        self,
+        genres: list[str],
+        min_rating: Optional[float],
+        sort: BrowseSort,
+        page_size: int,
+        cursor: Optional[str],
+        with_facets: bool,
+    ) -> tuple[list[dict], Optional[str], Optional[dict]]:
+        genre_ids = get_genre_ids(genres)
+        columns = BROWSE_SORT_COLUMNS[sort]
+        after = self._decode_after(cursor, size=len(columns) + 1) if cursor else None
+
+        movies = await self.movie_repository.browse_movies(
+            genre_ids, min_rating, sort, limit=page_size + 1, after=after
+        )
+        next_cursor = None
+        if len(movies) > page_size:
+            last = movies[page_size - 1]
+            next_cursor = self.encode_cursor({
+                "after": [*(getattr(last, column.key) for column in columns), str(last.id)]
+            })
+
+        facets = None
+        if with_facets:
+            counts = await self.movie_repository.get_facet_counts(genre_ids, min_rating, RATING_BUCKETS)
+            facets = {
+                "genres": [
+                    {"value": genre_mapping[genre_id], "count": count}
+                    for genre_id, count in counts["genres"]
+                    if genre_id in genre_mapping
+                ],
+                "decades": [{"value": str(decade), "count": count} for decade, count in counts["decades"]],
+                "ratings": [{"value": key, "count": count} for key, count in counts["ratings"]],
+            }
+        return [movie_to_document(movie) for movie in movies[:page_size]], next_cursor, facets
+
+    async def suggest(self, prefix: str, limit: int) -> list[dict]:
+        rows = await self.movie_repository.suggest_titles(prefix, limit)
+        return [
+            {"id": str(row.id), "title": row.title, "release_date": row.release_date, "poster_path": row.poster_path}
+            for row in rows
+        ]
+
+    def _decode_after(self, cursor: str, size: int) -> list:
+        """Sort values of the last movie of the previous page, with its id converted to a UUID."""
+        after = self.decode_cursor(cursor)["after"]
+        if len(after) != size:
+            raise ValueError("Invalid cursor")
+        try:
+            return [*after[:-1], uuid.UUID(after[-1])]
+        except (ValueError, TypeError, AttributeError):
+            raise ValueError("Invalid cursor")
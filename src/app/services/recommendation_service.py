@@ -0,0 +1,356 @@
+import asyncio
+import logging
+import operator
+import uuid
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import TTLCache, recommendation_cache
+from app.core.config import settings
+from app.core.neighbor_table import NeighborTable, NeighborTableFile
+from app.db import async_session
+from app.models.movie import Movie
+from app.repositories.genre_preference_repository import GENRE_INDEX, GenrePreferenceRepository
+from app.repositories.movie_repository import MovieRepository
+from app.repositories.user_movie_repository import UserMovieRepository
+from app.repositories.user_repository import UserRepository
+from app.schemas.enums import GroupStrategy, MovieStatus
+from app.schemas.movie import GENRE_IDS, MovieResponse, get_genre_names
+from app.services.search_service import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+class CatalogMatrix:
+    """
+    Columnar snapshot of the movie catalog: a genre one-hot matrix (movies x GENRE_IDS)
+    and per-movie rating arrays, so the whole catalog is scored with one matrix-vector product.
+    """
+
+    def __init__(
+        self,
+        ids: list[uuid.UUID],
+        genre_ids: list[list[int]],
+        vote_average: list[float],
+        vote_count: list[int],
+        popularity: list[float],
+    ):
+        self.ids = ids
+        self.index = {movie_id: i for i, movie_id in enumerate(ids)}
+        self.vote_average = np.asarray(vote_average, dtype=np.float32)
+        self.vote_count = np.asarray(vote_count, dtype=np.int32)
+        self.popularity = np.asarray(popularity, dtype=np.float32)
+
+        rows = [i for i, genres in enumerate(genre_ids) for genre_id in genres if genre_id in GENRE_INDEX]
+        cols = [GENRE_INDEX[genre_id] for genres in genre_ids for genre_id in genres if genre_id in GENRE_INDEX]
+        self.genres = np.zeros((len(ids), len(GENRE_IDS)), dtype=np.float32)
+        self.genres[rows, cols] = 1.0
+
+        # Same quality floor as the top movies list: ratings backed by enough votes
+        self.eligible = self.vote_count > settings.RECOMMENDATION_MIN_VOTE_COUNT
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CatalogMatrix):
+            return NotImplemented
+        return (
+            self.ids == other.ids
+            and np.array_equal(self.vote_average, other.vote_average)
+            and np.array_equal(self.vote_count, other.vote_count)
+            and np.array_equal(self.genres, other.genres)
+        )
+
+    def score(self, preferences: np.ndarray) -> np.ndarray:
+        """vote_average + sum of the user's genre scores, -inf for movies that are never recommended."""
+        scores = self.vote_average + self.genres @ preferences
+        return np.where(self.eligible, scores, -np.inf)
+
+    def score_group(self, preferences: np.ndarray, strategy: GroupStrategy) -> np.ndarray:
+        """
+        Group score of every movie from a (members x GENRE_IDS) preference matrix:
+        the mean or the minimum of the members' individual scores.
+        """
+        if strategy == GroupStrategy.AVERAGE:
+            # The mean of linear scores is the score of the mean preferences: one matrix-vector product
+            return self.score(preferences.mean(axis=0))
+        member_scores = self.genres @ preferences.T
+        return np.where(self.eligible, self.vote_average + member_scores.min(axis=1), -np.inf)
+
+    def top_k(
+        self,
+        scores: np.ndarray,
+        k: int,
+        exclude: Optional[list[uuid.UUID]] = None,
+        after: Optional[tuple[float, uuid.UUID]] = None,
+    ) -> list[uuid.UUID]:
+        """
+        Ids of the k best scored movies, best first (ties by catalog position), skipping
+        the excluded ids. after = (score, id) of the last movie of the previous page.
+        """
+        scores = scores.copy()
+        if exclude:
+            scores[[self.index[movie_id] for movie_id in exclude if movie_id in self.index]] = -np.inf
+        if after:
+            after_score, after_id = after
+            positions = np.arange(len(scores))
+            after_position = self.index.get(after_id, len(scores))
+            ranked_before = (scores > after_score) | ((scores == after_score) & (positions <= after_position))
+            scores[ranked_before] = -np.inf
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        # Partial selection is O(n); only the k winners are fully sorted
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((top, -scores[top]))]
+        return [self.ids[i] for i in top]
+
+class RecommendationEngine:
+    """Per-worker holder of the catalog matrix, reloaded in the background."""
+
+    def __init__(self):
+        self.catalog: Optional[CatalogMatrix] = None
+        # Bumped whenever the catalog changes; cached rankings are keyed by it
+        self.version = 0
+        self._lock = asyncio.Lock()
+
+    async def get_catalog(self, session: AsyncSession) -> CatalogMatrix:
+        if self.catalog is None:
+            async with self._lock:
+                if self.catalog is None:
+                    await self.refresh(session)
+        return self.catalog
+
+    async def refresh(self, session: AsyncSession) -> CatalogMatrix:
+        ids, genre_ids, vote_average, vote_count, popularity = [], [], [], [], []
+        async for row in MovieRepository(session).stream_catalog_rows():
+            ids.append(row.id)
+            genre_ids.append(row.genre_ids)
+            vote_average.append(row.vote_average)
+            vote_count.append(row.vote_count)
+            popularity.append(row.popularity)
+        # Building the arrays of a full catalog takes a while: keep the event loop serving requests
+        catalog = await asyncio.to_thread(CatalogMatrix, ids, genre_ids, vote_average, vote_count, popularity)
+        # A periodic reload of an unchanged catalog keeps the cached rankings
+        if await asyncio.to_thread(operator.ne, catalog, self.catalog):
+            self.version += 1
+        self.catalog = catalog
+        return catalog
+
+    def invalidate(self) -> None:
+        """Drop the snapshot; the next request loads the current catalog."""
+        self.catalog = None
+        self.version += 1
+
+def neighbor_scores(catalog: CatalogMatrix, neighbors: NeighborTable, seeds: list[uuid.UUID]) -> np.ndarray:
+    """
+    Item-to-item score of every catalog movie: the summed similarity to the seed movies.
+    """
+    scores = np.zeros(len(catalog), dtype=np.float32)
+    rows = neighbors.find_rows(seeds)
+    rows = rows[rows >= 0]
+    if not len(rows):
+        return scores
+    neighbor_rows = neighbors.table["neighbors"][rows]
+    similarities = neighbors.table["scores"][rows]
+    found = neighbor_rows >= 0
+    positions = [catalog.index.get(neighbors.movie_id(row), -1) for row in neighbor_rows[found]]
+    positions = np.array(positions, dtype=np.int64)
+    in_catalog = positions >= 0
+    np.add.at(scores, positions[in_catalog], similarities[found][in_catalog])
+    return scores
+
+def blend_scores(base: np.ndarray, extra: np.ndarray, weight: float) -> np.ndarray:
+    """
+    Weighted sum of two score arrays after scaling both to [0, 1] over the rankable movies.
+    Without any extra signal the ranking of base is unchanged.
+    """
+    rankable = np.isfinite(base)
+    if not rankable.any() or not extra[rankable].any():
+        return base
+    low, high = base[rankable].min(), base[rankable].max()
+    base_scaled = (base - low) / (high - low) if high > low else np.where(rankable, 0.0, base)
+    extra_scaled = extra / extra[rankable].max()
+    return (1 - weight) * base_scaled + weight * extra_scaled
+
+recommendation_engine = RecommendationEngine()
+item_neighbors = NeighborTableFile(settings.ITEM_NEIGHBORS_PATH)
+similar_movies = NeighborTableFile(settings.SIMILAR_MOVIES_PATH)
+
+class RecommendationService:
+    def __init__(
+        self,
+        session: AsyncSession,
+        engine: RecommendationEngine = recommendation_engine,
+        neighbors: NeighborTableFile = item_neighbors,
+        similar: NeighborTableFile = similar_movies,
+        cache: TTLCache = recommendation_cache,
+    ):
+        self.engine = engine
+        self.neighbors = neighbors
+        self.similar = similar
+        self.cache = cache
+        self.session = session
+        self.movie_repo = MovieRepository(session)
+        self.user_movie_repo = UserMovieRepository(session)
+        self.genre_preference_repo = GenrePreferenceRepository(session)
+        self.user_repo = UserRepository(session)
+
+    async def get_recommended_movies(
+        self,
+        user_id: uuid.UUID,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        collection_version: Optional[int] = None,
+    ) -> tuple[list[MovieResponse], Optional[str]]:
+        """
+        Rank the whole catalog by vote average plus the user's genre relevancy, blended
+        with the similarity to recently watched movies when the neighbour table is built.
+        Movies already in the collection are excluded before taking the page, so every
+        page is full until the catalog runs out. Returns the movies, best first,
+        and the cursor of the next page (None on the last page).
+
+        With the user's collection_version, pages are cached until the collection,
+        the catalog or the neighbour table changes, and repeat calls do not query the database.
+        """
+        def cache_key() -> tuple:
+            return (user_id, collection_version, self.engine.version, self.neighbors.version(), limit, cursor)
+
+        page = self.cache.get(cache_key()) if collection_version is not None else None
+        if page is None:
+            page = await self._rank_page(user_id, limit, cursor)
+            # Keep the preference vector if ranking had to build it
+            await self.session.commit()
+            if collection_version is not None:
+                # The key is taken again: ranking may have loaded a newer catalog
+                self.cache.set(cache_key(), page)
+        return page
+
+    async def _rank_page(
+        self,
+        user_id: uuid.UUID,
+        limit: int,
+        cursor: Optional[str],
+    ) -> tuple[list[MovieResponse], Optional[str]]:
+        after = self._decode_cursor(cursor) if cursor else None
+        scores = await self.genre_preference_repo.get_scores(user_id)
+        preferences = np.array([scores.get(genre_id, 0.0) for genre_id in GENRE_IDS], dtype=np.float32)
+
+        catalog = await self.engine.get_catalog(self.session)
+        ranking = catalog.score(preferences)
+
+        neighbors = self.neighbors.get()
+        if neighbors is not None:
+            seeds = await self.user_movie_repo.get_recent_movie_ids(
+                user_id, MovieStatus.WATCHED, limit=settings.RECOMMENDATION_CF_SEEDS
+            )
+            ranking = blend_scores(ranking, neighbor_scores(catalog, neighbors, seeds), settings.RECOMMENDATION_CF_WEIGHT)
+
+        in_collection = await self.user_movie_repo.get_collection_movie_ids(user_id)
+        # One extra movie tells whether there is a next page
+        movie_ids = catalog.top_k(ranking, limit + 1, exclude=in_collection, after=after)
+
+        next_cursor = None
+        if len(movie_ids) > limit:
+            movie_ids = movie_ids[:limit]
+            last_id = movie_ids[-1]
+            next_cursor = encode_cursor({"after": [float(ranking[catalog.index[last_id]]), str(last_id)]})
+        # Cached pages must not hold ORM objects bound to this request's session
+        movies = [
+            MovieResponse(**mov.__dict__, genres=get_genre_names(mov.genre_ids))
+            for mov in await self._get_movies(movie_ids)
+        ]
+        return movies, next_cursor
+
+    async def get_group_recommendations(
+        self,
+        member_ids: list[uuid.UUID],
+        strategy: GroupStrategy = GroupStrategy.LEAST_MISERY,
+        limit: int = 20,
+    ) -> list[MovieResponse]:
+        """
+        Movies to watch together: the catalog ranked by the members' combined genre
+        preferences, without the movies any member has already watched. The preference
+        vectors and the watched movies of the whole group are read with one query each.
+        """
+        member_ids = list(dict.fromkeys(member_ids))
+        if set(member_ids) - await self.user_repo.get_existing_ids(member_ids):
+            raise ValueError("Group member not found")
+
+        vectors = await self.genre_preference_repo.get_scores_for_users(member_ids)
+        preferences = np.array([vectors[member_id] for member_id in member_ids], dtype=np.float32)
+        catalog = await self.engine.get_catalog(self.session)
+        ranking = catalog.score_group(preferences, strategy)
+
+        watched = await self.user_movie_repo.get_movie_ids_with_status(member_ids, MovieStatus.WATCHED)
+        movie_ids = catalog.top_k(ranking, limit, exclude=watched)
+        return [
+            MovieResponse(**mov.__dict__, genres=get_genre_names(mov.genre_ids))
+            for mov in await self._get_movies(movie_ids)
+        ]
+
+    async def get_because_you_watched(
+        self,
+        user_id: uuid.UUID,
+        seeds: int = 3,
+        limit: int = 10,
+    ) -> list[tuple[Movie, list[Movie]]]:
+        """
+        "Because you watched X" rows: for the most recently watched movies, their
+        nearest item-to-item neighbours that are not in the user's collection yet.
+        """
+        neighbors = self.neighbors.get()
+        if neighbors is None:
+            return []
+        seed_ids = await self.user_movie_repo.get_recent_movie_ids(user_id, MovieStatus.WATCHED, limit=seeds)
+        similar = {seed_id: [movie_id for movie_id, _ in neighbors.neighbors(seed_id)] for seed_id in seed_ids}
+
+        candidate_ids = list({movie_id for movie_ids in similar.values() for movie_id in movie_ids})
+        in_collection = await self.user_movie_repo.get_statuses_for_movies(user_id, candidate_ids)
+        movies = {movie.id: movie for movie in await self.movie_repo.get_movies_by_ids([*seed_ids, *candidate_ids])}
+
+        rows = []
+        for seed_id in seed_ids:
+            recommended = [
+                movies[movie_id] for movie_id in similar[seed_id]
+                if movie_id in movies and movie_id not in in_collection
+            ][:limit]
+            if seed_id in movies and recommended:
+                rows.append((movies[seed_id], recommended))
+        return rows
+
+    async def get_similar_movies(self, movie_id: uuid.UUID, limit: int = 20) -> list[Movie]:
+        """
+        Movies with the closest overview and genres, looked up in the precomputed
+        content neighbour table. Empty until the table has been built or for movies added since.
+        """
+        similar = self.similar.get()
+        if similar is None:
+            return []
+        return await self._get_movies([neighbor_id for neighbor_id, _ in similar.neighbors(movie_id, limit)])
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[float, uuid.UUID]:
+        after = decode_cursor(cursor)["after"]
+        try:
+            score, movie_id = after
+            return float(score), uuid.UUID(movie_id)
+        except (ValueError, TypeError, AttributeError):
+            raise ValueError("Invalid cursor")
+
+    async def _get_movies(self, movie_ids: list[uuid.UUID]) -> list[Movie]:
+        """Load movies keeping the given order."""
+        movies = {movie.id: movie for movie in await self.movie_repo.get_movies_by_ids(movie_ids)}
+        return [movies[movie_id] for movie_id in movie_ids if movie_id in movies]
+
+async def run_catalog_refresh_loop(engine: RecommendationEngine = recommendation_engine, session_factory=async_session) -> None:
+    """Background task: reload the catalog matrix every RECOMMENDATION_REFRESH_INTERVAL seconds."""
+    while True:
+        try:
+            async with session_factory() as session:
+                catalog = await engine.refresh(session)
+            logger.info(f"Loaded {len(catalog)} movies into the recommendation catalog")
+        except Exception as e:
+            logger.error(f"Recommendation catalog refresh failed: {e}")
+        await asyncio.sleep(settings.RECOMMENDATION_REFRESH_INTERVAL)
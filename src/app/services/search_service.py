@@ -0,0 +1,190 @@
+import base64
+import hashlib
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Optional
+from app.core.cache import search_cache
+from app.schemas.enums import BrowseSort
+
+logger = logging.getLogger(__name__)
+
+# (key, from inclusive, to exclusive) buckets of the rating facet, shared by all backends
+RATING_BUCKETS = [
+    ("0-5", None, 5),
+    ("5-6", 5, 6),
+    ("6-7", 6, 7),
+    ("7-8", 7, 8),
+    ("8-9", 8, 9),
+    ("9-10", 9, None),
+]
+
+def encode_cursor(data: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode()
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(data, dict) or not isinstance(data.get("after"), list):
+        raise ValueError("Invalid cursor")
+    return data
+
+def query_digest(*query) -> str:
+    """Short digest of a normalized query, stored in its cursors to reject them for any other query."""
+    return hashlib.sha256(json.dumps(query, default=str).encode()).hexdigest()[:16]
+
+class SearchBackendUnavailable(Exception):
+    """The search backend cannot serve requests right now (down, timing out, no index)."""
+
+class SearchBackend(ABC):
+    """
+    A movie search engine. Movies are returned as dicts of MovieResponse fields
+    (id as a string, genres as names) so that results can be cached and served
+    without touching the ORM. Cursors are opaque and only valid for the backend
+    that issued them.
+    """
+
+    name: str
+
+    @abstractmethod
+    async def search(
+        self,
+        title: str,
+        genres: list[str],
+        min_rating: Optional[float],
+        page_size: int,
+        cursor: Optional[str],
+    ) -> tuple[list[dict], Optional[str]]:
+        ...
+
+    @abstractmethod
+    async def browse(
+        self,
+        genres: list[str],
+        min_rating: Optional[float],
+        sort: BrowseSort,
+        page_size: int,
+        cursor: Optional[str],
+        with_facets: bool,
+    ) -> tuple[list[dict], Optional[str], Optional[dict]]:
+        ...
+
+    @abstractmethod
+    async def suggest(self, prefix: str, limit: int) -> list[dict]:
+        ...
+
+    async def is_healthy(self) -> bool:
+        return True
+
+    def decode_cursor(self, cursor: str) -> dict:
+        state = decode_cursor(cursor)
+        if state.get("backend", self.name) != self.name:
+            raise ValueError("Invalid cursor")
+        return state
+
+    def encode_cursor(self, state: dict) -> str:
+        return encode_cursor({"backend": self.name, **state})
+
+class SearchService:
+    """
+    Runs search on the first healthy backend, in order of preference. The last backend
+    is always tried, so a single configured backend behaves as before.
+    Results do not depend on the user, so they are cached per backend, query and page;
+    user statuses are applied by the caller on top of the cached result.
+    """
+
+    def __init__(self, backends: list[SearchBackend]):
+        self.backends = backends
+
+    async def search_movies(
+        self,
+        title: Optional[str],
+        genres: list[str],
+        min_rating: Optional[float],
+        page_size: int = 20,
+        cursor: Optional[str] = None,
+    ) -> tuple[list[dict], Optional[str]]:
+        """
+        Full-text movie search. Returns movie dicts in ranking order
+        and an opaque cursor for the next page (None on the last page).
+        """
+        # Normalize so that equivalent queries share a cache entry
+        title = " ".join(title.lower().split()) if title else None
+        genres = sorted(set(genres))
+
+        if not title:
+            movies, next_cursor, _ = await self.browse_movies(genres, min_rating, page_size=page_size, cursor=cursor)
+            return movies, next_cursor
+
+        query = query_digest("search", title, genres, min_rating)
+        self._check_cursor(cursor, query)
+        movies, next_cursor = await self._run(
+            ("search", title, tuple(genres), min_rating, page_size, cursor),
+            lambda backend: backend.search(title, genres, min_rating, page_size, cursor),
+        )
+        return movies, self._bind_cursor(next_cursor, query)
+
+    async def browse_movies(
+        self,
+        genres: list[str],
+        min_rating: Optional[float],
+        sort: BrowseSort = BrowseSort.RATING,
+        page_size: int = 20,
+        cursor: Optional[str] = None,
+        with_facets: bool = False,
+    ) -> tuple[list[dict], Optional[str], Optional[dict]]:
+        """
+        Browse the catalog with filters only, sorted by rating or popularity.
+        With with_facets, the first page also returns facet counts
+        per genre, release decade and rating bucket.
+        """
+        genres = sorted(set(genres))
+        with_facets = with_facets and not cursor
+        query = query_digest("browse", genres, min_rating, sort)
+        self._check_cursor(cursor, query)
+        movies, next_cursor, facets = await self._run(
+            ("browse", tuple(genres), min_rating, sort, page_size, cursor, with_facets),
+            lambda backend: backend.browse(genres, min_rating, sort, page_size, cursor, with_facets),
+        )
+        return movies, self._bind_cursor(next_cursor, query), facets
+
+    async def suggest_titles(self, prefix: str, limit: int = 10) -> list[dict]:
+        """Typeahead suggestions on movie titles, most popular first."""
+        return await self._run(
+            ("suggest", prefix.lower(), limit),
+            lambda backend: backend.suggest(prefix, limit),
+        )
+
+    @staticmethod
+    def _check_cursor(cursor: Optional[str], query: str) -> None:
+        """A cursor only continues the query and filters it was issued for."""
+        if cursor and decode_cursor(cursor).get("query") != query:
+            raise ValueError("Cursor does not match the query")
+
+    @staticmethod
+    def _bind_cursor(cursor: Optional[str], query: str) -> Optional[str]:
+        return encode_cursor({**decode_cursor(cursor), "query": query}) if cursor else None
+
+    async def _run(self, cache_key: tuple, call):
+        for i, backend in enumerate(self.backends):
+            is_last = i == len(self.backends) - 1
+            if not is_last and not await backend.is_healthy():
+                continue
+
+            key = (backend.name, *cache_key)
+            cached = search_cache.get(key)
+            if cached is not None:
+                return cached
+
+            try:
+                result = await call(backend)
+            except SearchBackendUnavailable:
+                if is_last:
+                    raise
+                logger.warning(f"Search backend {backend.name} is unavailable, falling back")
+                continue
+
+            search_cache.set(key, result)
+            return result
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from typing import Iterable
+from elasticsearch import AsyncElasticsearch
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import search_cache
+from app.core.config import settings
+from app.db import async_session
+from app.models.movie import Movie
+from app.repositories.search_sync_repository import SearchSyncRepository
+from app.services.job_service import Job
+from app.services.movie_index_service import SYNC_NAME, MovieIndexService
+
+logger = logging.getLogger(__name__)
+
+async def _iterate(movies: Iterable[Movie]):
+    for movie in movies:
+        yield movie
+
+class SearchSyncService:
+    """Pushes movies changed since the last checkpoint into the live search index."""
+
+    def __init__(self, session: AsyncSession, es: AsyncElasticsearch):
+        self.session = session
+        self.sync_repo = SearchSyncRepository(session)
+        self.index_service = MovieIndexService(es)
+
+    async def sync_batch(self, batch_size: int | None = None) -> int:
+        """
+        Index one batch of changed movies and advance the checkpoint.
+        Returns the number of synced movies (0 when up to date or another worker is syncing).
+        """
+        batch_size = batch_size or settings.SEARCH_SYNC_BATCH_SIZE
+        # Never write through the alias while it does not exist: that would auto-create
+        # a "movies" index with dynamic mappings. A full reindex creates it first.
+        targets = await self.index_service.get_alias_targets()
+        if not targets:
+            return 0
+
+        try:
+            state = await self.sync_repo.lock_state(SYNC_NAME)
+            if state is None:
+                return 0
+            movies = await self.sync_repo.get_changed_movies(
+                state, batch_size, lag_seconds=settings.SEARCH_SYNC_LAG_SECONDS
+            )
+            if not movies:
+                return 0
+
+            job = Job("search-sync")
+            await self.index_service.bulk_index(_iterate(movies), job, index=targets[0])
+            if job.failed:
+                raise RuntimeError(f"Failed to sync {job.failed} movies: {job.errors}")
+
+            state.last_updated_at = movies[-1].updated_at
+            state.last_id = movies[-1].id
+            await self.session.commit()
+            search_cache.clear()
+            return len(movies)
+        finally:
+            # Releases the checkpoint lock when nothing was committed
+            await self.session.rollback()
+
+    async def sync(self) -> int:
+        """Sync batches until the index has caught up."""
+        total = 0
+        while (synced := await self.sync_batch()) >= settings.SEARCH_SYNC_BATCH_SIZE:
+            total += synced
+        return total + synced
+
+async def run_search_sync_loop(es: AsyncElasticsearch, session_factory=async_session) -> None:
+    """Background task: keep the search index in sync with the movies table."""
+    while True:
+        try:
+            async with session_factory() as session:
+                synced = await SearchSyncService(session, es).sync()
+            if synced:
+                logger.info(f"Synced {synced} changed movies to Elasticsearch")
+        except Exception as e:
+            logger.error(f"Search sync failed: {e}")
+        await asyncio.sleep(settings.SEARCH_SYNC_INTERVAL)
@@ -1,22 +1,30 @@
-from collections import defaultdict
 from app.repositories.movie_repository import MovieRepository
-from app.repositories.user_movie_repository import UserMovieRepository
+from app.repositories.user_movie_repository import TOMBSTONE_RETENTION_DAYS, UserMovieRepository
 from app.services.movie_service import MovieService
 from app.repositories.custom_movie_repository import CustomMovieRepository
+from app.repositories.genre_preference_repository import GenrePreferenceRepository
 from app.models.user_movie import UserMovie
 from uuid import UUID
-from typing import List, Optional, Dict
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
 from fastapi import HTTPException, status
-from app.schemas.enums import MovieStatus
-from sqlalchemy import and_, select
+from app.core.cache import TTLCache, stats_cache
+from app.schemas.collection import BulkCollectionOperation, BulkOperationResult
+from app.schemas.enums import CollectionSort, MovieStatus
+from app.schemas.movie import genre_mapping
+from app.schemas.user import MonthlyAdditions, UserStats
+from app.services.search_service import decode_cursor, encode_cursor
+from sqlalchemy import Row, and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 class UserMovieService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, cache: TTLCache = stats_cache):
+        self.cache = cache
         self.user_movie_repo = UserMovieRepository(session)
         movie_repository = MovieRepository(session)
         self.movie_service = MovieService(movie_repository)
         self.custom_movie_repo = CustomMovieRepository(session)
+        self.genre_preference_repo = GenrePreferenceRepository(session)
 
     async def add_movie(
         self,
@@ -25,94 +33,173 @@ class UserMovieService:
         custom_movie_id: Optional[UUID] = None,
         status: MovieStatus = MovieStatus.WILL_WATCH,
         rating: Optional[float] = None,
-    ) -> UserMovie:
+    ) -> Row:
         """
         Add a movie or custom movie to the user's collection.
+        Returns the entry with the columns of its movie.
         """
         try:
-            if movie_id:
-                movie = await self.movie_service.get_movie_by_id(movie_id)
-                if not movie:
-                    raise ValueError("Movie not found")
-            elif custom_movie_id:
-                custom_movie = await self.custom_movie_repo.get_custom_movie_by_id(custom_movie_id)
-                if not custom_movie:
-                    raise ValueError("Custom movie not found")
-            else:
-                raise ValueError("Either movie_id or custom_movie_id must be provided")
-
-            user_movie = await self.user_movie_repo.add_to_collection(
+            return await self.user_movie_repo.add_to_collection(
                 user_id=user_id,
                 movie_id=movie_id,
                 custom_movie_id=custom_movie_id,
                 status=status,
                 rating=rating,
             )
-            return user_movie
-
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
 
     async def update_status(
         self,
         user_id: UUID,
-        user_movie_id: UUID,
+        movie_identifier: UUID,
         status: MovieStatus,
-    ) -> UserMovie:
+    ) -> Row:
         """
         Update the status of a movie in the user's collection.
+        Returns the entry with the columns of its movie.
         """
         try:
-            user_movie = await self.user_movie_repo.update_status(
+            return await self.user_movie_repo.update_status(
                 user_id=user_id,
-                user_movie_id=user_movie_id,
+                movie_identifier=movie_identifier,
                 status=status,
             )
-            return user_movie
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
 
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=str(e))
+    async def apply_bulk(self, user_id: UUID, operations: list[BulkCollectionOperation]) -> list[BulkOperationResult]:
+        """
+        Apply many add / status / delete operations in one transaction and report the
+        outcome of each. A failed operation does not stop the others.
+        """
+        errors = await self.user_movie_repo.apply_bulk(
+            user_id, [(operation.op, operation.movie_id, operation.status) for operation in operations]
+        )
+        return [
+            BulkOperationResult(op=operation.op, movie_id=operation.movie_id, ok=error is None, error=error)
+            for operation, error in zip(operations, errors)
+        ]
 
-    async def get_paginated(
+    async def get_page(
         self,
         user_id: UUID,
         status: Optional[MovieStatus] = None,
-        page: int = 1,
-        page_size: int = 10,
-    ) -> Dict:
+        genre_ids: Optional[list[int]] = None,
+        sort: CollectionSort = CollectionSort.ADDED_AT,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> tuple[List[Row], Optional[str]]:
         """
-        Retrieve a paginated list of movies in the user's collection.
-        Optionally filter by status.
+        Retrieve one page of the user's collection, optionally filtered by status and genres.
+        Returns rows with the response columns and the cursor of the next page (None on the last page).
         """
         try:
-            if status:
-                user_movies, total = await self.user_movie_repo.get_movies_by_status(
-                    user_id=user_id,
-                    status=status,
-                    page=page,
-                    page_size=page_size,
-                )
-            else:
-                user_movies, total = await self.user_movie_repo.get_collection_paginated(
-                    user_id=user_id,
-                    page=page,
-                    page_size=page_size,
+            after = self._decode_after(cursor, sort) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        rows = await self.user_movie_repo.get_collection_page(
+            user_id, status, genre_ids or [], sort, limit=limit + 1, after=after
+        )
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            value = rows[-1].sort_value
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            next_cursor = encode_cursor({"sort": sort.value, "after": [value, str(rows[-1].entry_id)]})
+        return rows, next_cursor
+
+    @staticmethod
+    def _decode_after(cursor: str, sort: CollectionSort) -> tuple[Any, UUID]:
+        data = decode_cursor(cursor)
+        # A cursor is only valid for the order it was issued for
+        if data.get("sort") != sort.value or len(data["after"]) != 2:
+            raise ValueError("Invalid cursor")
+        value, last_id = data["after"]
+        try:
+            if sort == CollectionSort.ADDED_AT:
+                value = datetime.fromisoformat(value)
+            elif sort == CollectionSort.RATING:
+                value = float(value)
+            elif not isinstance(value, str):
+                raise ValueError
+            return value, UUID(last_id)
+        except (ValueError, TypeError, AttributeError):
+            raise ValueError("Invalid cursor")
+
+    async def get_stats(self, user_id: UUID, collection_version: int) -> UserStats:
+        """
+        Statistics of the user's collection from SQL aggregates, cached until
+        the collection changes (collection_version is bumped by every change).
+        """
+        key = (user_id, collection_version)
+        stats = self.cache.get(key)
+        if stats is not None:
+            return stats
+
+        totals, genres, months = await self.user_movie_repo.get_collection_stats(user_id)
+        stats = UserStats(
+            total=totals.total,
+            by_status={status.value: getattr(totals, status.value) for status in MovieStatus},
+            genres={genre_mapping[genre_id]: count for genre_id, count in genres if genre_id in genre_mapping},
+            rated=totals.rated,
+            average_rating=round(totals.average_rating, 2) if totals.average_rating is not None else None,
+            added_per_month=[MonthlyAdditions(month=month.date(), count=count) for month, count in months],
+        )
+        self.cache.set(key, stats)
+        return stats
+
+    async def get_changes(
+        self,
+        user_id: UUID,
+        cursor: Optional[str] = None,
+    ) -> tuple[List[Row], List[Row], str]:
+        """
+        Entries added or updated and tombstones of entries deleted since the cursor
+        (the whole collection without one), and the cursor of the next sync.
+        """
+        since = None
+        if cursor:
+            try:
+                since, issued_at = self._decode_since(cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            # Tombstones of deletions after that may already be pruned
+            if issued_at < datetime.now(timezone.utc) - timedelta(days=TOMBSTONE_RETENTION_DAYS):
+                raise HTTPException(
+                    status_code=status.HTTP_410_GONE,
+                    detail="Cursor expired, reload the whole collection"
                 )
 
-            return {
-                "movies": user_movies,
-                "total": total,
-                "page": page,
-                "page_size": page_size,
-            }
+        until, changed, deleted = await self.user_movie_repo.get_changes(user_id, since)
+        issued_at = datetime.now(timezone.utc)
+        return changed, deleted, encode_cursor({"changes": True, "after": [until, issued_at.isoformat()]})
 
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=str(e))
+    @staticmethod
+    def _decode_since(cursor: str) -> tuple[int, datetime]:
+        """Collection version and issue time of a delta sync cursor."""
+        data = decode_cursor(cursor)
+        if not data.get("changes") or len(data["after"]) != 2:
+            raise ValueError("Invalid cursor")
+        since, issued_at = data["after"]
+        if not isinstance(since, int) or isinstance(since, bool):
+            raise ValueError("Invalid cursor")
+        try:
+            issued_at = datetime.fromisoformat(issued_at)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+        if issued_at.tzinfo is None:
+            raise ValueError("Invalid cursor")
+        return since, issued_at
 
     async def delete_from_collection(
         self,
         user_id: UUID,
-        user_movie_id: UUID,
+        movie_identifier: UUID,
     ) -> None:
         """
         Remove a movie from the user's collection.
@@ -120,10 +207,10 @@ class UserMovieService:
         try:
             await self.user_movie_repo.delete_from_collection(
                 user_id=user_id,
-                user_movie_id=user_movie_id,
+                movie_identifier=movie_identifier,
             )
 
-        except ValueError as e:
+        except LookupError as e:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     
     async def get_statuses_for_movies(self, user_id: UUID, movie_ids: list[UUID]) -> dict[UUID, str]:
@@ -149,17 +236,8 @@ class UserMovieService:
         return await self.user_movie_repo.get_all_user_movies(user_id, status)
     
     async def compute_genre_relevancy(self, user_id: UUID) -> dict[int, float]:
-        """Compute relevancy scores for each genre based on the user's collection."""
-        user_movies = await self.get_all(user_id=user_id)
-        R_g = defaultdict(float)
-        default_rating = {
-            MovieStatus.WATCHED: 7.0,    # Positive preference
-            MovieStatus.WILL_WATCH: 5.0, # Neutral preference
-            MovieStatus.DROPPED: 3.0     # Negative preference
-        }
-        for um in user_movies:
-            if um.movie:  # Only movies with genres (skip CustomMovie)
-                score = um.rating if um.rating is not None else default_rating[um.status]
-                for genre_id in um.movie.genre_ids:
-                    R_g[genre_id] += score
-        return R_g
+        """
+        Relevancy score of each genre based on the user's collection, read from the
+        stored preference vector: the cost does not depend on the collection size.
+        """
+        return await self.genre_preference_repo.get_scores(user_id)
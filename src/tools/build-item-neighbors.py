@@ -0,0 +1,22 @@
+import asyncio
+import logging
+
+from app.db import async_session
+from app.core.config import settings
+from app.services.item_similarity_service import run_item_neighbors_build
+
+logging.basicConfig(level=logging.INFO)
+
+# Run periodically (e.g. nightly) from the api container:
+#   PYTHONPATH=src python src/tools/build-item-neighbors.py
+# API workers pick up the new file on their next request.
+
+
+async def main():
+    async with async_session() as session:
+        movies = await run_item_neighbors_build(session)
+    print(f"Wrote neighbours of {movies} movies to {settings.ITEM_NEIGHBORS_PATH}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
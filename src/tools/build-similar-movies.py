@@ -0,0 +1,22 @@
+import asyncio
+import logging
+
+from app.db import async_session
+from app.core.config import settings
+from app.services.content_similarity_service import run_similar_movies_build
+
+logging.basicConfig(level=logging.INFO)
+
+# Run after catalog updates from the api container:
+#   PYTHONPATH=src python src/tools/build-similar-movies.py
+# API workers pick up the new file on their next request.
+
+
+async def main():
+    async with async_session() as session:
+        movies = await run_similar_movies_build(session)
+    print(f"Wrote similar movies of {movies} movies to {settings.SIMILAR_MOVIES_PATH}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
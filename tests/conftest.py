@@ -6,9 +6,11 @@ from app.db import get_db
 from app.main import app
 from app.models.movie import Base
 from app.core.security import create_access_token, pwd_context
+from app.core.cache import search_cache
+from app.services.recommendation_service import recommendation_engine
 from app.models.user import User
 from app.models.movie import Movie
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 import pytest_asyncio
 import os
 
@@ -113,6 +115,8 @@ async def test_movies(db_session):
     ]
     db_session.add_all(movies)
     await db_session.commit()
+    # The catalog changed: drop the recommendation matrix cached by previous tests
+    recommendation_engine.invalidate()
     return movies
 
 @pytest_asyncio.fixture
@@ -125,5 +129,8 @@ def mock_minio_client():
 
 @pytest_asyncio.fixture
 def mock_es():
-    with patch('app.core.elasticsearch.AsyncElasticsearch', new_callable=AsyncMock) as mock:
+    search_cache.clear()
+    with patch('app.core.elasticsearch.es_client', new_callable=AsyncMock) as mock:
+        # Per-request options return the same client
+        mock.options = MagicMock(return_value=mock)
         yield mock
\ No newline at end of file
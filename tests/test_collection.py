@@ -1,5 +1,20 @@
+import asyncio
+import json
 import pytest
 import uuid
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.genre_preference import UserGenrePreference
+from app.repositories.genre_preference_repository import GenrePreferenceRepository
+from app.repositories.user_movie_repository import UserMovieRepository
+from app.schemas.enums import CollectionSort, ExportFormat
+from app.schemas.collection import CollectionMovieResponse
+from app.schemas.movie import get_genre_names
+from app.services.export_service import stream_collection_export
+from app.services.import_service import ImportRowError, read_kinopoisk_csv, run_kinopoisk_import
+from app.services.job_service import Job
 
 @pytest.mark.asyncio
 async def test_add_to_collection(client, test_user, test_movies):
@@ -50,6 +65,36 @@ async def test_update_movie_status(client, test_user, test_movies):
     data = response.json()
     assert data["status"] == "watched"
 
+@pytest.mark.asyncio
+async def test_add_unknown_movie_to_collection(client, test_user):
+    user, token = test_user
+    response = await client.post(
+        "/api/collection/add",
+        json={"movie_id": str(uuid.uuid4())},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Movie not found"
+
+@pytest.mark.asyncio
+async def test_update_status_by_movie_id_returns_movie(client, test_user, test_movies):
+    user, token = test_user
+    movie = test_movies[1]
+    await client.post(
+        "/api/collection/add",
+        json={"movie_id": str(movie.id)},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    response = await client.post(
+        f"/api/collection/{movie.id}/dropped",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "dropped"
+    assert data["title"] == movie.title
+    assert data["genres"] == ["комедия", "драма"]
+
 @pytest.mark.asyncio
 async def test_update_nonexistent_movie_status(client, test_user):
     user, token = test_user
@@ -77,6 +122,32 @@ async def test_get_collection(client, test_user, test_movies):
     assert response.status_code == 200
     data = response.json()
     assert len(data) == len(test_movies)
+    # Rows are serialized without the response model: the fields must still match it
+    assert set(data[0]) == set(CollectionMovieResponse.model_fields)
+    assert CollectionMovieResponse.model_validate(data[0]).status == "will_watch"
+
+@pytest.mark.asyncio
+async def test_get_collection_pages(client, test_user, test_movies):
+    user, token = test_user
+    headers = {"Authorization": f"Bearer {token}"}
+    for movie in test_movies:
+        await client.post("/api/collection/add", json={"movie_id": str(movie.id)}, headers=headers)
+
+    titles = []
+    response = await client.get("/api/collection/?sort=title&limit=1", headers=headers)
+    titles += [m["title"] for m in response.json()]
+    cursor = response.headers["X-Next-Cursor"]
+    response = await client.get(f"/api/collection/?sort=title&limit=1&cursor={cursor}", headers=headers)
+    titles += [m["title"] for m in response.json()]
+    assert "X-Next-Cursor" not in response.headers
+    assert titles == sorted(movie.title for movie in test_movies)
+
+    # A cursor is only valid for the order it was issued for
+    response = await client.get(f"/api/collection/?sort=added_at&cursor={cursor}", headers=headers)
+    assert response.status_code == 400
+
+    response = await client.get("/api/collection/?genres=драма", headers=headers)
+    assert [m["title"] for m in response.json()] == [test_movies[1].title]
 
 @pytest.mark.asyncio
 async def test_get_collection_unauthorized(client):
@@ -107,4 +178,261 @@ async def test_delete_nonexistent_from_collection(client, test_user):
         f"/api/collection/{fake_id}",
         headers={"Authorization": f"Bearer {token}"}
     )
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_genre_preferences_follow_collection(client, test_user, test_movies, db_session):
+    user, token = test_user
+    headers = {"Authorization": f"Bearer {token}"}
+    for movie in test_movies:
+        await client.post("/api/collection/add", json={"movie_id": str(movie.id)}, headers=headers)
+    await client.post(f"/api/collection/{test_movies[0].id}/watched", headers=headers)
+    await client.delete(f"/api/collection/{test_movies[1].id}", headers=headers)
+
+    repo = GenrePreferenceRepository(db_session)
+    # watched (7) for the genres of the first movie; the deleted movie's genres cancel out
+    assert await repo.get_scores(user.id) == {28: 7.0, 12: 7.0}
+    # The incrementally maintained vector matches a rebuild from the collection
+    assert [score for score in await repo.rebuild(user.id) if score] == [7.0, 7.0]
+
+    # A missing vector is built by the first ranking and kept once the request commits
+    await db_session.execute(delete(UserGenrePreference).where(UserGenrePreference.user_id == user.id))
+    await db_session.commit()
+    response = await client.get("/api/movies/recommended", headers=headers)
+    assert response.status_code == 200
+    await db_session.rollback()
+    stored = await db_session.scalar(select(UserGenrePreference.scores).where(UserGenrePreference.user_id == user.id))
+    assert [score for score in stored if score] == [7.0, 7.0]
+
+@pytest.mark.asyncio
+async def test_bulk_collection_operations(client, test_user, test_movies, db_session):
+    user, token = test_user
+    headers = {"Authorization": f"Bearer {token}"}
+    unknown_id = str(uuid.uuid4())
+    operations = [
+        {"op": "add", "movie_id": str(test_movies[0].id)},
+        {"op": "add", "movie_id": str(test_movies[1].id)},
+        {"op": "add", "movie_id": unknown_id},
+        {"op": "status", "movie_id": str(test_movies[0].id), "status": "watched"},
+        {"op": "delete", "movie_id": str(test_movies[1].id)},
+        {"op": "add", "movie_id": str(test_movies[0].id)},
+        {"op": "delete", "movie_id": unknown_id},
+    ]
+    response = await client.post("/api/collection/bulk", json={"operations": operations}, headers=headers)
+    assert response.status_code == 200
+    assert [(r["ok"], r["error"]) for r in response.json()] == [
+        (True, None),
+        (True, None),
+        (False, "Movie not found"),
+        (True, None),
+        (True, None),
+        (False, "Movie already in collection"),
+        (False, "Movie not found in collection"),
+    ]
+
+    response = await client.get("/api/collection/", headers=headers)
+    assert [(m["title"], m["status"]) for m in response.json()] == [(test_movies[0].title, "watched")]
+    # Preference deltas of the whole batch are applied once, matching a rebuild
+    assert await GenrePreferenceRepository(db_session).get_scores(user.id) == {28: 7.0, 12: 7.0}
+
+@pytest.mark.asyncio
+async def test_bulk_status_requires_status(client, test_user, test_movies):
+    user, token = test_user
+    response = await client.post(
+        "/api/collection/bulk",
+        json={"operations": [{"op": "status", "movie_id": str(test_movies[0].id)}]},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 422
+
+def test_read_kinopoisk_csv():
+    lines = [
+        "Название;Оригинальное название;Год;Моя оценка\n",
+        "Фильм 1;Movie 1;2020;8,5\n",
+        "\n",
+        "Фильм 2;;2021 (сериал);\n",
+        ";;2022;7\n",
+        "Фильм 3;Movie 3;;11\n",
+    ]
+    records = list(read_kinopoisk_csv(lines))
+    assert [(r.title, r.original_title, r.year, r.rating, r.status) for r in records[:2]] == [
+        ("Фильм 1", "Movie 1", 2020, 8.5, "watched"),
+        ("Фильм 2", None, 2021, None, "will_watch"),
+    ]
+    assert [str(r) for r in records[2:]] == [
+        "Line 5: missing title",
+        "Line 6: rating 11.0 is out of range 0-10",
+    ]
+    assert all(isinstance(r, ImportRowError) for r in records[2:])
+
+@pytest.mark.asyncio
+async def test_kinopoisk_import(test_user, test_movies, db_session, tmp_path):
+    user, token = test_user
+    path = tmp_path / "kinopoisk.csv"
+    content = (
+        "title,original_title,year,rating,tmdb_id\n"
+        "Первый фильм,,,9,1\n"
+        "The Movie 2,,2021,6,\n"
+        "Неизвестный фильм,Unknown Movie,1999,5,\n"
+        ",,,,\n"
+        "Первый фильм,,,9,1\n"
+    )
+    path.write_text(content, encoding="utf-8-sig")
+
+    @asynccontextmanager
+    async def session_factory():
+        yield db_session
+
+    job = Job("kinopoisk_import", user.id)
+    await run_kinopoisk_import(job, user.id, str(path), session_factory=session_factory)
+
+    # By tmdb_id, by trigram similarity, as a custom movie, and a line repeated in the file
+    assert job.processed == 4
+    assert job.result == {"matched": 3, "custom": 1, "added": 3, "already_in_collection": 0, "duplicates": 1}
+    assert not path.exists()
+
+    result = await UserMovieRepository(db_session).get_collection_page(user.id, None, [], CollectionSort.TITLE, 10)
+    assert [(row.title, row.status, row.rating) for row in result] == [
+        (test_movies[0].title, "watched", 9.0),
+        (test_movies[1].title, "watched", 6.0),
+        ("Неизвестный фильм", "watched", 5.0),
+    ]
+
+    # Importing the same file again adds nothing
+    path.write_text(content, encoding="utf-8-sig")
+    job = Job("kinopoisk_import", user.id)
+    await run_kinopoisk_import(job, user.id, str(path), session_factory=session_factory)
+    assert job.result == {"matched": 3, "custom": 1, "added": 0, "already_in_collection": 3, "duplicates": 1}
+
+@pytest.mark.asyncio
+async def test_kinopoisk_import_endpoint(client, test_user, admin_user):
+    user, token = test_user
+    admin, admin_token = admin_user
+    with patch("app.api.endpoints.collection.run_kinopoisk_import", new_callable=AsyncMock) as mock_job:
+        response = await client.post(
+            "/api/collection/import/kinopoisk",
+            files={"file": ("kinopoisk.csv", "title\nMovie 1\n".encode(), "text/csv")},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+
+        response = await client.get(
+            f"/api/collection/import/{job_id}",
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200
+        assert response.json()["kind"] == "kinopoisk_import"
+
+        # Other users do not see the job
+        response = await client.get(
+            f"/api/collection/import/{job_id}",
+            headers={"Authorization": f"Bearer {admin_token}"}
+        )
+        assert response.status_code == 404
+    mock_job.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_export_collection(client, test_user, test_movies, db_session):
+    user, token = test_user
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.post("/api/collection/add", json={"movie_id": str(test_movies[0].id), "status": "watched"}, headers=headers)
+    await client.post("/api/collection/add", json={"title": "Custom Movie", "description": "Custom"}, headers=headers)
+
+    @asynccontextmanager
+    async def session_factory():
+        yield db_session
+
+    chunks = stream_collection_export(ExportFormat.CSV, user.id, session_factory=session_factory)
+    lines = b"".join([chunk async for chunk in chunks]).decode().splitlines()
+    assert lines[0] == "id,movie_id,custom_movie_id,tmdb_id,title,original_title,release_date,genres,status,rating,added_at,updated_at"
+    assert [line.split(",")[3:5] for line in lines[1:]] == [["1", test_movies[0].title], ["", "Custom Movie"]]
+
+    chunks = stream_collection_export(ExportFormat.NDJSON, session_factory=session_factory)
+    records = [json.loads(line) for line in b"".join([chunk async for chunk in chunks]).splitlines()]
+    assert {(record["user_id"], record["title"], tuple(record["genres"])) for record in records} == {
+        (str(user.id), test_movies[0].title, tuple(get_genre_names(test_movies[0].genre_ids))),
+        (str(user.id), "Custom Movie", ()),
+    }
+
+@pytest.mark.asyncio
+async def test_export_all_collections_non_admin(client, test_user):
+    user, token = test_user
+    response = await client.get("/api/collection/export/all", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_collection_changes(client, test_user, test_movies):
+    user, token = test_user
+    headers = {"Authorization": f"Bearer {token}"}
+    for movie in test_movies:
+        await client.post("/api/collection/add", json={"movie_id": str(movie.id)}, headers=headers)
+
+    response = await client.get("/api/collection/changes", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [m["id"] for m in data["changed"]] == [str(movie.id) for movie in test_movies]
+    assert data["deleted"] == []
+
+    await client.post(f"/api/collection/{test_movies[0].id}/watched", headers=headers)
+    await client.delete(f"/api/collection/{test_movies[1].id}", headers=headers)
+
+    # Only the changes since the previous sync, with a tombstone for the removed movie
+    response = await client.get("/api/collection/changes", params={"since": data["cursor"]}, headers=headers)
+    data = response.json()
+    assert [(m["id"], m["status"]) for m in data["changed"]] == [(str(test_movies[0].id), "watched")]
+    assert [m["id"] for m in data["deleted"]] == [str(test_movies[1].id)]
+
+    response = await client.get("/api/collection/changes", params={"since": data["cursor"]}, headers=headers)
+    assert response.json()["changed"] == response.json()["deleted"] == []
+
+    response = await client.get("/api/collection/changes", params={"since": "invalid"}, headers=headers)
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_collection_changes_with_overlapping_write(client, test_user, test_movies, db_session):
+    user, token = test_user
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.post("/api/collection/add", json={"movie_id": str(test_movies[0].id)}, headers=headers)
+    cursor = (await client.get("/api/collection/changes", headers=headers)).json()["cursor"]
+
+    # A write that started before the next sync and commits after it
+    writing, release = asyncio.Event(), asyncio.Event()
+    async with AsyncSession(db_session.bind, expire_on_commit=False) as writer:
+        commit = writer.commit
+
+        async def slow_commit():
+            writing.set()
+            await release.wait()
+            await commit()
+
+        writer.commit = slow_commit
+        write = asyncio.create_task(UserMovieRepository(writer).add_to_collection(user.id, movie_id=test_movies[1].id))
+        await writing.wait()
+
+        data = (await client.get("/api/collection/changes", params={"since": cursor}, headers=headers)).json()
+        assert data["changed"] == []
+
+        release.set()
+        await write
+
+    # Picked up by the sync after its commit
+    data = (await client.get("/api/collection/changes", params={"since": data["cursor"]}, headers=headers)).json()
+    assert [m["id"] for m in data["changed"]] == [str(test_movies[1].id)]
+
+@pytest.mark.asyncio
+async def test_kinopoisk_import_already_running(client, test_user):
+    user, token = test_user
+    headers = {"Authorization": f"Bearer {token}"}
+    release = asyncio.Event()
+
+    async def run_import(job, user_id, path):
+        await release.wait()
+
+    with patch("app.api.endpoints.collection.run_kinopoisk_import", run_import):
+        files = {"file": ("kinopoisk.csv", "title\nMovie 1\n".encode(), "text/csv")}
+        response = await client.post("/api/collection/import/kinopoisk", files=files, headers=headers)
+        assert response.status_code == 202
+        response = await client.post("/api/collection/import/kinopoisk", files=files, headers=headers)
+        assert response.status_code == 409
+        release.set()
@@ -1,12 +1,49 @@
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, patch
+from sqlalchemy import select
+from app.models.movie import Movie
+from app.schemas.enums import GroupStrategy
+from app.schemas.movie import GENRE_IDS, get_genre_names
+from app.core.config import settings
+from app.core.security import create_group_invite
+from app.models.genre_preference import UserGenrePreference
+from elasticsearch import ConnectionError as ESConnectionError
+from app.services.elasticsearch_search_backend import ElasticsearchSearchBackend
+from app.services.movie_index_service import MovieIndexService
+from app.core.neighbor_table import NeighborTableFile, write_neighbor_table
+from app.services.item_similarity_service import item_cosine_neighbors
+from app.services.content_similarity_service import movie_vectors, nearest_neighbors
+from app.services.recommendation_service import (
+    CatalogMatrix,
+    RecommendationEngine,
+    RecommendationService,
+    item_neighbors,
+    similar_movies,
+)
+from app.services.search_sync_service import SearchSyncService
+import numpy as np
+from scipy import sparse
+import uuid
 
 @pytest.mark.asyncio
 async def test_search_movies(client, test_user, test_movies, mock_es):
     user, token = test_user
     mock_es.search.return_value = {
-        "hits": {"hits": [{"_id": str(movie.id)} for movie in test_movies]}
+        "hits": {"hits": [
+            {
+                "_id": str(movie.id),
+                "_source": {
+                    "title": movie.title,
+                    "genres": get_genre_names(movie.genre_ids),
+                    "vote_average": movie.vote_average,
+                },
+                "sort": [1.0, str(movie.id)],
+            }
+            for movie in test_movies
+        ]}
     }
+    mock_es.open_point_in_time.return_value = {"id": "pit-1"}
     response = await client.get(
         "/api/movies/search?title=Movie",
         headers={"Authorization": f"Bearer {token}"}
@@ -14,6 +51,88 @@ async def test_search_movies(client, test_user, test_movies, mock_es):
     assert response.status_code == 200
     data = response.json()
     assert len(data) == len(test_movies)
+    assert data[0]["title"] == test_movies[0].title
+    assert data[0]["genres"] == ["боевик", "приключения"]
+    assert "X-Next-Cursor" not in response.headers
+    # A single page closes its point-in-time right away
+    mock_es.open_point_in_time.assert_awaited_once()
+    mock_es.close_point_in_time.assert_awaited_once_with(id="pit-1")
+
+@pytest.mark.asyncio
+async def test_search_movies_cursor(client, test_user, test_movies, mock_es):
+    user, token = test_user
+    hits = [
+        {"_id": str(movie.id), "_source": {"title": movie.title}, "sort": [1.0, str(movie.id)]}
+        for movie in test_movies
+    ]
+    mock_es.open_point_in_time.return_value = {"id": "pit-1"}
+    mock_es.search.return_value = {"pit_id": "pit-2", "hits": {"hits": hits}}
+    response = await client.get(
+        "/api/movies/search?title=Movie&page_size=1",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    cursor = response.headers["X-Next-Cursor"]
+    assert mock_es.search.call_args.kwargs["body"]["pit"]["id"] == "pit-1"
+    mock_es.close_point_in_time.assert_not_awaited()
+
+    mock_es.search.return_value = {"pit_id": "pit-2", "hits": {"hits": hits[1:]}}
+    response = await client.get(
+        f"/api/movies/search?title=Movie&page_size=1&cursor={cursor}",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    assert [m["title"] for m in response.json()] == [test_movies[1].title]
+    body = mock_es.search.call_args.kwargs["body"]
+    assert body["search_after"][:2] == hits[0]["sort"]
+    assert body["pit"]["id"] == "pit-2"
+    assert "X-Next-Cursor" not in response.headers
+    mock_es.open_point_in_time.assert_awaited_once()
+    mock_es.close_point_in_time.assert_awaited_once_with(id="pit-2")
+
+    # The cursor does not continue another query
+    response = await client.get(
+        f"/api/movies/search?title=Other&genres=драма&page_size=1&cursor={cursor}",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_search_movies_cached(client, test_user, test_movies, mock_es, db_session):
+    user, token = test_user
+    movie = test_movies[0]
+    mock_es.open_point_in_time.return_value = {"id": "pit-1"}
+    mock_es.search.return_value = {
+        "hits": {"hits": [{"_id": str(movie.id), "_source": {"title": movie.title}, "sort": [1.0, str(movie.id)]}]}
+    }
+    response = await client.get(
+        "/api/movies/search?title=Movie",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.json()[0]["status"] is None
+
+    await client.post(
+        "/api/collection/add",
+        json={"movie_id": str(movie.id)},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    # Same normalized query: served from cache, with the fresh user status on top
+    response = await client.get(
+        "/api/movies/search?title=%20%20MOVIE%20",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.json()[0]["status"] == "will_watch"
+    assert mock_es.search.await_count == 1
+
+@pytest.mark.asyncio
+async def test_search_movies_invalid_cursor(client, test_user, mock_es):
+    user, token = test_user
+    response = await client.get(
+        "/api/movies/search?title=Movie&cursor=garbage",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 400
 
 @pytest.mark.asyncio
 async def test_search_movies_invalid_genre(client, test_user):
@@ -25,6 +144,125 @@ async def test_search_movies_invalid_genre(client, test_user):
     assert response.status_code == 400
     assert "Invalid genre" in response.json()["detail"]
 
+@pytest.mark.asyncio
+async def test_search_movies_filters_only(client, test_user, test_movies, mock_es):
+    user, token = test_user
+    mock_es.open_point_in_time.return_value = {"id": "pit-1"}
+    mock_es.search.return_value = {"hits": {"hits": []}}
+    response = await client.get(
+        "/api/movies/search?genres=драма&min_rating=7",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    query = mock_es.search.call_args.kwargs["body"]["query"]
+    assert "must" not in query["bool"]
+    assert {"terms": {"genres": ["драма"]}} in query["bool"]["filter"]
+
+@pytest.mark.asyncio
+async def test_browse_movies_facets(client, test_user, test_movies, mock_es):
+    user, token = test_user
+    movie = test_movies[1]
+    mock_es.open_point_in_time.return_value = {"id": "pit-1"}
+    mock_es.search.return_value = {
+        "hits": {"hits": [
+            {"_id": str(movie.id), "_source": {"title": movie.title}, "sort": [8.0, 1500, str(movie.id)]}
+        ]},
+        "aggregations": {
+            "genres": {"buckets": [{"key": "драма", "doc_count": 1}, {"key": "комедия", "doc_count": 1}]},
+            "decades": {"buckets": [{"key": 2020.0, "doc_count": 1}]},
+            "ratings": {"buckets": [{"key": "8-9", "doc_count": 1}]},
+        },
+    }
+    response = await client.get(
+        "/api/movies/browse?genres=драма&sort=popularity",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [m["title"] for m in data["items"]] == [movie.title]
+    assert data["next_cursor"] is None
+    assert data["facets"]["genres"][0] == {"value": "драма", "count": 1}
+    assert data["facets"]["decades"] == [{"value": "2020", "count": 1}]
+    body = mock_es.search.call_args.kwargs["body"]
+    assert body["sort"][0] == {"popularity": "desc"}
+    assert set(body["aggs"]) == {"genres", "decades", "ratings"}
+
+@pytest.mark.asyncio
+async def test_suggest_movies(client, test_user, test_movies, mock_es):
+    user, token = test_user
+    movie = test_movies[0]
+    mock_es.search.return_value = {
+        "suggest": {"titles": [{"options": [
+            {"_id": str(movie.id), "_source": {"title": movie.title, "poster_path": movie.poster_path}}
+        ]}]}
+    }
+    response = await client.get(
+        "/api/movies/suggest?prefix=Mov",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data == [{
+        "id": str(movie.id),
+        "title": movie.title,
+        "release_date": None,
+        "poster_path": movie.poster_path,
+    }]
+    body = mock_es.search.call_args.kwargs["body"]
+    assert body["suggest"]["titles"]["prefix"] == "Mov"
+
+@pytest.mark.asyncio
+async def test_suggest_movies_unauthorized(client):
+    response = await client.get("/api/movies/suggest?prefix=Mov")
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_search_movies_postgres_fallback(client, test_user, test_movies, mock_es):
+    user, token = test_user
+    mock_es.ping.return_value = False
+    response = await client.get(
+        "/api/movies/search?title=Movie 1&page_size=1",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    assert [m["title"] for m in response.json()] == [test_movies[0].title]
+    assert response.json()[0]["genres"] == ["боевик", "приключения"]
+    mock_es.search.assert_not_awaited()
+
+    # ES comes back with a connection error mid-request: the same search is served by Postgres
+    mock_es.ping.return_value = True
+    mock_es.search.side_effect = ESConnectionError("Connection refused")
+    with patch.object(settings, "SEARCH_HEALTHCHECK_INTERVAL", 0):
+        response = await client.get(
+            "/api/movies/browse?genres=драма",
+            headers={"Authorization": f"Bearer {token}"}
+        )
+    assert response.status_code == 200
+    data = response.json()
+    assert [m["title"] for m in data["items"]] == [test_movies[1].title]
+    assert {"value": "драма", "count": 1} in data["facets"]["genres"]
+    assert data["facets"]["decades"] == [{"value": "2020", "count": 1}]
+
+@pytest.mark.asyncio
+async def test_search_health_check_pings_once(mock_es):
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def ping():
+        started.set()
+        await release.wait()
+        return False
+
+    mock_es.ping.side_effect = ping
+    backend = ElasticsearchSearchBackend(mock_es)
+    check = asyncio.create_task(backend.is_healthy())
+    await started.wait()
+    # A concurrent request keeps the previous result instead of pinging too
+    assert await backend.is_healthy() is True
+    release.set()
+    assert await check is False
+    assert mock_es.ping.await_count == 1
+    mock_es.options.assert_called_once_with(request_timeout=settings.SEARCH_HEALTHCHECK_TIMEOUT, max_retries=0)
+
 @pytest.mark.asyncio
 async def test_get_top_movies(client, test_user, test_movies):
     user, token = test_user
@@ -52,27 +290,307 @@ async def test_get_recommended_movies(client, test_user, test_movies):
     data = response.json()
     assert len(data) > 0
 
+def test_catalog_matrix_ranks_whole_catalog():
+    ids = [uuid.uuid4() for _ in range(4)]
+    catalog = CatalogMatrix(
+        ids,
+        genre_ids=[[28], [18], [18, 35], [18]],
+        vote_average=[9.0, 6.0, 5.0, 9.5],
+        vote_count=[1000, 1000, 1000, 10],
+        popularity=[1.0, 1.0, 1.0, 1.0],
+    )
+    preferences = np.zeros(len(GENRE_IDS), dtype=np.float32)
+    preferences[GENRE_IDS.index(18)] = 5.0
+    scores = catalog.score(preferences)
+    # Drama lovers get dramas first; the movie with too few votes is never recommended
+    assert catalog.top_k(scores, 10) == [ids[1], ids[2], ids[0]]
+    assert catalog.top_k(scores, 2, exclude=[ids[1]]) == [ids[2], ids[0]]
+    assert catalog.top_k(scores, 10, after=(float(scores[1]), ids[1])) == [ids[2], ids[0]]
+
+def test_catalog_matrix_group_strategies():
+    ids = [uuid.uuid4() for _ in range(2)]
+    catalog = CatalogMatrix(
+        ids,
+        genre_ids=[[28], [18]],
+        vote_average=[6.0, 8.0],
+        vote_count=[1000, 1000],
+        popularity=[1.0, 1.0],
+    )
+    preferences = np.zeros((2, len(GENRE_IDS)), dtype=np.float32)
+    preferences[0, GENRE_IDS.index(18)] = 10.0
+    preferences[1, GENRE_IDS.index(18)] = -10.0
+    preferences[1, GENRE_IDS.index(28)] = 2.0
+    average = catalog.score_group(preferences, GroupStrategy.AVERAGE)
+    assert catalog.top_k(average, 2) == [ids[1], ids[0]]
+    # One member hates dramas: the action movie nobody minds wins
+    least_misery = catalog.score_group(preferences, GroupStrategy.LEAST_MISERY)
+    assert catalog.top_k(least_misery, 2) == [ids[0], ids[1]]
+
+def test_item_neighbors_table(tmp_path):
+    # users x movies: movies 0 and 1 are watched together by three users, 2 and 3 by one
+    interactions = sparse.csr_matrix(np.array([
+        [1, 1, 0, 0],
+        [1, 1, 1, 0],
+        [0, 1, 1, 1],
+        [1, 1, 0, 1],
+    ], dtype=np.float32))
+    neighbors, scores = item_cosine_neighbors(interactions, k=2)
+    ids = [uuid.uuid4() for _ in range(4)]
+    path = str(tmp_path / "neighbors.npy")
+    write_neighbor_table(path, ids, neighbors, scores)
+
+    table = NeighborTableFile(path).get()
+    assert [movie_id for movie_id, _ in table.neighbors(ids[0])] == [ids[1]]
+    assert [movie_id for movie_id, _ in table.neighbors(ids[1])][0] == ids[0]
+    assert table.neighbors(uuid.uuid4()) == []
+
+@pytest.mark.asyncio
+async def test_because_you_watched(client, test_user, test_movies, tmp_path):
+    user, token = test_user
+    headers = {"Authorization": f"Bearer {token}"}
+    path = str(tmp_path / "neighbors.npy")
+    write_neighbor_table(
+        path,
+        [movie.id for movie in test_movies],
+        np.array([[1], [0]], dtype=np.int32),
+        np.array([[0.9], [0.9]], dtype=np.float32),
+    )
+    await client.post("/api/collection/add", json={"movie_id": str(test_movies[0].id), "status": "watched"}, headers=headers)
+
+    with patch.object(item_neighbors, "path", path):
+        response = await client.get("/api/movies/because-you-watched", headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data[0]["movie"]["title"] == test_movies[0].title
+        assert [m["title"] for m in data[0]["recommendations"]] == [test_movies[1].title]
+
+        # The neighbour of the watched movie is blended into the main list
+        response = await client.get("/api/movies/recommended", headers=headers)
+        assert response.json()[0]["title"] == test_movies[1].title
+
+def test_similar_movies_by_overview_and_genres():
+    vectors = movie_vectors(
+        [
+            "Экипаж космического корабля летит к далёкой планете",
+            "Экипаж космического корабля терпит крушение на планете",
+            "Романтическая история любви в Париже",
+        ],
+        [[878], [878, 12], [10749]],
+    )
+    neighbors, scores = nearest_neighbors(vectors, k=2)
+    assert neighbors[0][0] == 1 and neighbors[1][0] == 0
+    # Nothing in common with the space movies: no neighbour at all
+    assert list(neighbors[2]) == [-1, -1]
+    assert scores[0][0] > 0
+
+@pytest.mark.asyncio
+async def test_get_similar_movies(client, test_user, test_movies, tmp_path):
+    user, token = test_user
+    headers = {"Authorization": f"Bearer {token}"}
+    path = str(tmp_path / "similar.npy")
+    write_neighbor_table(
+        path,
+        [movie.id for movie in test_movies],
+        np.array([[1], [0]], dtype=np.int32),
+        np.array([[0.5], [0.5]], dtype=np.float32),
+    )
+    with patch.object(similar_movies, "path", path):
+        response = await client.get(f"/api/movies/{test_movies[0].id}/similar", headers=headers)
+    assert response.status_code == 200
+    assert [m["title"] for m in response.json()] == [test_movies[1].title]
+
+    response = await client.get(f"/api/movies/{uuid.uuid4()}/similar", headers=headers)
+    assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_get_recommended_movies_pages(client, test_user, test_movies):
+    user, token = test_user
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.get("/api/movies/recommended?limit=1", headers=headers)
+    assert [m["title"] for m in response.json()] == [test_movies[1].title]
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = await client.get(f"/api/movies/recommended?limit=1&cursor={cursor}", headers=headers)
+    assert [m["title"] for m in response.json()] == [test_movies[0].title]
+    assert "X-Next-Cursor" not in response.headers
+
+    # Movies in the collection are skipped before the page is taken
+    await client.post("/api/collection/add", json={"movie_id": str(test_movies[1].id)}, headers=headers)
+    response = await client.get("/api/movies/recommended?limit=1", headers=headers)
+    assert [m["title"] for m in response.json()] == [test_movies[0].title]
+
+@pytest.mark.asyncio
+async def test_recommended_movies_cached_until_collection_changes(client, test_user, test_movies):
+    user, token = test_user
+    headers = {"Authorization": f"Bearer {token}"}
+    first = await client.get("/api/movies/recommended", headers=headers)
+    with patch.object(RecommendationService, "_rank_page", new_callable=AsyncMock) as rank_page:
+        repeat = await client.get("/api/movies/recommended", headers=headers)
+    rank_page.assert_not_awaited()
+    assert repeat.json() == first.json()
+
+    await client.post("/api/collection/add", json={"movie_id": str(test_movies[1].id)}, headers=headers)
+    response = await client.get("/api/movies/recommended", headers=headers)
+    assert [m["title"] for m in response.json()] == [test_movies[0].title]
+
+@pytest.mark.asyncio
+async def test_catalog_version_bumped_only_on_change():
+    engine = RecommendationEngine()
+    rows = [type("Row", (), dict(id=uuid.uuid4(), genre_ids=[28], vote_average=7.0, vote_count=1000, popularity=1.0))]
+
+    async def stream():
+        for row in rows:
+            yield row
+
+    with patch("app.services.recommendation_service.MovieRepository") as repository:
+        repository.return_value.stream_catalog_rows = stream
+        await engine.refresh(None)
+        await engine.refresh(None)
+        assert engine.version == 1
+        rows[0].vote_average = 8.0
+        await engine.refresh(None)
+        assert engine.version == 2
+
+@pytest.mark.asyncio
+async def test_group_recommendations_skip_movies_watched_by_any_member(client, test_user, admin_user, test_movies, db_session):
+    user, token = test_user
+    admin, admin_token = admin_user
+    await client.post(
+        "/api/collection/add",
+        json={"movie_id": str(test_movies[1].id), "status": "watched"},
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    response = await client.post("/api/user/me/group-invite", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    invite = response.json()["token"]
+
+    response = await client.post(
+        "/api/movies/recommended/group",
+        json={"member_invites": [invite], "strategy": "average"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    assert [m["title"] for m in response.json()] == [test_movies[0].title]
+    # Ranking a group does not store vectors of its members
+    assert await db_session.scalar(
+        select(UserGenrePreference.user_id).where(UserGenrePreference.user_id == user.id)
+    ) is None
+
+    # Members take part through their own invites only: neither ids nor access tokens are accepted
+    for member in (str(admin.id), admin_token):
+        response = await client.post(
+            "/api/movies/recommended/group",
+            json={"member_invites": [member]},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == 403
+
+    # The invite of a deleted account does not tell which member is missing
+    response = await client.post(
+        "/api/movies/recommended/group",
+        json={"member_invites": [create_group_invite(uuid.uuid4())[0]]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Group member not found"
+
 @pytest.mark.asyncio
 async def test_get_recommended_movies_unauthorized(client):
     response = await client.get("/api/movies/recommended")
     assert response.status_code == 401
 
 @pytest.mark.asyncio
-async def test_reindex_movies_admin(client, admin_user, test_movies, mock_es):
+async def test_reindex_movies_admin(client, admin_user, mock_es):
     admin, token = admin_user
-    mock_es.indices.exists.return_value = True
-    mock_es.indices.delete.return_value = None
-    mock_es.indices.create.return_value = None
-    from elasticsearch.helpers import async_bulk
-    with patch('elasticsearch.helpers.async_bulk', new_callable=AsyncMock) as mock_bulk:
-        mock_bulk.return_value = (len(test_movies), [])
+    with patch('app.api.endpoints.movies.run_reindex_job', new_callable=AsyncMock) as mock_job:
         response = await client.post(
             "/api/movies/reindex",
             headers={"Authorization": f"Bearer {token}"}
         )
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+
+        response = await client.get(
+            f"/api/movies/reindex/{job_id}",
+            headers={"Authorization": f"Bearer {token}"}
+        )
         assert response.status_code == 200
-        data = response.json()
-        assert data["total_movies"] == len(test_movies)
+        assert response.json()["kind"] == "reindex"
+    mock_job.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_reindex_creates_new_index_version(mock_es):
+    movies = [Movie(
+        id=uuid.uuid4(), tmdb_id=1, title="Movie 1", overview="Overview 1", genre_ids=[28],
+        original_language="en", original_title="Movie 1", adult=False, popularity=1.0,
+        video=False, vote_average=7.5, vote_count=1000,
+    )]
+
+    async def stream():
+        for movie in movies:
+            yield movie
+
+    async def streaming_bulk(client, actions, **kwargs):
+        async for action in actions:
+            assert action["_index"] == "movies_v2"
+            yield True, {}
+
+    mock_es.indices.get.return_value = {"movies_v1": {}}
+    mock_es.indices.exists_alias.return_value = True
+    mock_es.indices.get_alias.return_value = {"movies_v1": {"aliases": {"movies": {}}}}
+    mock_es.count.return_value = {"count": len(movies)}
+    with patch('elasticsearch.helpers.async_streaming_bulk', streaming_bulk):
+        index, indexed = await MovieIndexService(mock_es).reindex(stream())
+    assert (index, indexed) == ("movies_v2", len(movies))
+    mock_es.indices.update_aliases.assert_awaited_once_with(body={"actions": [
+        {"remove": {"index": "movies_v1", "alias": "movies"}},
+        {"add": {"index": "movies_v2", "alias": "movies"}},
+    ]})
+
+@pytest.mark.asyncio
+async def test_reindex_without_movies_keeps_current_index(mock_es):
+    async def stream():
+        return
+        yield
+
+    async def streaming_bulk(client, actions, **kwargs):
+        async for action in actions:
+            yield True, {}
+
+    mock_es.indices.get.return_value = {"movies_v1": {}}
+    with patch('elasticsearch.helpers.async_streaming_bulk', streaming_bulk):
+        with pytest.raises(RuntimeError, match="No movies found"):
+            await MovieIndexService(mock_es).reindex(stream())
+    mock_es.indices.delete.assert_awaited_once_with(index="movies_v2")
+    mock_es.indices.update_aliases.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_search_sync_indexes_changed_movies(db_session, test_movies, mock_es):
+    mock_es.indices.exists_alias.return_value = True
+    mock_es.indices.get_alias.return_value = {"movies_v1": {"aliases": {"movies": {}}}}
+    indexed = []
+
+    async def streaming_bulk(client, actions, **kwargs):
+        async for action in actions:
+            assert action["_index"] == "movies_v1"
+            indexed.append(action["_id"])
+            yield True, {}
+
+    with patch('elasticsearch.helpers.async_streaming_bulk', streaming_bulk), \
+            patch.object(settings, "SEARCH_SYNC_LAG_SECONDS", 0):
+        assert await SearchSyncService(db_session, mock_es).sync() >= len(test_movies)
+        assert {str(movie.id) for movie in test_movies} <= set(indexed)
+        # Checkpoint advanced: nothing left to sync
+        assert await SearchSyncService(db_session, mock_es).sync() == 0
+
+@pytest.mark.asyncio
+async def test_reindex_status_unknown_job(client, admin_user):
+    admin, token = admin_user
+    response = await client.get(
+        f"/api/movies/reindex/{uuid.uuid4()}",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 404
 
 @pytest.mark.asyncio
 async def test_reindex_movies_non_admin(client, test_user):
@@ -15,4 +15,27 @@ async def test_get_user_info(client, test_user):
 @pytest.mark.asyncio
 async def test_get_user_info_unauthorized(client):
     response = await client.get("/api/user/me")
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_get_user_stats(client, test_user, test_movies):
+    user, token = test_user
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.post("/api/collection/add", json={"movie_id": str(test_movies[0].id), "status": "watched"}, headers=headers)
+    await client.post("/api/collection/add", json={"movie_id": str(test_movies[1].id)}, headers=headers)
+    await client.post("/api/collection/add", json={"title": "Custom Movie"}, headers=headers)
+
+    response = await client.get("/api/user/me/stats", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 3
+    assert data["by_status"] == {"will_watch": 2, "watched": 1, "dropped": 0}
+    # Custom movies have no genres
+    assert sum(data["genres"].values()) == len(test_movies[0].genre_ids) + len(test_movies[1].genre_ids)
+    assert data["rated"] == 0 and data["average_rating"] is None
+    assert [month["count"] for month in data["added_per_month"]] == [3]
+
+    # Cached per collection version: a change is visible right away
+    await client.delete(f"/api/collection/{test_movies[1].id}", headers=headers)
+    response = await client.get("/api/user/me/stats", headers=headers)
+    assert response.json()["by_status"]["will_watch"] == 1